@@ -0,0 +1,129 @@
+"""
+    AIMD wait times between the polls of a scale test.
+"""
+import collections
+import csv
+import random
+import time
+
+from journal import BACKOFF
+
+DEFAULT_MIN_INTERVAL = 1.0
+DEFAULT_MAX_INTERVAL = 60.0
+# additive step the interval shrinks by after a healthy request
+DEFAULT_DECREASE_STEP = 0.5
+# factor the interval grows by after a failed or slow request
+DEFAULT_INCREASE_FACTOR = 2.0
+# requests slower than this in seconds are a sign of an overloaded leader
+DEFAULT_LATENCY_THRESHOLD = 5.0
+DEFAULT_JITTER = 0.1
+# error rate of the recent requests above which the interval is not shortened
+ERROR_RATE_THRESHOLD = 0.2
+ERROR_WINDOW = 20
+
+SUCCESS = 'success'
+SLOW = 'slow'
+FAILURE = 'failure'
+
+
+class BackoffDecision(object):
+    __slots__ = ['timestamp', 'outcome', 'latency', 'error_rate', 'interval']
+
+    def __init__(self, timestamp, outcome, latency, error_rate, interval):
+        self.timestamp = timestamp
+        self.outcome = outcome
+        self.latency = latency
+        self.error_rate = error_rate
+        self.interval = interval
+
+
+class AdaptiveBackoff(object):
+    """ AIMD controller of the wait time between requests.
+
+        Report the outcome of every request with `success(latency)` or `failure()` and
+        wait `wait_time()` (or call `sleep()`) before the next one.  All decisions are
+        kept in `decisions` for later analysis.
+    """
+
+    def __init__(self, name, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                 decrease_step=DEFAULT_DECREASE_STEP, increase_factor=DEFAULT_INCREASE_FACTOR,
+                 latency_threshold=DEFAULT_LATENCY_THRESHOLD, jitter=DEFAULT_JITTER):
+        self.name = name
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.decrease_step = decrease_step
+        self.increase_factor = increase_factor
+        self.latency_threshold = latency_threshold
+        self.jitter = jitter
+        self.interval = min_interval
+        self.decisions = []
+        self._recent = collections.deque(maxlen=ERROR_WINDOW)
+        self._random = random.Random()
+
+    @property
+    def error_rate(self):
+        if not self._recent:
+            return 0.0
+        return round(self._recent.count(False) / float(len(self._recent)), 3)
+
+    def success(self, latency=0.0):
+        """ Reports a successful request which took `latency` seconds.
+        """
+        self._recent.append(True)
+        if latency > self.latency_threshold:
+            return self._increase(SLOW, latency)
+
+        if self.error_rate <= ERROR_RATE_THRESHOLD:
+            self.interval = max(self.min_interval, self.interval - self.decrease_step)
+        return self._decide(SUCCESS, latency)
+
+    def failure(self):
+        """ Reports a failed request.
+        """
+        self._recent.append(False)
+        return self._increase(FAILURE, None)
+
+    def _increase(self, outcome, latency):
+        self.interval = min(self.max_interval, self.interval * self.increase_factor)
+        return self._decide(outcome, latency)
+
+    def _decide(self, outcome, latency):
+        self.decisions.append(BackoffDecision(time.time(), outcome, latency, self.error_rate, self.interval))
+        return self.interval
+
+    def wait_time(self):
+        """ The current interval with a random jitter.
+        """
+        spread = self.interval * self.jitter
+        return max(0.0, self.interval + self._random.uniform(-spread, spread))
+
+    def sleep(self):
+        time.sleep(self.wait_time())
+
+    def rows(self, start=0.0):
+        """ Yields the decisions as tuples with the time relative to `start`.
+        """
+        for decision in self.decisions:
+            latency = '' if decision.latency is None else round(decision.latency, 3)
+            yield (round(decision.timestamp - start, 3), decision.outcome, latency,
+                   decision.error_rate, round(decision.interval, 3))
+
+    def __repr__(self):
+        return 'backoff {}: interval: {}s error rate: {} decisions: {}'.format(
+            self.name,
+            round(self.interval, 3),
+            self.error_rate,
+            len(self.decisions))
+
+
+def write_backoff_csv(journal, filename='scale-backoff.csv'):
+    """ Writes every backoff decision journaled for the tests.  The time is in seconds
+        since the start of the test.
+    """
+    with open(filename, 'w') as f:
+        w = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        w.writerow(['test', 'backoff', 'time', 'outcome', 'latency', 'error_rate', 'interval'])
+        for record in journal.records(BACKOFF):
+            for name, rows in sorted(record['backoffs'].items()):
+                for row in rows:
+                    w.writerow([record['test'], name] + list(row))
@@ -0,0 +1,151 @@
+"""
+    Sweeps the batch size of `PUT /v2/apps` over growing numbers of existing groups.
+"""
+import csv
+import math
+import os
+import time
+
+from latency import LatencyHistogram
+
+SWEEP_BATCH_SIZES = [int(size) for size in os.environ.get('SCALE_SWEEP_BATCH_SIZES', '1,10,100,1000,5000').split(',')]
+# number of groups which exist before the apps are created
+SWEEP_STATE_SIZES = [int(size) for size in os.environ.get('SCALE_SWEEP_STATE_SIZES', '0,1000,10000').split(',')]
+# apps created per batch size, rounded up to a full batch
+SWEEP_APPS = int(os.environ.get('SCALE_SWEEP_APPS', 5000))
+
+
+class SweepPoint(object):
+    """ The creation of `apps` apps in batches of `batch_size` on top of `state` groups.
+    """
+
+    def __init__(self, state, batch_size):
+        self.state = state
+        self.batch_size = batch_size
+        self.apps = 0
+        self.requests = 0
+        self.errors = 0
+        self.elapsed = None
+        self.latencies = LatencyHistogram()
+        self.error = None
+
+    @property
+    def success(self):
+        return self.error is None and self.errors == 0
+
+    @property
+    def apps_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return round(self.apps / self.elapsed, 3)
+
+    def __repr__(self):
+        return 'sweep: state: {} batch size: {} apps: {} errors: {} time: {}s rate: {} apps/s p99: {}ms{}'.format(
+            self.state,
+            self.batch_size,
+            self.apps,
+            self.errors,
+            self.elapsed,
+            self.apps_per_second,
+            self.latencies.percentile(99),
+            '' if self.error is None else ' failed: {}'.format(self.error))
+
+
+class SweepResult(object):
+    """ The points of a sweep and the throughput optimal batch sizes.
+    """
+
+    def __init__(self, points):
+        self.points = points
+
+    def best(self, state):
+        """ The successful point of `state` with the most created apps per second.
+        """
+        points = [point for point in self.points if point.state == state and point.success]
+        return max(points, key=lambda point: point.apps_per_second, default=None)
+
+    def recommended(self):
+        """ The batch size with the highest mean apps per second over all states.  Only
+            batch sizes which succeeded at every state are recommended.
+        """
+        states = sorted(set(point.state for point in self.points))
+        rates = {}
+        for batch_size in sorted(set(point.batch_size for point in self.points)):
+            points = [point for point in self.points if point.batch_size == batch_size and point.success]
+            if len(points) == len(states):
+                rates[batch_size] = sum(point.apps_per_second for point in points) / len(points)
+        return max(rates, key=rates.get, default=None)
+
+    def log(self):
+        for state in sorted(set(point.state for point in self.points)):
+            best = self.best(state)
+            print('    state {}: best batch size {}'.format(state, None if best is None else best.batch_size))
+        print('    recommended batch size: {}'.format(self.recommended()))
+
+
+class BatchSweep(object):
+    """ Creates apps in batches of every batch size on top of every state size.
+
+        :param prepare: brings Marathon to the given number of pre-existing groups
+        :type prepare: function
+        :param create: creates the given number of apps from the given index in one
+                       request and raises if it fails
+        :type create: function
+        :param wait: waits until the deployments of the created apps finished
+        :type wait: function
+        :param cleanup: removes the created apps, the pre-existing groups stay
+        :type cleanup: function
+    """
+
+    def __init__(self, prepare, create, wait, cleanup, batch_sizes=SWEEP_BATCH_SIZES, state_sizes=SWEEP_STATE_SIZES,
+                 apps=SWEEP_APPS):
+        self.prepare = prepare
+        self.create = create
+        self.wait = wait
+        self.cleanup = cleanup
+        self.batch_sizes = batch_sizes
+        self.state_sizes = state_sizes
+        self.apps = apps
+
+    def run(self):
+        points = []
+        for state in self.state_sizes:
+            self.prepare(state)
+            for batch_size in self.batch_sizes:
+                point = self.measure(state, batch_size)
+                print(point)
+                points.append(point)
+                self.cleanup()
+        return SweepResult(points)
+
+    def measure(self, state, batch_size):
+        point = SweepPoint(state, batch_size)
+        start = time.time()
+        try:
+            for batch in range(int(math.ceil(self.apps / batch_size))):
+                request_start = time.time()
+                point.requests = point.requests + 1
+                try:
+                    self.create(batch * batch_size, batch_size)
+                    point.apps = point.apps + batch_size
+                except Exception:
+                    point.errors = point.errors + 1
+                point.latencies.record(time.time() - request_start)
+            self.wait()
+            point.elapsed = round(time.time() - start, 3)
+        except Exception as e:
+            point.error = e
+        return point
+
+
+def write_sweep_csv(result, filename='cap-batch-sweep.csv'):
+    """ Writes a row per state and batch size with the latencies of the requests in ms.
+    """
+    with open(filename, 'w') as f:
+        w = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        w.writerow(['state', 'batch_size', 'apps', 'requests', 'errors', 'elapsed', 'apps_per_second',
+                    'p50', 'p99', 'max', 'error'])
+        for point in result.points:
+            w.writerow([point.state, point.batch_size, point.apps, point.requests, point.errors, point.elapsed,
+                        point.apps_per_second, point.latencies.percentile(50), point.latencies.percentile(99),
+                        point.latencies.max_ms, '' if point.error is None else str(point.error)])
@@ -0,0 +1,147 @@
+"""
+    Galloping and bisecting search for the largest size Marathon deploys.
+"""
+import csv
+import os
+import time
+
+CAP_RESOLUTION = int(os.environ.get('SCALE_CAP_RESOLUTION', 500))
+CAP_CONFIRMATIONS = int(os.environ.get('SCALE_CAP_CONFIRMATIONS', 1))
+
+PHASE_GALLOP = 'gallop'
+PHASE_BISECT = 'bisect'
+PHASE_CONFIRM = 'confirm'
+
+
+class CapacityProbe(object):
+    """ The outcome of probing one size.
+    """
+
+    def __init__(self, phase, size, success, elapsed, error=None):
+        self.phase = phase
+        self.size = size
+        self.success = success
+        self.elapsed = elapsed
+        self.error = error
+
+    def __repr__(self):
+        return 'probe: {} {} {} in {}s{}'.format(
+            self.phase,
+            self.size,
+            'passed' if self.success else 'failed',
+            self.elapsed,
+            '' if self.error is None else ' ({})'.format(self.error))
+
+
+class CapacityResult(object):
+    """ The converged maximum of a capacity search.  The maximum lies in
+        [lower, upper), `upper` is None if no probe failed.
+    """
+
+    def __init__(self, lower, upper, probes):
+        self.lower = lower
+        self.upper = upper
+        self.probes = probes
+
+    @property
+    def maximum(self):
+        return self.lower
+
+    @property
+    def elapsed(self):
+        return round(sum(probe.elapsed for probe in self.probes), 3)
+
+    def __str__(self):
+        return 'capacity: {} bounds: [{}, {}) probes: {} time: {}s'.format(
+            self.maximum,
+            self.lower,
+            'unknown' if self.upper is None else self.upper,
+            len(self.probes),
+            self.elapsed)
+
+
+class CapacitySearch(object):
+    """ Searches the largest size for which `probe` passes.
+
+        :param probe: deploys the given size and raises if it fails
+        :type probe: function
+        :param reset: brings Marathon back to a clean state before every probe
+        :type reset: function
+        :param resolution: the search stops when the bounds are closer than this
+        :type resolution: int
+        :param confirmations: number of times the maximum is probed again
+        :type confirmations: int
+        :param max_size: the galloping stops at this size, None for no limit
+        :type max_size: int
+    """
+
+    def __init__(self, probe, reset, resolution=CAP_RESOLUTION, confirmations=CAP_CONFIRMATIONS, max_size=None):
+        self.probe = probe
+        self.reset = reset
+        self.resolution = max(1, resolution)
+        self.confirmations = confirmations
+        self.max_size = max_size
+        self.probes = []
+
+    def run(self, sizes):
+        """ Gallops through `sizes`, e.g. `incremental_steps`, until a probe fails and
+            bisects between the last good and the first bad size.
+        """
+        lower, upper = self._gallop(sizes)
+        while True:
+            lower, upper = self._bisect(lower, upper)
+            confirmed = self._confirm(lower)
+            if confirmed:
+                return CapacityResult(lower, upper, list(self.probes))
+            # the maximum was a lucky probe, it is the new upper bound
+            upper = lower
+            lower = max([probe.size for probe in self.probes if probe.success and probe.size < upper] + [0])
+
+    def _gallop(self, sizes):
+        lower = 0
+        for size in sizes:
+            if self.max_size is not None and size > self.max_size:
+                return lower, None
+            if not self._probe(PHASE_GALLOP, size):
+                return lower, size
+            lower = size
+        return lower, None
+
+    def _bisect(self, lower, upper):
+        while upper is not None and upper - lower > self.resolution:
+            middle = (lower + upper) // 2
+            if self._probe(PHASE_BISECT, middle):
+                lower = middle
+            else:
+                upper = middle
+        return lower, upper
+
+    def _confirm(self, size):
+        if size == 0:
+            return True
+        for _ in range(self.confirmations):
+            if not self._probe(PHASE_CONFIRM, size):
+                return False
+        return True
+
+    def _probe(self, phase, size):
+        self.reset()
+        start = time.time()
+        try:
+            self.probe(size)
+            probe = CapacityProbe(phase, size, True, round(time.time() - start, 3))
+        except Exception as e:
+            probe = CapacityProbe(phase, size, False, round(time.time() - start, 3), e)
+        print(probe)
+        self.probes.append(probe)
+        return probe.success
+
+
+def write_capacity_csv(result, filename='cap-search.csv'):
+    """ Writes a row per probe of the search.
+    """
+    with open(filename, 'w') as f:
+        w = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        w.writerow(['phase', 'size', 'success', 'elapsed'])
+        for probe in result.probes:
+            w.writerow([probe.phase, probe.size, probe.success, probe.elapsed])
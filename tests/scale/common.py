@@ -1,25 +1,62 @@
+import multiprocessing
+import os
 import pytest
 import retrying
 import shakedown
 import time
 import traceback
 
+from backoff import AdaptiveBackoff
 from datetime import timedelta
 from dcos.mesos import DCOSClient
 from dcos import mesos
 from shakedown import *
 from utils import *
+from connection import connection_stats, is_local_marathon, marathon_client, marathon_headers, marathon_service_url
+from deployment_tracker import DeploymentTracker
+from driver import ShardedLoadDriver
+from events import INFO, PHASE_DEPLOY, PHASE_LAUNCH, PHASE_SETUP, PHASE_UNDEPLOY, EventLog
+from journal import BACKOFF, DEPLOY, EVENTS, LATENCY, LAUNCH, SAMPLES, UNDEPLOY
+from latency import CLIENT_ENDPOINTS, InstrumentedClient, LatencyRecorder
+from launcher import create_launcher
+from marathon_metrics import METRICS_INTERVAL, MarathonMetricsSampler
+from openloop import create_open_loop_launcher
+from payload import FAKE_MARATHON_VERSION, GROUP_GZIP, GroupPayload, post_group
+from probes import DEFAULT_PROBE, LOCAL_PROBE, LOCAL_VERIFICATION_PROBE, VERIFICATION_PROBE, create_probe
+from progress import abort_requested
+from simulation import SIMULATION, restart_simulation
+from timeseries import ScaleTimeSeries
+
+# the teardown is shared with the system integration tests
+Teardown = system_module('teardown').Teardown
+group_removals = system_module('teardown').group_removals
 
 MAX_CONSECUTIVE_SCALE_FAILS = 9
 MAX_HOURS_OF_TEST = 4
+LAUNCH_CHECKPOINT = 100
+LAUNCH_CONCURRENCY = 16
 
-EVENT_HEADER = '    event:'
+# with SCALE_SHARDED_LAUNCH=true count tests of at least this many apps are launched from multiple
+# processes, without the deployment checkpoint every LAUNCH_CHECKPOINT apps
+SHARDED_LAUNCH = os.environ.get('SCALE_SHARDED_LAUNCH', '').lower() in ['1', 'true', 'yes']
+SHARDED_LAUNCH_THRESHOLD = 10000
+LAUNCH_WORKERS = int(os.environ.get('SCALE_LAUNCH_WORKERS', multiprocessing.cpu_count()))
+
+# the open loop ladder runs for hours and is only run with SCALE_OPEN_LOOP=true
+OPEN_LOOP = os.environ.get('SCALE_OPEN_LOOP', '').lower() in ['1', 'true', 'yes']
+# inter arrival times of open loop launches: fixed or poisson
+ARRIVAL_DISTRIBUTION = os.environ.get('SCALE_ARRIVAL_DISTRIBUTION', 'poisson')
+
+# backend of current_scale, see probes.py
+SCALE_PROBE = os.environ.get('SCALE_PROBE', LOCAL_PROBE if is_local_marathon() else DEFAULT_PROBE)
+SCALE_VERIFICATION_PROBE = LOCAL_VERIFICATION_PROBE if is_local_marathon() else VERIFICATION_PROBE
 
 ERROR_LAUNCH = 'Error (launch failure):'
 ERROR_SCALING = 'Error (scaling error):'
 ERROR_SCALE_TIMEOUT = 'Error (scale timeout):'
 ERROR_MARATHON_TIMEOUT = 'Futures timed out:'
 ERROR_DEPLOYMENT = 'Error (deployment error):'
+ERROR_UNDEPLOYMENT = 'Error (undeployment error):'
 
 FATAL_NOT_SCALING = 'Fatal (not scaling):'
 FATAL_CONSECUTIVE_LAUNCH = 'Fatal (consecutive launch):'
@@ -28,12 +65,14 @@ FATAL_CONSECUTIVE_DEPLOYMENT = 'Fatal (consecutive deployment):'
 FATAL_CONSECUTIVE_UNDEPLOYMENT = 'Fatal (consecutive undeployment):'
 
 ERRORS = [ERROR_LAUNCH, ERROR_SCALING, ERROR_SCALE_TIMEOUT, ERROR_MARATHON_TIMEOUT,
-          ERROR_DEPLOYMENT, FATAL_CONSECUTIVE_LAUNCH, FATAL_NOT_SCALING,
+          ERROR_DEPLOYMENT, ERROR_UNDEPLOYMENT, FATAL_CONSECUTIVE_LAUNCH, FATAL_NOT_SCALING,
           FATAL_CONSECUTIVE_DEPLOYMENT, FATAL_CONSECUTIVE_UNDEPLOYMENT, FATAL_CONSECUTIVE_SCALING]
 
 SKIP_RESOURCES = 'Insufficient Resources'
 SKIP_PREVIOUS_TEST_FAILED = 'Previous Scale Test Failed'
 
+GROUP_ID = "/2deep/group"
+
 
 def app(id=1, instances=1):
     app_json = {
@@ -52,18 +91,29 @@ def app(id=1, instances=1):
     return app_json
 
 
+def pod(id=1, instances=1, containers=2):
+    pod_json = get_resource("pod-{}-containers.json".format(containers))
+    if not str(id).startswith("/"):
+        id = "/" + str(id)
+    pod_json['id'] = id
+    pod_json['scaling']['instances'] = instances
+
+    return pod_json
+
+
 def group(gcount=1, instances=1):
-    id = "/2deep/group"
-    group = {
-        "id": id,
-        "apps": []
+    return {
+        "id": GROUP_ID,
+        "apps": list(group_apps(gcount, instances))
     }
 
-    for num in range(1, gcount + 1):
-        app_json = app(id + "/" + str(num), instances)
-        group['apps'].append(app_json)
 
-    return group
+def group_apps(gcount=1, instances=1, id=None):
+    """ Generates the apps of a group one at a time.
+    """
+    id = id or GROUP_ID
+    for num in range(1, gcount + 1):
+        yield app(id + "/" + str(num), instances)
 
 
 def constraints(name, operator, value=None):
@@ -77,13 +127,23 @@ def unique_host_constraint():
     return constraints('hostname', 'UNIQUE')
 
 
-def delete_all_apps():
-    client = marathon.create_client()
+def create_client(test_obj=None):
+    """ Creates a Marathon client.  If a test object is given every call of the client
+        is timed and recorded in the latency histograms of the test.
+    """
+    client = marathon_client()
+    if test_obj is None:
+        return client
+    return InstrumentedClient(client, test_obj.latencies)
+
+
+def delete_all_apps(test_obj=None):
+    client = create_client(test_obj)
     client.remove_group("/", True)
 
 
 def time_deployment(test=""):
-    client = marathon.create_client()
+    client = marathon_client()
     start = time.time()
     deployment_count = 1
     while deployment_count > 0:
@@ -102,13 +162,13 @@ def time_deployment(test=""):
     return elapse
 
 
-def delete_group(group="/2deep/group"):
-    client = marathon.create_client()
+def delete_group(group=GROUP_ID):
+    client = marathon_client()
     client.remove_group(group, True)
 
 
 def deployment_less_than_predicate(count=10):
-    client = marathon.create_client()
+    client = marathon_client()
     return len(client.get_deployments()) < count
 
 
@@ -116,10 +176,29 @@ def launch_group(test_obj):
     """ Launches a "group" style test, which is 1 HTTP Post request for all
         of the apps defined by count.  It is common to launch X apps as a group
         with only 1 instance each.  It is possible to control the number of instances
-        of an app.
+        of an app.   The body of the request is streamed from a generator of the apps
+        and its size is recorded with the launch results.
     """
-    client = marathon.create_client()
-    client.create_group(group(test_obj.count, test_obj.instance))
+    payload = GroupPayload(GROUP_ID, group_apps(test_obj.count, test_obj.instance), compress_group(test_obj))
+    start = time.time()
+    try:
+        with test_obj.latencies.time(CLIENT_ENDPOINTS['create_group']):
+            post_group(marathon_service_url(test_obj.mom), marathon_headers(), payload)
+    finally:
+        test_obj.launch_results.record_payload(payload)
+    test_obj.launch_results.current_response_time(elapse_time(start))
+
+
+def compress_group(test_obj):
+    """ Whether the group body is gzip compressed.  `SCALE_GROUP_GZIP` is ignored unless the
+        tests run against fake_marathon.py, Marathon itself does not inflate request bodies.
+    """
+    if not GROUP_GZIP:
+        return False
+    if is_local_marathon() and get_marathon_version() == FAKE_MARATHON_VERSION:
+        return True
+    test_obj.add_event('SCALE_GROUP_GZIP ignored: only fake_marathon.py accepts gzip bodies')
+    return False
 
 
 def count_test_app(test_obj):
@@ -133,12 +212,15 @@ def count_test_app(test_obj):
     :param test_obj: Is of type ScaleTest and defines the criteria for the test and logs the results and events of the test.
     """
 
-    with clean_marathon_state(test_obj):
+    with sample_marathon_metrics(test_obj), clean_marathon_state(test_obj), track_deployment(test_obj):
         # launch
         test_obj.start_test()
         launch_results = test_obj.launch_results
         try:
-            launch_apps(test_obj)
+            if SHARDED_LAUNCH and test_obj.count >= SHARDED_LAUNCH_THRESHOLD:
+                launch_apps_sharded(test_obj)
+            else:
+                launch_apps_concurrently(test_obj)
         except Exception as e:
             launch_results.failed(e)
             wait_for_marathon_up(test_obj)
@@ -164,21 +246,27 @@ def launch_apps(test_obj):
         The group test uses a different launch function.
     """
 
-    client = marathon.create_client()
+    client = create_client(test_obj)
     count = test_obj.count
     instances = test_obj.instance
     launch_results = test_obj.launch_results
     deploy_results = test_obj.deploy_results
+    launch_backoff = backoff(test_obj, 'launch')
     scale_failure_count = 0
     for num in range(1, count + 1):
         try:
+            launch_results.record_requests(1)
+            start = time.time()
             client.add_app(app(num, instances))
+            response_time = elapse_time(start)
+            launch_results.current_response_time(response_time)
+            launch_backoff.success(response_time)
             scale_failure_count = 0
 
             # every 100 adds wait for scale up
-            if not num % 100:
+            if not num % LAUNCH_CHECKPOINT:
                 target = num * instances
-                deploy_results.set_current_scale(current_scale())
+                deploy_results.set_current_scale(deployment_scale(test_obj))
                 # wait for target
                 if count_deployment(test_obj, target):
                     abort_msg = 'Count test launch failure at {} out of {}'.format(num, test_obj.target)
@@ -197,16 +285,186 @@ def launch_apps(test_obj):
                 raise Exception(abort_msg)
             # need some time
             else:
-                time.sleep(calculate_scale_wait_time(test_obj, scale_failure_count))
+                launch_backoff.failure()
+                launch_backoff.sleep()
                 quiet_wait_for_marathon_up(test_obj)
 
 
-def log_error_event(test_obj, message, message_type='', noisy=False):
-    full_message = '{} {}'.format(message_type, message)
+def launch_apps_concurrently(test_obj, concurrency=LAUNCH_CONCURRENCY):
+    """ Concurrent version of `launch_apps` used by the count test.  The apps are
+        posted in batches of `LAUNCH_CHECKPOINT` with at most `concurrency` requests
+        in flight.  After every batch the launch waits for the scale of the batch
+        just like `launch_apps` does.  The achieved request rate is recorded in the
+        launch results, which makes it possible to distinguish limits of the harness
+        from limits of Marathon.
+    """
+
+    count = test_obj.count
+    instances = test_obj.instance
+    launch_results = test_obj.launch_results
+    deploy_results = test_obj.deploy_results
+    launch_backoff = backoff(test_obj, 'launch')
+    scale_failure_count = 0
+
+    with create_launcher(test_obj, concurrency) as launcher:
+        try:
+            for first in range(1, count + 1, LAUNCH_CHECKPOINT):
+                last = min(first + LAUNCH_CHECKPOINT - 1, count)
+                payloads = [app(num, instances) for num in range(first, last + 1)]
+                outcomes = launcher.post('v2/apps', payloads, first)
+                # recorded per batch for the live progress
+                launch_results.record_requests(len(outcomes), launcher.elapsed)
+
+                for outcome in outcomes:
+                    test_obj.latencies.record('POST /v2/apps', outcome.elapsed)
+                    launch_results.current_response_time(outcome.elapsed)
+                    if outcome.success:
+                        scale_failure_count = 0
+                        continue
+
+                    log_error_event(test_obj, outcome.error, ERROR_LAUNCH)
+                    scale_failure_count = scale_failure_count + 1
+                    if scale_failure_count > MAX_CONSECUTIVE_SCALE_FAILS:
+                        abort_msg = 'Aborting based on too many failures: {}'.format(scale_failure_count)
+                        log_error_event(test_obj, abort_msg, FATAL_CONSECUTIVE_DEPLOYMENT, True)
+                        raise Exception(abort_msg)
+
+                # give a struggling leader some time before the next batch
+                if any(not outcome.success for outcome in outcomes):
+                    launch_backoff.failure()
+                    launch_backoff.sleep()
+                else:
+                    launch_backoff.success(max(outcome.elapsed for outcome in outcomes))
+
+                # every full batch wait for scale up
+                if last % LAUNCH_CHECKPOINT:
+                    continue
+
+                deploy_results.set_current_scale(deployment_scale(test_obj))
+                if count_deployment(test_obj, last * instances):
+                    abort_msg = 'Count test launch failure at {} out of {}'.format(last, test_obj.target)
+                    test_obj.add_event(abort_msg)
+                    raise Exception(abort_msg)
+        finally:
+            test_obj.add_event('launch rate: {} req/s with {} errors', launcher.request_rate, launcher.errors)
+
+
+def launch_apps_sharded(test_obj, workers=LAUNCH_WORKERS, concurrency=LAUNCH_CONCURRENCY):
+    """ Launches the apps of a count test from `workers` processes with `concurrency`
+        requests in flight each.  This is used for the largest count tests which a single
+        process can not drive.  Contrary to `launch_apps_concurrently` the launch does not
+        pause to wait for scale, the deployment is timed after all apps are launched.
+        Its results are not comparable with those of checkpointed launches, which is why
+        it is only used with `SCALE_SHARDED_LAUNCH`.
+        The latencies and errors streamed by the workers are merged into the test.
+    """
+
+    launch_results = test_obj.launch_results
+    driver = ShardedLoadDriver(marathon_service_url(test_obj.mom), marathon_headers(), workers, concurrency)
+    consecutive_failures = [0]
+
+    def on_progress(progress):
+        for message in progress.error_messages:
+            log_error_event(test_obj, message, ERROR_LAUNCH)
+
+        if progress.requests > 0 and progress.errors == progress.requests:
+            consecutive_failures[0] = consecutive_failures[0] + progress.errors
+        elif progress.requests > 0:
+            consecutive_failures[0] = 0
+
+        return consecutive_failures[0] <= MAX_CONSECUTIVE_SCALE_FAILS
+
+    test_obj.add_event('launching {} apps from {} processes', test_obj.count, driver.workers)
+    try:
+        driver.launch('v2/apps', test_obj.count, test_obj.instance, app, on_progress)
+    finally:
+        test_obj.latencies.histogram('POST /v2/apps').merge(driver.histogram)
+        launch_results.record_requests(driver.requests, driver.elapsed)
+        test_obj.add_event('launch rate: {} req/s with {} errors, requests per process: {}',
+                           driver.request_rate, driver.errors, driver.worker_requests)
+
+    for failure in driver.failures:
+        log_error_event(test_obj, failure, ERROR_LAUNCH, True)
+
+    if consecutive_failures[0] > MAX_CONSECUTIVE_SCALE_FAILS:
+        abort_msg = 'Aborting based on too many failures: {}'.format(consecutive_failures[0])
+        log_error_event(test_obj, abort_msg, FATAL_CONSECUTIVE_DEPLOYMENT, True)
+        raise Exception(abort_msg)
+
+
+def open_loop_test_app(test_obj):
+    """
+    Runs the `openloop` scale test for apps or pods in marathon.
+    The open loop test is defined as X number of apps (or pods) with Y number of instances
+    which are created at a constant arrival rate (`test_obj.arrival_rate` per second)
+    independent of the response times of Marathon.  The latency of the launches is
+    measured from the time a request was due, which includes any queueing delay.
+
+    :param test_obj: Is of type ScaleTest and defines the criteria for the test and logs the results and events of the test.
+    """
+
+    with sample_marathon_metrics(test_obj), clean_marathon_state(test_obj), track_deployment(test_obj):
+        # launch
+        test_obj.start_test()
+        launch_results = test_obj.launch_results
+        try:
+            launch_open_loop(test_obj)
+        except Exception as e:
+            launch_results.failed(e)
+            wait_for_marathon_up(test_obj)
+        else:
+            launch_results.completed()
+
+        # deployment
+        try:
+            test_obj.reset_loop_count()
+            time_deployment2(test_obj)
+        except Exception as e:
+            print(e)
+            test_obj.deploy_results.failed(e)
+
+
+def launch_open_loop(test_obj, distribution=ARRIVAL_DISTRIBUTION):
+    """ Launches all apps (or pods) of the test at the arrival rate of the test.
+        Failed launches are logged but do not slow down the arrivals.
+    """
+
+    count = test_obj.count
+    instances = test_obj.instance
+    launch_results = test_obj.launch_results
+    if test_obj.under_test == 'pods':
+        path = 'v2/pods'
+        payloads = [pod(num, instances) for num in range(1, count + 1)]
+        # every container of a pod is a task
+        test_obj.deploy_results.target = test_obj.target * len(pod()['containers'])
+    else:
+        path = 'v2/apps'
+        payloads = [app(num, instances) for num in range(1, count + 1)]
+
+    endpoint = 'POST /{}'.format(path)
+    with create_open_loop_launcher(test_obj, test_obj.arrival_rate, distribution) as launcher:
+        outcomes = launcher.post(path, payloads)
+
+    for outcome in outcomes:
+        test_obj.latencies.record(endpoint, outcome.elapsed)
+        test_obj.latencies.record('{} (open loop)'.format(endpoint), outcome.corrected_elapsed)
+        launch_results.current_response_time(outcome.corrected_elapsed)
+        if not outcome.success:
+            log_error_event(test_obj, outcome.error, ERROR_LAUNCH)
+
+    launch_results.record_requests(launcher.requests, launcher.elapsed)
+    test_obj.add_event('open loop launch: {} arrivals/s ({}) offered, {} req/s achieved, {} max outstanding',
+                       test_obj.arrival_rate, distribution, launcher.request_rate, launcher.max_outstanding)
+
+    if outcomes and launcher.errors == len(outcomes):
+        raise Exception('All {} open loop launches failed'.format(len(outcomes)))
+
+
+def log_error_event(test_obj, message, message_type=INFO, noisy=False):
     if test_obj is not None:
-        test_obj.add_event(full_message)
+        test_obj.add_event('{}', message, event_type=message_type)
     if noisy:
-        print(full_message)
+        print('{} {}'.format(message_type, message))
 
 
 def instance_test_app(test_obj):
@@ -220,7 +478,7 @@ def instance_test_app(test_obj):
     :param test_obj: Is of type ScaleTest and defines the criteria for the test and logs the results and events of the test.
     """
 
-    with clean_marathon_state(test_obj):
+    with sample_marathon_metrics(test_obj), clean_marathon_state(test_obj), track_deployment(test_obj):
         # launch
         test_obj.start_test()
         launch_results = test_obj.launch_results
@@ -253,11 +511,12 @@ def group_test_app(test_obj):
     :param test_obj: Is of type ScaleTest and defines the criteria for the test and logs the results and events of the test.
     """
 
-    with clean_marathon_state(test_obj):
+    with sample_marathon_metrics(test_obj), clean_marathon_state(test_obj), track_deployment(test_obj):
         # launch
         test_obj.start_test()
         launch_results = test_obj.launch_results
         try:
+            launch_results.record_requests(1)
             launch_group(test_obj)
         except Exception as e:
             print(e)
@@ -277,59 +536,49 @@ def group_test_app(test_obj):
 
 
 def delete_all_apps_wait(test_obj=None, msg='undeployment failure'):
-    """ Used to remove all instances of apps and wait until the deployment finishes
+    """ Used to remove all instances of apps and wait until the deployment finishes.
+        The cleanup before a test starts is not the undeployment of the test.
     """
 
-    if test_obj is not None and test_obj.deploy_results.current_scale > 0:
-        test_obj.add_event('Undeploying {} tasks'.format(test_obj.deploy_results.current_scale))
-
-    try:
-        delete_all_apps()
-    except Exception as e:
-        log_error_event(test_obj, e, noisy=True)
+    undeploying = test_obj is not None and test_obj.phase != PHASE_SETUP
+    if undeploying:
+        test_obj.phase = PHASE_UNDEPLOY
+        if test_obj.deploy_results.current_scale > 0:
+            test_obj.add_event('Undeploying {} tasks', test_obj.deploy_results.current_scale)
 
     # some deletes (group test deletes commonly) timeout on remove_app
     # however it is a marathon internal issue on getting a timely response
     # all tested situations the remove did succeed
+    teardown = create_teardown(test_obj)
     try:
-        undeployment_wait(test_obj)
+        stats = teardown.run(group_removals(teardown.client, ['/']), None)
     except Exception as e:
-        log_error_event(test_obj, e, noisy=True)
+        if undeploying:
+            test_obj.undeploy_results.failed(e)
+        else:
+            log_error_event(test_obj, e, FATAL_CONSECUTIVE_UNDEPLOYMENT)
+        print('{} {}'.format(FATAL_CONSECUTIVE_UNDEPLOYMENT, e))
         assert False, e
 
+    for removal_id, error in stats.errors:
+        log_error_event(test_obj, error, ERROR_UNDEPLOYMENT if undeploying else INFO, noisy=True)
+    if undeploying:
+        test_obj.undeploy_results.completed(stats)
 
-def undeployment_wait(test_obj=None):
-    client = marathon.create_client()
-    start = time.time()
-    deployment_count = 1
-    failure_count = 0
-    while deployment_count > 0:
-        # need protection when tearing down
-        try:
-            deployments = client.get_deployments()
-            deployment_count = len(deployments)
-
-            if deployment_count > 0:
-                time.sleep(1)
-                failure_count = 0
-        except Exception:
-            failure_count += 1
-            # consecutive failures great than x
-            if failure_count > 10 and test_obj is not None:
-                test_obj.failed('Too many failures waiting for undeploy', FATAL_CONSECUTIVE_UNDEPLOYMENT)
-                raise TestException()
-
-            wait_for_marathon_up(test_obj)
-            pass
 
-    if test_obj is not None:
-        test_obj.undeploy_complete(start)
+def create_teardown(test_obj=None):
+    """ A teardown of the Marathon under test.  The checks of the deployments are
+        paced by the `undeployment` backoff of the test.
+    """
+    mom = None if test_obj is None else test_obj.mom
+    return Teardown(create_client(test_obj), marathon_service_url(mom), marathon_headers(),
+                    poller=backoff(test_obj, 'undeployment'))
 
 
 def count_deployment(test_obj, step_target):
 
     deploy_results = test_obj.deploy_results
-    client = marathon.create_client()
+    deployment_backoff = backoff(test_obj, 'deployment')
 
     deploying = True
     abort = False
@@ -339,13 +588,19 @@ def count_deployment(test_obj, step_target):
     while deploying and not abort:
         try:
 
-            task_count = current_scale()
+            task_count = deployment_scale(test_obj)
+            response_time = sample_deployment(test_obj, task_count)
+            if response_time is None:
+                deployment_backoff.failure()
+            else:
+                deploy_results.current_response_time(response_time)
+                deployment_backoff.success(response_time)
             deploy_results.set_current_scale(task_count)
 
             deploying = task_count < step_target
 
             if deploying:
-                time.sleep(calculate_deployment_wait_time(test_obj))
+                deployment_backoff.sleep()
                 # reset failure count,  it is used for consecutive failures
                 failure_count = 0
                 quiet_wait_for_marathon_up(test_obj)
@@ -365,7 +620,8 @@ def count_deployment(test_obj, step_target):
                 abort = True
             # need some time
             else:
-                time.sleep(calculate_scale_wait_time(test_obj, scale_failure_count))
+                deployment_backoff.failure()
+                deployment_backoff.sleep()
                 quiet_wait_for_marathon_up(test_obj)
 
         except DCOSNotScalingException as e:
@@ -382,7 +638,8 @@ def count_deployment(test_obj, step_target):
                 deploy_results.failed(message, FATAL_CONSECUTIVE_DEPLOYMENT)
                 raise TestException(message)
 
-            time.sleep(calculate_deployment_wait_time(test_obj, failure_count))
+            deployment_backoff.failure()
+            deployment_backoff.sleep()
             quiet_wait_for_marathon_up(test_obj)
             pass
 
@@ -391,6 +648,8 @@ def count_deployment(test_obj, step_target):
 
 def time_deployment2(test_obj):
     """ Times the deployment of a launched set of applications for this test object.
+        The scale is taken from the event stream of the test if it is tracked (see
+        `track_deployment`), which keeps the loop from loading the cluster under test.
         This function will wait until the following conditions are met or occur:
             * target scale is reached
             * 5 consecutive DCOSScaleException (current scale is less than previous scale)
@@ -399,7 +658,7 @@ def time_deployment2(test_obj):
     """
 
     deploy_results = test_obj.deploy_results
-    client = marathon.create_client()
+    deployment_backoff = backoff(test_obj, 'deployment')
 
     deploying = True
     abort = False
@@ -409,13 +668,19 @@ def time_deployment2(test_obj):
     while deploying and not abort:
         try:
 
-            task_count = current_scale()
+            task_count = deployment_scale(test_obj)
+            response_time = sample_deployment(test_obj, task_count)
+            if response_time is None:
+                deployment_backoff.failure()
+            else:
+                deploy_results.current_response_time(response_time)
+                deployment_backoff.success(response_time)
             deploy_results.set_current_scale(task_count)
 
             deploying = not deploy_results.is_target_reached()
 
             if deploying:
-                time.sleep(calculate_deployment_wait_time(test_obj))
+                deployment_backoff.sleep()
                 # reset failure count,  it is used for consecutive failures
                 failure_count = 0
                 quiet_wait_for_marathon_up(test_obj)
@@ -434,7 +699,8 @@ def time_deployment2(test_obj):
                 abort = True
             # need some time
             else:
-                time.sleep(calculate_scale_wait_time(test_obj, scale_failure_count))
+                deployment_backoff.failure()
+                deployment_backoff.sleep()
                 quiet_wait_for_marathon_up(test_obj)
 
         except DCOSNotScalingException as e:
@@ -452,27 +718,29 @@ def time_deployment2(test_obj):
                 deploy_results.failed(message, FATAL_CONSECUTIVE_LAUNCH)
                 raise TestException(message)
 
-            time.sleep(calculate_deployment_wait_time(test_obj, failure_count))
+            deployment_backoff.failure()
+            deployment_backoff.sleep()
             quiet_wait_for_marathon_up(test_obj)
 
     loop_msg = 'loop count: {}'.format(test_obj.loop_count)
     print(loop_msg)
     test_obj.add_event(loop_msg)
-    if deploy_results.is_target_reached():
-        deploy_results.completed()
-    else:
+    if not deploy_results.is_target_reached():
         deploy_results.failed('Target NOT reached')
-
-
-def calculate_scale_wait_time(test_obj, failure_count):
-    return failure_count * 10
+    elif verify_scale(test_obj):
+        deploy_results.completed()
 
 
 def abort_deployment_check(test_obj):
     """ Returns True if we should abort, otherwise False
-        Currently it looks at time duration of this test (10hrs max)
+        Currently it looks at time duration of this test (10hrs max) and at aborts
+        requested on the progress endpoint
     """
 
+    if abort_requested():
+        log_error_event(test_obj, 'Test aborted on request', ERROR_SCALE_TIMEOUT, True)
+        return True
+
     if elapse_time(test_obj.start) > timedelta(hours=MAX_HOURS_OF_TEST).total_seconds():
         log_error_event(test_obj, 'Test taking longer than {} hours'.format(hours), ERROR_SCALE_TIMEOUT)
         return True
@@ -480,35 +748,14 @@ def abort_deployment_check(test_obj):
     return False
 
 
-def calculate_deployment_wait_time(test_obj, failure_count=0):
-    """ Calculates wait time based potentially a number of factors.
-        If we need an exponential backoff this is the place.
-
-        possbilities:
-            deploy_results.avg_response_time,
-            deploy_results.last_response_time
-            failure_count
-            outstanding_deployments
-            current_scale
-
-        max response time is 10s, as we approach that bad things happen
-
-        return time in seconds to wait
+def backoff(test_obj, name):
+    """ Provides the adaptive backoff `name` of the test.  The backoffs replace the
+        fixed wait times between polls and after failures.  Without a test object a
+        new backoff is returned.
     """
-    deploy_results = test_obj.deploy_results
-
-    wait_time = 1
-    if deploy_results.last_response_time < 1:
-        wait_time = 1
-    elif deploy_results.last_response_time > 8:
-        wait_time = 5
-
-    if failure_count > 3 and failure_count < 7:
-        wait_time = wait_time + 5
-    elif failure_count > 7:
-        wait_time = wait_time + 10
-
-    return wait_time
+    if test_obj is None:
+        return AdaptiveBackoff(name)
+    return test_obj.backoff(name)
 
 
 def elapse_time(start, end=None):
@@ -525,6 +772,9 @@ def write_meta_data(metadata={}, filename='meta-data.json'):
 
 def get_cluster_metadata():
 
+    if is_local_marathon():
+        return get_local_metadata()
+
     try:
         version = ee_version()
     except Exception:
@@ -549,8 +799,25 @@ def get_cluster_metadata():
     return metadata
 
 
+def get_local_metadata():
+    """ Metadata of a Marathon outside of DC/OS, which has no agents or resources.
+    """
+    return {
+        'dcos-version': 'local',
+        'marathon-version': get_marathon_version(),
+        'marathon-url': marathon_service_url(),
+        'private-agents': 0,
+        'master-count': 0,
+        'resources': {
+            'cpus': 0,
+            'memory': 0
+        },
+        'marathon': 'root'
+    }
+
+
 def get_marathon_version():
-    client = marathon.create_client()
+    client = marathon_client()
     about = client.get_about()
     return about.get("version")
 
@@ -569,7 +836,7 @@ def install_mom(version='v1.3.6'):
     if not version.startswith('v'):
         version = 'v{}'.format(version)
 
-    client = marathon.create_client()
+    client = marathon_client()
     client.add_app(get_mom_json(version))
     print("Installing MoM: {}".format(version))
     deployment_wait()
@@ -591,7 +858,7 @@ def uninstall_mom():
     while not removed:
         try:
             max_times = max_times - 1
-            client = marathon.create_client()
+            client = marathon_client()
             client.remove_app('marathon-user')
             deployment_wait()
             time.sleep(2)
@@ -611,12 +878,23 @@ def uninstall_mom():
 
 
 def wait_for_marathon_up(test_obj=None, timeout=60 * 5):
-    if test_obj is None or 'root' in test_obj.mom:
+    if is_local_marathon():
+        wait_for_local_marathon(timeout)
+    elif test_obj is None or 'root' in test_obj.mom:
         wait_for_service_endpoint('marathon', timeout)
     else:
         wait_for_service_endpoint('marathon-user')
 
 
+def wait_for_local_marathon(timeout=60 * 5):
+
+    @retrying.retry(wait_fixed=1000, stop_max_delay=timeout * 1000)
+    def get_about():
+        return marathon_client().get_about()
+
+    get_about()
+
+
 def quiet_wait_for_marathon_up(test_obj=None, timeout=60 * 5):
     try:
         wait_for_marathon_up(test_obj, timeout)
@@ -652,7 +930,7 @@ def is_mom_version(version):
         try:
             max_times == 1
             with shakedown.marathon_on_marathon():
-                client = marathon.create_client()
+                client = marathon_client()
                 about = client.get_about()
                 same_version = version == about.get("version")
                 check_complete = True
@@ -707,8 +985,12 @@ class LaunchResults(object):
         self.success = False
         self.avg_response_time = 0.0
         self.last_response_time = 0.0
+        self.response_count = 0
         self.start = this_test.start
         self.current_test = this_test
+        self.requests = 0
+        self.request_time = None
+        self.payload_bytes = 0
 
     def __str__(self):
         return "launch  success: {} avg response time: {} last response time: {}".format(
@@ -723,22 +1005,59 @@ class LaunchResults(object):
             self.last_response_time)
 
     def current_response_time(self, response_time):
-        if response_time > 0.0:
-            self.last_response_time = response_time
-            if self.avg_response_time == 0.0:
-                self.avg_response_time = response_time
-            else:
-                self.avg_response_time = (self.avg_response_time + response_time)/2
+        """ Records the duration in seconds of a request of this phase.
+        """
+        self.response_count = self.response_count + 1
+        self.last_response_time = response_time
+        self.avg_response_time = self.avg_response_time + (response_time - self.avg_response_time) / self.response_count
+
+    def record_requests(self, count, elapsed=None):
+        """ Records `count` launch requests.  `elapsed` is the time spent issuing
+            them, if it is unknown the time since the start of the test is used.
+        """
+        self.requests = self.requests + count
+        if elapsed is None:
+            self.request_time = elapse_time(self.start)
+        else:
+            self.request_time = round(elapsed, 3)
+
+    def record_payload(self, payload):
+        """ Records the size of the body of a launch request, see `GroupPayload`.
+        """
+        self.payload_bytes = self.payload_bytes + payload.body_bytes
+        self.current_test.add_event('{} apps in {} bytes of JSON sent as {} bytes', payload.app_count,
+                                    payload.json_bytes, payload.body_bytes)
+
+    @property
+    def request_rate(self):
+        """ Achieved launch requests per second.
+        """
+        if not self.request_time:
+            return 0.0
+        return round(self.requests / self.request_time, 3)
 
     def completed(self):
         self.success = True
-        self.current_response_time(time.time())
         self.current_test.add_event('launch successful')
+        self.current_test.phase = PHASE_DEPLOY
+        self.journal()
 
     def failed(self, message='', failure_type=ERROR_LAUNCH):
         self.success = False
-        self.current_response_time(time.time())
-        self.current_test.add_event('{} {}'.format(failure_type, message))
+        self.current_test.add_event('{}', message, event_type=failure_type)
+        self.current_test.phase = PHASE_DEPLOY
+        self.journal()
+
+    def journal(self):
+        self.current_test.record(
+            LAUNCH,
+            success=self.success,
+            requests=self.requests,
+            request_rate=self.request_rate,
+            payload_bytes=self.payload_bytes,
+            avg_response_time=self.avg_response_time,
+            last_response_time=self.last_response_time)
+        self.current_test.journal_events()
 
 
 class DeployResults(object):
@@ -749,11 +1068,13 @@ class DeployResults(object):
         self.success = False
         self.avg_response_time = 0.0
         self.last_response_time = 0.0
+        self.response_count = 0
         self.current_scale = 0
         self.target = this_test.target
         self.start = this_test.start
         self.current_test = this_test
         self.end_time = None
+        self.samples = ScaleTimeSeries()
 
     def __str__(self):
         return "deploy  failure: {} avg response time: {} last response time: {} scale: {}".format(
@@ -796,30 +1117,41 @@ class DeployResults(object):
         return self.current_scale >= self.target
 
     def current_response_time(self, response_time):
-        if response_time > 0.0:
-            self.last_response_time = response_time
-            if self.avg_response_time == 0.0:
-                self.avg_response_time = response_time
-            else:
-                self.avg_response_time = (self.avg_response_time + response_time)/2
+        """ Records the duration in seconds of a request of this phase.
+        """
+        self.response_count = self.response_count + 1
+        self.last_response_time = response_time
+        self.avg_response_time = self.avg_response_time + (response_time - self.avg_response_time) / self.response_count
 
     def completed(self):
         self.success = True
         self.current_test.successful()
-        self.current_response_time(time.time())
         self.current_test.add_event('Deployment successful')
-        self.current_test.add_event('Scale reached: {}'.format(self.current_scale))
+        self.current_test.add_event('Scale reached: {}', self.current_scale)
+        self.journal()
 
     def failed(self, message='', failure_type=ERROR_DEPLOYMENT):
         self.current_test.failed(message)
         self.success = False
-        self.current_response_time(time.time())
-        self.current_test.add_event('Scale reached: {}'.format(self.current_scale))
-        self.current_test.add_event('{} {}'.format(failure_type, message))
+        self.current_test.add_event('Scale reached: {}', self.current_scale)
+        self.current_test.add_event('{}', message, event_type=failure_type)
+        self.journal()
+
+    def journal(self):
+        self.current_test.record(
+            DEPLOY,
+            success=self.success,
+            current_scale=self.current_scale,
+            target=self.target,
+            test_time=self.current_test.test_time,
+            avg_response_time=self.avg_response_time)
+        self.current_test.record(SAMPLES, start=self.start, samples=list(self.samples.rows(self.start)))
+        self.current_test.journal_events()
 
 
 class UnDeployResults(object):
-    """ Provides timing and test data for the last phase of a ScaleTest.
+    """ Provides timing and test data for the last phase of a ScaleTest.  The
+        throughput of the undeployment is the number of killed tasks per second.
     """
 
     def __init__(self, this_test):
@@ -827,18 +1159,64 @@ class UnDeployResults(object):
         self.avg_response_time = 0.0
         self.last_response_time = 0.0
         self.start = this_test.start
+        self.current_test = this_test
+        self.undeploy_time = None
+        # None if the killed tasks are not known
+        self.killed = None
+        self.kill_rate = None
+        self.errors = 0
+        # (second of the undeployment, tasks killed in it)
+        self.kill_rates = None
 
     def __str__(self):
-        return "undeploy  failure: {} avg response time: {} last response time: {}".format(
+        return "undeploy  success: {} time: {} killed: {} kill rate: {} tasks/s errors: {}".format(
             self.success,
-            self.avg_response_time,
-            self.last_response_time)
+            self.undeploy_time,
+            self.killed,
+            self.kill_rate,
+            self.errors)
 
     def __repr__(self):
-        return "undeploy  failure: {} avg response time: {} last response time: {}".format(
+        return "undeploy  success: {} time: {} killed: {} kill rate: {} tasks/s errors: {}".format(
             self.success,
-            self.avg_response_time,
-            self.last_response_time)
+            self.undeploy_time,
+            self.killed,
+            self.kill_rate,
+            self.errors)
+
+    def completed(self, stats):
+        """ Records the teardown `stats` of the test, see teardown.py.
+        """
+        self.undeploy_time = stats.elapsed
+        self.killed = stats.killed
+        self.kill_rate = stats.kill_rate
+        self.kill_rates = stats.kill_rates()
+        self.errors = len(stats.errors) + stats.check_failures
+        self.success = len(stats.errors) == 0
+        if self.killed is None:
+            self.current_test.add_event('Undeployment complete, killed tasks unknown: the event stream missed events')
+        else:
+            self.current_test.add_event('Undeployment complete, {} killed tasks at {} tasks/s', self.killed,
+                                        self.kill_rate)
+        self.current_test.undeploy_time = self.undeploy_time
+        self.journal()
+
+    def failed(self, message, failure_type=FATAL_CONSECUTIVE_UNDEPLOYMENT):
+        self.success = False
+        self.errors = self.errors + 1
+        self.current_test.add_event('{}', message, event_type=failure_type)
+        self.journal()
+
+    def journal(self):
+        self.current_test.record(
+            UNDEPLOY,
+            success=self.success,
+            undeploy_time=self.undeploy_time,
+            killed=self.killed,
+            kill_rate=self.kill_rate,
+            errors=self.errors,
+            kill_rates=self.kill_rates)
+        self.current_test.journal_events()
 
 
 class ScaleTest(object):
@@ -846,10 +1224,11 @@ class ScaleTest(object):
         A scale test has 3 phases of interest:  1) launching, 2) deploying and 3) undeploying
 
         `under_test` defines apps or pods
-        `style` defines instance, count or group
+        `style` defines instance, count, group or openloop
             instance - is 1 app with X instances (makes 1 http launch call)
             count - is X apps with Y (often 1) instances each (makes an http launch for each X)
             group - is X apps in 1 http launch call
+            openloop - is X apps launched at a fixed arrival rate (makes an http launch for each X)
 
         All events are logged in the events array in order.
 
@@ -866,7 +1245,8 @@ class ScaleTest(object):
         self.count = int(count)
         self.start = time.time()
         self.mom = mom
-        self.events = []
+        self.events = EventLog()
+        self.phase = PHASE_SETUP
         self.target = int(instance) * int(count)
 
         # successful, failed, skipped
@@ -876,6 +1256,22 @@ class ScaleTest(object):
         self.undeploy_time = None
         self.skipped = False
         self.loop_count = 0
+        self.deployment_tracker = None
+
+        # launches per second of open loop tests
+        self.arrival_rate = None
+
+        # adaptive wait times by purpose, e.g. deployment
+        self.backoffs = {}
+
+        # results are journaled as each phase completes if a journal is set
+        self.journal = None
+        self.journaled_events = 0
+
+        # durations of all marathon requests by endpoint
+        self.latencies = LatencyRecorder()
+        # connections of the shared marathon clients are counted from here
+        self.connections_start = connection_stats()
 
         # results are in these objects
         self.launch_results = LaunchResults(self)
@@ -896,8 +1292,15 @@ class ScaleTest(object):
             self.test_time,
             len(self.events))
 
-    def add_event(self, eventInfo):
-        self.events.append('{} {} (time in test: {})'.format(EVENT_HEADER, eventInfo, pretty_duration_safe(elapse_time(self.start))))
+    def add_event(self, message, *args, event_type=INFO):
+        """ Adds an event of `event_type` in the current phase.  The message is formatted
+            with `args` only when the event is printed.
+        """
+        self.events.append(event_type, self.phase, message, args)
+
+    @property
+    def error_count(self):
+        return self.events.count(*ERRORS)
 
     def _status(self, status):
         """ end of scale test, however still may have events like undeploy_time
@@ -912,17 +1315,35 @@ class ScaleTest(object):
         self._status('successful')
 
     def failed(self, reason="unknown"):
-        self.add_event('failed: {}'.format(reason))
+        self.add_event('failed: {}', reason)
         self._status('failed')
 
     def skip(self, reason="unknown"):
-        self.add_event('skipped: {}'.format(reason))
+        self.add_event('skipped: {}', reason)
         self._status('skipped')
         self.skipped = True
 
-    def undeploy_complete(self, start):
-        self.add_event('Undeployment complete')
-        self.undeploy_time = elapse_time(start)
+    def record(self, record_type, **fields):
+        """ Appends a record for this test to the journal, if there is one.
+        """
+        if self.journal is not None:
+            self.journal.append(record_type, self.name, **fields)
+
+    def journal_events(self):
+        """ Journals the events added since the last call.
+        """
+        events = self.events[self.journaled_events:]
+        if events:
+            self.record(EVENTS, events=[event.to_json() for event in events])
+        self.journaled_events = len(self.events)
+
+    def journal_summaries(self):
+        """ Journals the latency and backoff summaries at the end of the test.
+        """
+        self.record(LATENCY, latencies=self.latencies.summary(), connections=self.connections.to_json())
+        self.record(BACKOFF, backoffs={name: list(backoff.rows(self.start))
+                                       for name, backoff in self.backoffs.items()})
+        self.journal_events()
 
     def start_test(self):
         """ Starts the timers for the test.   There can be a delay of cleanup of the
@@ -933,10 +1354,17 @@ class ScaleTest(object):
         """
         start_time = time.time()
         self.start = start_time
+        self.events.restart()
+        self.phase = PHASE_LAUNCH
         self.launch_results.start = start_time
         self.deploy_results.start = start_time
         self.undeploy_results.start = start_time
 
+    def backoff(self, name):
+        if name not in self.backoffs:
+            self.backoffs[name] = AdaptiveBackoff(name)
+        return self.backoffs[name]
+
     def increment_loop_count(self):
         self.loop_count = self.loop_count + 1
 
@@ -947,10 +1375,23 @@ class ScaleTest(object):
         for event in self.events:
             print(event)
 
+    @property
+    def connections(self):
+        """ The connection reuse of the shared marathon clients during this test.
+        """
+        return connection_stats() - self.connections_start
+
+    def log_latencies(self):
+        self.latencies.log()
+        print('    {}'.format(self.connections))
+        for name in sorted(self.backoffs):
+            print('    {}'.format(self.backoffs[name]))
+
     def log_stats(self):
-        print('    *status*: {}, deploy: {}, undeploy: {}'.format(
+        print('    *status*: {}, deploy: {}, launch rate: {} req/s, undeploy: {}'.format(
             self.status,
             pretty_duration_safe(self.test_time),
+            self.launch_results.request_rate,
             pretty_duration_safe(self.undeploy_time)))
 
 
@@ -982,11 +1423,11 @@ def scaletest_resources(test_obj):
     return get_resource_need()
 
 
-def outstanding_deployments():
+def outstanding_deployments(test_obj=None):
     """ Provides a count of deployments still looking to land.
     """
     count = 0
-    client = marathon.create_client()
+    client = create_client(test_obj)
     queued_apps = client.get_queued_apps()
     for app in queued_apps:
         count = count + app['count']
@@ -994,25 +1435,129 @@ def outstanding_deployments():
     return count
 
 
-def is_deployment_active():
-    client = marathon.create_client()
+def is_deployment_active(test_obj=None):
+    client = create_client(test_obj)
     return len(client.get_deployments()) > 0
 
 
-def current_scale():
-    """ Provides a count of tasks which are running on Mesos.  The default
-        app_id is None which provides a count of all tasks.
+def current_scale(test_obj=None, probe=SCALE_PROBE):
+    """ Provides a count of tasks which are running on Mesos.  The count is taken
+        with the scale `probe`, which is configured with the SCALE_PROBE environment
+        variable.  If a test object is given the cost of the probe is recorded with
+        the latencies of the test.
     """
-    return len(get_active_tasks())
+    recorder = None if test_obj is None else test_obj.latencies
+    return create_probe(probe, recorder).current_scale()
 
 
-def current_marathon_scale(app_id=None):
+def verify_scale(test_obj):
+    """ Verifies the scale reached by a test with the full task list.  This is expensive
+        and only done once at the end of a deployment.  If the task list has another
+        number of running tasks the deployment fails and False is returned.
+    """
+    if SCALE_PROBE == SCALE_VERIFICATION_PROBE and test_obj.deployment_tracker is None:
+        return True
+
+    deploy_results = test_obj.deploy_results
+    try:
+        task_count = current_scale(test_obj, SCALE_VERIFICATION_PROBE)
+    except Exception as e:
+        log_error_event(test_obj, 'Scale verification failed: {}'.format(e))
+        return True
+
+    if task_count != deploy_results.current_scale:
+        deploy_results.failed('Scale of {} not verified, the {} probe counts {} running tasks'.format(
+            deploy_results.current_scale, SCALE_VERIFICATION_PROBE, task_count), ERROR_SCALING)
+        return False
+
+    test_obj.add_event('Scale verified with {} probe: {}', SCALE_VERIFICATION_PROBE, task_count)
+    return True
+
+
+def deployment_scale(test_obj):
+    """ Provides the count of running tasks for a deployment of the test.  If the test
+        tracks its deployment with the event stream the count is taken from the
+        tracker, otherwise the cluster is polled.
+    """
+    if test_obj.deployment_tracker is not None:
+        return test_obj.deployment_tracker.current_scale()
+    return current_scale(test_obj)
+
+
+def sample_deployment(test_obj, task_count):
+    """ Records a sample of the deployment progress with the queued task count and the
+        number of active deployments.  Failures to query these are not errors of the
+        test and the sample is recorded without them.
+
+        Returns the response time of `GET /v2/deployments`, or None if a query failed.
+        Unlike the scale of a tracked deployment, which is counted in memory, it is the
+        latency of Marathon under the deployment and paces the deployment backoff.
+    """
+    queued = None
+    deployments = None
+    response_time = None
+    try:
+        queued = outstanding_deployments(test_obj)
+        start = time.time()
+        deployments = len(create_client(test_obj).get_deployments())
+        response_time = elapse_time(start)
+    except Exception:
+        pass
+
+    test_obj.deploy_results.samples.append(time.time(), task_count, queued, deployments)
+    return response_time
+
+
+@contextlib.contextmanager
+def track_deployment(test_obj):
+    """ Tracks the scale of the test with the Marathon event stream for the duration of
+        the context.  The tracker has to be in place before the launch phase starts
+        so that no status update is missed.  It is reconciled with the running tasks
+        of the verification probe and falls back to polling while disconnected.
+    """
+    verification = create_probe(SCALE_VERIFICATION_PROBE, test_obj.latencies)
+    tracker = DeploymentTracker(marathon_service_url(test_obj.mom), marathon_headers(), verification.running_tasks,
+                                lambda: current_scale(test_obj))
+    test_obj.deployment_tracker = tracker
+    try:
+        with tracker:
+            yield tracker
+    finally:
+        test_obj.deployment_tracker = None
+        test_obj.add_event('deployment tracking: {} status updates, {} reconciliations',
+                           tracker.events_received, tracker.reconciliations)
+
+
+@contextlib.contextmanager
+def sample_marathon_metrics(test_obj, interval=METRICS_INTERVAL):
+    """ Samples the metrics of Marathon in the background for the duration of the
+        context, every sample is journaled as it is taken.  Disabled with an interval
+        of 0, the default.
+    """
+    if interval <= 0:
+        yield None
+        return
+
+    sampler = MarathonMetricsSampler(test_obj, marathon_service_url(test_obj.mom) + 'metrics',
+                                     marathon_headers(), interval)
+    try:
+        with sampler:
+            yield sampler
+    finally:
+        test_obj.add_event('marathon metrics: {} samples, {} failed', sampler.sampled, sampler.failures)
+
+
+def current_marathon_scale(app_id=None, test_obj=None):
     """ Provides a count of tasks which are running on marathon.  The default
-        app_id is None which provides a count of all tasks.
+        app_id is None which provides a count of all tasks.  The count is taken from
+        the `tasksRunning` of the apps instead of the task list.
     """
-    client = marathon.create_client()
-    tasks = client.get_tasks(app_id)
-    return len(tasks)
+    if app_id is None:
+        recorder = None if test_obj is None else test_obj.latencies
+        return create_probe('apps', recorder).current_scale()
+
+    client = create_client(test_obj)
+    return client.get_app(app_id).get('tasksRunning', 0)
 
 
 def commaify(number):
@@ -1027,6 +1572,10 @@ def pretty_duration_safe(duration):
 
 
 def clean_root_marathon():
+    if SIMULATION:
+        restart_simulation()
+        return
+
     stop_root_marathon()
     delete_zk_node('/marathon/leader-curator')
     delete_zk_node('/marathon/leader')
@@ -1105,6 +1654,10 @@ def empty_stats():
             'root_instances_launch_status': [],
             'root_instances_deployment_status': [],
             'root_instances_errors': [],
+            'root_instances_launch_rate': [],
+            'root_instances_undeploy_time': [],
+            'root_instances_undeploy_rate': [],
+            'root_instances_undeploy_errors': [],
             'root_count_target': [],
             'root_count_max': [],
             'root_count_deploy_time': [],
@@ -1112,11 +1665,30 @@ def empty_stats():
             'root_count_launch_status': [],
             'root_count_deployment_status': [],
             'root_count_errors': [],
+            'root_count_launch_rate': [],
+            'root_count_undeploy_time': [],
+            'root_count_undeploy_rate': [],
+            'root_count_undeploy_errors': [],
             'root_group_target': [],
             'root_group_max': [],
             'root_group_deploy_time': [],
             'root_group_human_deploy_time': [],
             'root_group_launch_status': [],
             'root_group_deployment_status': [],
-            'root_group_errors': []
+            'root_group_errors': [],
+            'root_group_launch_rate': [],
+            'root_group_undeploy_time': [],
+            'root_group_undeploy_rate': [],
+            'root_group_undeploy_errors': [],
+            'root_openloop_target': [],
+            'root_openloop_max': [],
+            'root_openloop_deploy_time': [],
+            'root_openloop_human_deploy_time': [],
+            'root_openloop_launch_status': [],
+            'root_openloop_deployment_status': [],
+            'root_openloop_errors': [],
+            'root_openloop_launch_rate': [],
+            'root_openloop_undeploy_time': [],
+            'root_openloop_undeploy_rate': [],
+            'root_openloop_undeploy_errors': []
         }
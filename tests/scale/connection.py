@@ -0,0 +1,70 @@
+"""
+    Clients of the Marathon under test, on DC/OS or at `SCALE_MARATHON_URL`.
+"""
+import os
+import shakedown
+
+from dcos import config
+from simulation import simulation_url
+from urllib.parse import urljoin
+from utils import system_module
+
+# url of a Marathon outside of DC/OS, e.g. a fake_marathon.py or the simulation, which is tested instead
+LOCAL_MARATHON_URL = os.environ.get('SCALE_MARATHON_URL') or simulation_url()
+
+# the incremental decoder of large listings and the pooled client are shared with the system integration tests
+json_stream = system_module('json_stream')
+pooled_client = system_module('pooled_client')
+
+
+def is_local_marathon():
+    """ True if the tests run against the Marathon at SCALE_MARATHON_URL or a simulated
+        Marathon instead of a DC/OS cluster.
+    """
+    return bool(LOCAL_MARATHON_URL)
+
+
+def marathon_service_url(mom=None):
+    """ The url of the Marathon under test through adminrouter.
+        `mom` is the name of the marathon used by the ScaleTest (`root` or a MoM).
+    """
+    if is_local_marathon():
+        return LOCAL_MARATHON_URL.rstrip('/') + '/'
+
+    service_name = 'marathon' if mom is None or 'root' in mom else 'marathon-user'
+    return shakedown.dcos_service_url(service_name)
+
+
+def marathon_headers():
+    if is_local_marathon():
+        return {'Content-Type': 'application/json', 'Accept': 'application/json'}
+
+    return {
+        'Authorization': 'token={}'.format(shakedown.dcos_acs_token()),
+        'Content-Type': 'application/json',
+        'Accept': 'application/json'
+    }
+
+
+def marathon_client():
+    """ The shared dcos Marathon client of the Marathon under test, or of the Marathon
+        of `marathon_on_marathon`.  All calls reuse a pool of keep-alive connections.
+    """
+    if is_local_marathon():
+        base_url = marathon_service_url()
+    else:
+        base_url = config.get_config_val('marathon.url', config.get_config()) or marathon_service_url()
+    return pooled_client.shared_client(base_url, marathon_headers)
+
+
+def connection_stats():
+    """ The requests and new connections of the shared Marathon clients, see `marathon_client`.
+    """
+    return pooled_client.connection_stats()
+
+
+def marathon_records(path, key, mom=None):
+    """ Decodes the records of a Marathon listing one at a time, e.g. the tasks of
+        `v2/tasks`.  The listing is never decoded as a whole, see json_stream.py.
+    """
+    return json_stream.stream_records(urljoin(marathon_service_url(mom), path), key, headers=marathon_headers())
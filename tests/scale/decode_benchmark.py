@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+
+"""
+    `./decode_benchmark.py --counts 1000,10000,50000`
+
+    Time and peak memory of counting running tasks with `json.loads` and `json_stream`.
+"""
+import click
+import json
+import time
+import tracemalloc
+import uuid
+
+from utils import system_module
+
+json_stream = system_module('json_stream')
+
+CHUNK_SIZE = 64 * 1024
+
+
+def task(num):
+    app_id = '/2deep/group/{}'.format(num)
+    return {
+        'id': '{}.{}'.format(app_id.strip('/').replace('/', '_'), uuid.uuid4()),
+        'appId': app_id,
+        'slaveId': '{}-S0'.format(uuid.uuid4()),
+        'host': '10.0.0.{}'.format(num % 256),
+        'state': 'TASK_RUNNING',
+        'startedAt': '2017-01-01T00:00:00.000Z',
+        'stagedAt': '2017-01-01T00:00:00.000Z',
+        'ports': [10000 + num % 20000],
+        'version': '2017-01-01T00:00:00.000Z',
+        'ipAddresses': [{'ipAddress': '10.0.0.{}'.format(num % 256), 'protocol': 'IPv4'}],
+        'localVolumes': [],
+        'healthCheckResults': []
+    }
+
+
+def tasks_document(count):
+    return json.dumps({'tasks': [task(num) for num in range(count)]}).encode('utf-8')
+
+
+def chunks(document, chunk_size=CHUNK_SIZE):
+    for offset in range(0, len(document), chunk_size):
+        yield document[offset:offset + chunk_size]
+
+
+def is_running(task):
+    return task['state'] == 'TASK_RUNNING'
+
+
+def full_decode(document):
+    tasks = json.loads(document.decode('utf-8'))['tasks']
+    return len([task for task in tasks if is_running(task)])
+
+
+def incremental_decode(document):
+    return json_stream.count_records(json_stream.iter_records(chunks(document), 'tasks'), is_running)
+
+
+def measure(decode, document):
+    """ Returns the result, the duration in seconds and the peak memory in bytes of `decode`.
+    """
+    tracemalloc.start()
+    start = time.time()
+    try:
+        result = decode(document)
+        elapsed = time.time() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+@click.command()
+@click.option('--counts', default='1000,10000,50000', help='Comma separated numbers of tasks in the listing')
+def main(counts):
+    """
+        Compares the full and the incremental decoding of /v2/tasks listings.
+    """
+    print('{:>8} {:>12} {:>10} {:>10} {:>14} {:>14}'.format(
+        'tasks', 'bytes', 'full s', 'stream s', 'full peak', 'stream peak'))
+    for count in [int(count) for count in counts.split(',')]:
+        document = tasks_document(count)
+        full_count, full_time, full_peak = measure(full_decode, document)
+        stream_count, stream_time, stream_peak = measure(incremental_decode, document)
+        assert full_count == stream_count == count
+        print('{:>8} {:>12} {:>10.3f} {:>10.3f} {:>14,} {:>14,}'.format(
+            count, len(document), full_time, stream_time, full_peak, stream_peak))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+    Running tasks of a deployment counted from `/v2/events`.
+"""
+import threading
+import time
+
+from utils import system_module
+
+event_stream = system_module('event_stream')
+TASK_RUNNING = event_stream.TASK_RUNNING
+TASK_NOT_RUNNING_STATES = event_stream.TASK_NOT_RUNNING_STATES
+
+DEFAULT_RECONCILIATION_INTERVAL = 60
+
+
+def apply_status(running_tasks, task_id, status):
+    if status == TASK_RUNNING:
+        running_tasks.add(task_id)
+    elif status in TASK_NOT_RUNNING_STATES:
+        running_tasks.discard(task_id)
+
+
+class DeploymentTracker(object):
+    """ Counts running tasks of Marathon based on `status_update_event`s.
+
+        The running tasks are replaced with the ids returned by `running_tasks` every
+        `reconciliation_interval` seconds and whenever the event stream is
+        (re)connected.  The events which arrive during a reconciliation are applied
+        again on top of its task list.  While the event stream is disconnected the
+        scale is taken from `poll`, a function returning the number of running tasks.
+        `start` fails if the stream does not connect at all.
+    """
+
+    def __init__(self, base_url, headers, running_tasks, poll, reconciliation_interval=DEFAULT_RECONCILIATION_INTERVAL,
+                 connect_timeout=event_stream.DEFAULT_CONNECT_TIMEOUT):
+        self.base_url = base_url
+        self.running_tasks = running_tasks
+        self.poll = poll
+        self.reconciliation_interval = reconciliation_interval
+        self.connect_timeout = connect_timeout
+        self.events_received = 0
+        self.reconciliations = 0
+
+        self._lock = threading.Lock()
+        self._running_tasks = set()
+        # events received during a running reconciliation
+        self._replay = None
+        self._last_reconciliation = None
+        self._last_connect = None
+        self._stream = event_stream.EventStream(base_url, headers, ['status_update_event'], self.event,
+                                                self._stream_connected, name='deployment-tracker')
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+
+    def start(self):
+        """ Starts to follow the event stream.  Raises an `EventStreamException` if the
+            stream does not connect within `connect_timeout` seconds.
+        """
+        self._stream.start()
+        try:
+            self._stream.require_connected(self.connect_timeout)
+        except Exception:
+            self._stream.stop()
+            raise
+
+    def stop(self):
+        self._stream.stop()
+
+    @property
+    def connected(self):
+        return self._stream.connected
+
+    def current_scale(self):
+        """ Provides the number of running tasks.  Exceptions of the reconciliation
+            are raised to the caller the same way a failing poll would.
+        """
+        if not self.connected:
+            return self.poll()
+
+        if self._needs_reconciliation():
+            self._reconcile()
+
+        with self._lock:
+            return len(self._running_tasks)
+
+    def _needs_reconciliation(self):
+        with self._lock:
+            if self._last_reconciliation is None:
+                return True
+            # events might have been missed before the stream was connected again
+            if self._last_connect is not None and self._last_connect > self._last_reconciliation:
+                return True
+            return time.time() - self._last_reconciliation > self.reconciliation_interval
+
+    def _reconcile(self):
+        start = time.time()
+        with self._lock:
+            self._replay = []
+        try:
+            running_tasks = set(self.running_tasks())
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+
+        with self._lock:
+            for task_id, status in self._replay:
+                apply_status(running_tasks, task_id, status)
+            self._replay = None
+            self._running_tasks = running_tasks
+            self._last_reconciliation = start
+            self.reconciliations = self.reconciliations + 1
+
+    def task_status(self, task_id, status):
+        """ Applies a task status update to the count.
+        """
+        with self._lock:
+            self.events_received = self.events_received + 1
+            if self._replay is not None:
+                self._replay.append((task_id, status))
+            apply_status(self._running_tasks, task_id, status)
+
+    def event(self, data):
+        if data.get('eventType') == 'status_update_event':
+            self.task_status(data.get('taskId'), data.get('taskStatus'))
+
+    def _stream_connected(self):
+        with self._lock:
+            self._last_connect = time.time()
@@ -0,0 +1,130 @@
+"""
+    Launches of large count tests spread over worker processes.
+"""
+import multiprocessing
+import queue
+import time
+
+from latency import LatencyHistogram
+from launcher import AsyncLauncher, DEFAULT_CONCURRENCY
+
+CHUNK_SIZE = 100
+# error messages of a chunk sent to the parent, the rest is only counted
+MAX_ERROR_MESSAGES = 5
+# seconds without any message from a worker after which the launch is aborted
+WORKER_TIMEOUT = 600
+
+
+class ShardProgress(object):
+    """ Message of a worker about a launched chunk.  The histogram contains the latencies
+        of the chunk only.
+    """
+
+    def __init__(self, worker, requests=0, errors=0, histogram=None, error_messages=None, done=False, failure=None):
+        self.worker = worker
+        self.requests = requests
+        self.errors = errors
+        self.histogram = histogram
+        self.error_messages = error_messages or []
+        self.done = done
+        self.failure = failure
+
+
+def launch_shard(worker, workers, path, count, instances, payload_factory, base_url, headers, concurrency, progress):
+    """ Entry point of a worker process.  Launches every `workers`th payload starting with
+        `worker + 1` and reports every chunk to the `progress` queue.
+    """
+    try:
+        numbers = list(range(worker + 1, count + 1, workers))
+        with AsyncLauncher(base_url, headers, concurrency) as launcher:
+            for first in range(0, len(numbers), CHUNK_SIZE):
+                chunk = numbers[first:first + CHUNK_SIZE]
+                outcomes = launcher.post(path, [payload_factory(num, instances) for num in chunk])
+
+                histogram = LatencyHistogram()
+                error_messages = []
+                for num, outcome in zip(chunk, outcomes):
+                    histogram.record(outcome.elapsed)
+                    if not outcome.success and len(error_messages) < MAX_ERROR_MESSAGES:
+                        error_messages.append('{}: {}'.format(num, outcome.error))
+
+                errors = len([outcome for outcome in outcomes if not outcome.success])
+                progress.put(ShardProgress(worker, len(outcomes), errors, histogram, error_messages))
+
+        progress.put(ShardProgress(worker, done=True))
+    except Exception as e:
+        progress.put(ShardProgress(worker, done=True, failure=repr(e)))
+
+
+class ShardedLoadDriver(object):
+    """ Launches payloads from `workers` processes and merges their results.
+
+        `on_progress` is called in the parent process with every `ShardProgress`.  If it
+        returns False the workers are terminated and the launch stops.
+    """
+
+    def __init__(self, base_url, headers, workers=None, concurrency=DEFAULT_CONCURRENCY):
+        self.base_url = base_url
+        self.headers = headers
+        self.workers = workers or multiprocessing.cpu_count()
+        self.concurrency = concurrency
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self.worker_requests = [0] * self.workers
+        self.worker_errors = [0] * self.workers
+        self.failures = []
+
+    @property
+    def request_rate(self):
+        if self.elapsed <= 0:
+            return 0.0
+        return round(self.requests / self.elapsed, 3)
+
+    def launch(self, path, count, instances, payload_factory, on_progress=None):
+        """ Launches `count` payloads created by `payload_factory(num, instances)`.
+            The factory has to be a module level function so that workers can use it.
+        """
+        progress = multiprocessing.Queue()
+        processes = [multiprocessing.Process(
+                        target=launch_shard,
+                        args=(worker, self.workers, path, count, instances, payload_factory,
+                              self.base_url, self.headers, self.concurrency, progress),
+                        name='launch-shard-{}'.format(worker))
+                     for worker in range(self.workers)]
+
+        start = time.time()
+        for process in processes:
+            process.start()
+
+        running = self.workers
+        try:
+            while running > 0:
+                try:
+                    message = progress.get(timeout=WORKER_TIMEOUT)
+                except queue.Empty:
+                    raise Exception('No progress of launch workers for {} seconds'.format(WORKER_TIMEOUT))
+
+                if message.done:
+                    running = running - 1
+                    if message.failure is not None:
+                        self.failures.append('worker {}: {}'.format(message.worker, message.failure))
+                else:
+                    self._merge(message)
+
+                if on_progress is not None and on_progress(message) is False:
+                    break
+        finally:
+            self.elapsed = time.time() - start
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+    def _merge(self, message):
+        self.histogram.merge(message.histogram)
+        self.requests = self.requests + message.requests
+        self.errors = self.errors + message.errors
+        self.worker_requests[message.worker] += message.requests
+        self.worker_errors[message.worker] += message.errors
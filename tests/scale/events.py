@@ -0,0 +1,86 @@
+"""
+    Scale test events kept as records and counted by type.
+"""
+import collections
+import time
+
+from shakedown import pretty_duration
+
+EVENT_HEADER = '    event:'
+
+INFO = 'info'
+
+# phases of a scale test
+PHASE_SETUP = 'setup'
+PHASE_LAUNCH = 'launch'
+PHASE_DEPLOY = 'deploy'
+PHASE_UNDEPLOY = 'undeploy'
+
+
+class ScaleEvent(object):
+    """ An event of a test.  `timestamp` is monotonic, `elapsed` is the time in the
+        test in seconds when the event happened.
+    """
+    __slots__ = ['event_type', 'timestamp', 'elapsed', 'phase', 'message', 'args']
+
+    def __init__(self, event_type, timestamp, elapsed, phase, message, args=()):
+        self.event_type = event_type
+        self.timestamp = timestamp
+        self.elapsed = elapsed
+        self.phase = phase
+        self.message = message
+        self.args = args
+
+    @property
+    def text(self):
+        """ The formatted message prefixed with the type unless it is `INFO`.
+        """
+        message = self.message.format(*self.args) if self.args else str(self.message)
+        if self.event_type == INFO:
+            return message
+        return '{} {}'.format(self.event_type, message)
+
+    def to_json(self):
+        return {'type': self.event_type, 'phase': self.phase, 'time': round(self.elapsed, 3), 'message': self.text}
+
+    def __str__(self):
+        return '{} {} (time in test: {})'.format(EVENT_HEADER, self.text, pretty_duration(round(self.elapsed, 3)))
+
+    def __repr__(self):
+        return 'event: {} phase: {} time: {}'.format(self.event_type, self.phase, round(self.elapsed, 3))
+
+
+class EventLog(object):
+    """ The events of a test in order with a count of events by type.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.counts = collections.Counter()
+        self.start = time.monotonic()
+
+    def restart(self):
+        """ Restarts the time of the events, see `ScaleTest.start_test`.
+        """
+        self.start = time.monotonic()
+
+    def append(self, event_type, phase, message, args=()):
+        now = time.monotonic()
+        event = ScaleEvent(event_type, now, now - self.start, phase, message, args)
+        self.events.append(event)
+        self.counts[event_type] += 1
+        return event
+
+    def count(self, *event_types):
+        """ The number of events of the given types.
+        """
+        return sum(self.counts[event_type] for event_type in event_types)
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def __getitem__(self, index):
+        return self.events[index]
@@ -0,0 +1,584 @@
+#!/usr/bin/env python
+
+"""
+    In-memory Marathon API to run the scale harness without a cluster, see `--help`.
+"""
+import asyncio
+import click
+import collections
+import json
+import random
+import threading
+import time
+import uuid
+
+from aiohttp import web
+
+DEFAULT_PORT = 8080
+DEFAULT_LAUNCH_RATE = 1000.0
+DEFAULT_KILL_RATE = 1000.0
+# interval of the simulation of task launches and kills in seconds
+TICK = 0.1
+
+FIXED = 'fixed'
+UNIFORM = 'uniform'
+EXPONENTIAL = 'exponential'
+LATENCY_DISTRIBUTIONS = [FIXED, UNIFORM, EXPONENTIAL]
+
+TASK_RUNNING = 'TASK_RUNNING'
+TASK_KILLED = 'TASK_KILLED'
+
+# paths which never fail or are delayed, the harness uses them to wait for Marathon
+UNAFFECTED_PATHS = ['/v2/info', '/v2/leader', '/v2/events', '/metrics']
+
+
+class LatencyDistribution(object):
+    """ Response latencies in seconds with the given `mean`.
+
+        fixed       - every response takes `mean`
+        uniform     - uniformly distributed between 0 and twice the `mean`
+        exponential - exponentially distributed, a long tail of slow responses
+    """
+
+    def __init__(self, distribution=FIXED, mean=0.0, seed=None):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError('Unknown latency distribution {}, expected one of {}'.format(
+                distribution, LATENCY_DISTRIBUTIONS))
+        self.distribution = distribution
+        self.mean = mean
+        self._random = random.Random(seed)
+
+    def sample(self):
+        if self.mean <= 0:
+            return 0.0
+        if self.distribution == UNIFORM:
+            return self._random.uniform(0, 2 * self.mean)
+        if self.distribution == EXPONENTIAL:
+            return self._random.expovariate(1.0 / self.mean)
+        return self.mean
+
+    def __repr__(self):
+        return 'latency: {} mean: {}s'.format(self.distribution, self.mean)
+
+
+class FakeApp(object):
+    """ An app of the fake with its running tasks.
+    """
+
+    def __init__(self, definition, version):
+        self.definition = definition
+        self.version = version
+        self.tasks = collections.OrderedDict()
+
+    @property
+    def id(self):
+        return self.definition['id']
+
+    @property
+    def instances(self):
+        return self.definition.get('instances', 1)
+
+    @property
+    def deficit(self):
+        return max(0, self.instances - len(self.tasks))
+
+    def to_json(self):
+        app_json = dict(self.definition)
+        app_json['version'] = self.version
+        app_json['tasksRunning'] = len(self.tasks)
+        app_json['tasksStaged'] = 0
+        app_json['tasksHealthy'] = 0
+        app_json['tasksUnhealthy'] = 0
+        return app_json
+
+
+class FakeDeployment(object):
+    """ A deployment is finished when all apps it affects reached their instances and
+        the tasks of the apps it removed are killed.
+    """
+
+    def __init__(self, affected_apps, version):
+        self.id = str(uuid.uuid4())
+        self.version = version
+        self.affected_apps = affected_apps
+
+    def to_json(self):
+        return {
+            'id': self.id,
+            'version': self.version,
+            'affectedApps': self.affected_apps,
+            'affectedPods': [],
+            'currentStep': 1,
+            'totalSteps': 1,
+            'steps': [],
+            'currentActions': []
+        }
+
+
+def absolute_id(id, parent='/'):
+    """ Marathon ids of group members can be relative to the group.
+    """
+    if not id.startswith('/'):
+        id = '{}/{}'.format(parent.rstrip('/'), id)
+    return '/' + id.strip('/')
+
+
+def is_member(id, group_id):
+    group_id = group_id.rstrip('/')
+    return group_id == '' or id == group_id or id.startswith(group_id + '/')
+
+
+def marathon_error(status, message):
+    return web.json_response({'message': message}, status=status)
+
+
+class FakeMarathon(object):
+    """ The in memory state and the request handlers of the fake.
+
+        :param launch_rate: tasks launched per second over all apps
+        :type launch_rate: float
+        :param kill_rate: tasks killed per second over all removed apps
+        :type kill_rate: float
+        :param latency: distribution of the response latency
+        :type latency: LatencyDistribution
+        :param failure_rate: probability of a request to fail with HTTP 503
+        :type failure_rate: float
+    """
+
+    def __init__(self, launch_rate=DEFAULT_LAUNCH_RATE, kill_rate=DEFAULT_KILL_RATE, latency=None,
+                 failure_rate=0.0, seed=None):
+        self.launch_rate = launch_rate
+        self.kill_rate = kill_rate
+        self.latency = latency or LatencyDistribution()
+        self.failure_rate = failure_rate
+        self.apps = collections.OrderedDict()
+        self.deployments = collections.OrderedDict()
+        # tasks of removed apps which are still to be killed by app id
+        self.removed_tasks = collections.OrderedDict()
+        self.requests = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._subscribers = []
+        self._launch_credit = 0.0
+        self._kill_credit = 0.0
+
+    def create_app(self):
+        app = web.Application(middlewares=[self._faults])
+        router = app.router
+        router.add_get('/v2/info', self.get_info)
+        router.add_get('/v2/leader', self.get_leader)
+        router.add_get('/v2/apps', self.get_apps)
+        router.add_post('/v2/apps', self.post_app)
+        router.add_put('/v2/apps', self.put_apps)
+        router.add_get('/v2/apps/{id:.+}', self.get_app)
+        router.add_put('/v2/apps/{id:.+}', self.put_app)
+        router.add_delete('/v2/apps/{id:.+}', self.delete_app)
+        router.add_get('/v2/groups', self.get_group)
+        router.add_post('/v2/groups', self.post_group)
+        router.add_get('/v2/groups/{id:.*}', self.get_group)
+        router.add_delete('/v2/groups', self.delete_group)
+        router.add_delete('/v2/groups/{id:.*}', self.delete_group)
+        router.add_get('/v2/deployments', self.get_deployments)
+        router.add_delete('/v2/deployments/{id}', self.delete_deployment)
+        router.add_get('/v2/pods/::status', self.get_pods_status)
+        router.add_get('/v2/tasks', self.get_tasks)
+        router.add_get('/v2/queue', self.get_queue)
+        router.add_get('/v2/events', self.get_events)
+        router.add_get('/metrics', self.get_metrics)
+        router.add_get('/ping', self.get_ping)
+        app.on_startup.append(self._start_simulation)
+        app.on_cleanup.append(self._stop_simulation)
+        return app
+
+    @web.middleware
+    async def _faults(self, request, handler):
+        """ Delays every response and fails requests with the configured rate.
+        """
+        if request.path in UNAFFECTED_PATHS:
+            return await handler(request)
+
+        self.requests = self.requests + 1
+        delay = self.latency.sample()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.failure_rate > 0 and self._random.random() < self.failure_rate:
+            self.failures = self.failures + 1
+            return marathon_error(503, 'Injected failure')
+        return await handler(request)
+
+    # state
+
+    def _version(self):
+        return time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())
+
+    def _deploy(self, affected_apps, version):
+        deployment = FakeDeployment(affected_apps, version)
+        self.deployments[deployment.id] = deployment
+        return deployment
+
+    def _add_apps(self, definitions, version, replace=False):
+        """ Adds or replaces apps and returns the ids of the apps which already existed
+            if they are not to be replaced.
+        """
+        conflicts = [definition['id'] for definition in definitions if definition['id'] in self.apps]
+        if conflicts and not replace:
+            return conflicts
+
+        for definition in definitions:
+            existing = self.apps.get(definition['id'])
+            if existing is None:
+                self.apps[definition['id']] = FakeApp(definition, version)
+            else:
+                existing.definition.update(definition)
+                existing.version = version
+        return []
+
+    def _remove_apps(self, app_ids):
+        for app_id in app_ids:
+            app = self.apps.pop(app_id)
+            if app.tasks:
+                self.removed_tasks[app_id] = list(app.tasks)
+
+    def _update_deployments(self):
+        for deployment in list(self.deployments.values()):
+            if any(self._is_deploying(app_id) for app_id in deployment.affected_apps):
+                continue
+            del self.deployments[deployment.id]
+            self._publish({'eventType': 'deployment_success', 'id': deployment.id})
+
+    def _is_deploying(self, app_id):
+        app = self.apps.get(app_id)
+        if app is not None and len(app.tasks) != app.instances:
+            return True
+        return app_id in self.removed_tasks
+
+    # simulation
+
+    async def _start_simulation(self, app):
+        self._simulation = asyncio.ensure_future(self._simulate())
+
+    async def _stop_simulation(self, app):
+        self._simulation.cancel()
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+
+    async def _simulate(self):
+        while True:
+            await asyncio.sleep(TICK)
+            self.simulate(TICK)
+
+    def simulate(self, elapsed):
+        """ Launches and kills the tasks due in `elapsed` seconds.
+        """
+        self._launch_credit = self._launch_credit + self.launch_rate * elapsed
+        self._kill_credit = self._kill_credit + self.kill_rate * elapsed
+
+        for app in self.apps.values():
+            while app.deficit > 0 and self._launch_credit >= 1:
+                self._launch_credit = self._launch_credit - 1
+                task_id = '{}.{}'.format(app.id.strip('/').replace('/', '_'), uuid.uuid4())
+                app.tasks[task_id] = time.time()
+                self._task_status(app.id, task_id, TASK_RUNNING)
+            while len(app.tasks) > app.instances and self._kill_credit >= 1:
+                self._kill_credit = self._kill_credit - 1
+                task_id, _ = app.tasks.popitem()
+                self._task_status(app.id, task_id, TASK_KILLED)
+
+        for app_id in list(self.removed_tasks):
+            task_ids = self.removed_tasks[app_id]
+            while task_ids and self._kill_credit >= 1:
+                self._kill_credit = self._kill_credit - 1
+                self._task_status(app_id, task_ids.pop(), TASK_KILLED)
+            if not task_ids:
+                del self.removed_tasks[app_id]
+
+        # unused credit does not accumulate while there is nothing to do
+        self._launch_credit = min(self._launch_credit, max(1.0, self.launch_rate * TICK))
+        self._kill_credit = min(self._kill_credit, max(1.0, self.kill_rate * TICK))
+        self._update_deployments()
+
+    def _task_status(self, app_id, task_id, status):
+        self._publish({
+            'eventType': 'status_update_event',
+            'appId': app_id,
+            'taskId': task_id,
+            'taskStatus': status,
+            'timestamp': self._version()
+        })
+
+    def _publish(self, event):
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    # handlers
+
+    async def get_info(self, request):
+        return web.json_response({
+            'name': 'marathon',
+            'version': 'fake',
+            'leader': request.host,
+            'frameworkId': 'fake-marathon',
+            'marathon_config': {
+                'launch_rate': self.launch_rate,
+                'kill_rate': self.kill_rate,
+                'latency': repr(self.latency),
+                'failure_rate': self.failure_rate
+            }
+        })
+
+    async def get_leader(self, request):
+        return web.json_response({'leader': request.host})
+
+    async def get_apps(self, request):
+        return web.json_response({'apps': [app.to_json() for app in self.apps.values()]})
+
+    async def get_app(self, request):
+        app_id = absolute_id(request.match_info['id'])
+        app = self.apps.get(app_id)
+        if app is None:
+            return marathon_error(404, "App '{}' does not exist".format(app_id))
+        return web.json_response({'app': app.to_json()})
+
+    async def post_app(self, request):
+        definition = await request.json()
+        definition['id'] = absolute_id(definition['id'])
+        version = self._version()
+        if self._add_apps([definition], version):
+            return marathon_error(409, 'An app with id [{}] already exists.'.format(definition['id']))
+
+        deployment = self._deploy([definition['id']], version)
+        app_json = self.apps[definition['id']].to_json()
+        app_json['deployments'] = [{'id': deployment.id}]
+        return web.json_response(app_json, status=201, headers={'Marathon-Deployment-Id': deployment.id})
+
+    async def put_apps(self, request):
+        definitions = await request.json()
+        for definition in definitions:
+            definition['id'] = absolute_id(definition['id'])
+        version = self._version()
+        self._add_apps(definitions, version, replace=True)
+        deployment = self._deploy([definition['id'] for definition in definitions], version)
+        return web.json_response({'deploymentId': deployment.id, 'version': version})
+
+    async def put_app(self, request):
+        definition = await request.json()
+        definition['id'] = absolute_id(request.match_info['id'])
+        version = self._version()
+        self._add_apps([definition], version, replace=True)
+        deployment = self._deploy([definition['id']], version)
+        return web.json_response({'deploymentId': deployment.id, 'version': version})
+
+    async def delete_app(self, request):
+        app_id = absolute_id(request.match_info['id'])
+        if app_id not in self.apps:
+            return marathon_error(404, "App '{}' does not exist".format(app_id))
+
+        self._remove_apps([app_id])
+        version = self._version()
+        deployment = self._deploy([app_id], version)
+        return web.json_response({'deploymentId': deployment.id, 'version': version})
+
+    def _group_json(self, group_id):
+        """ The group tree of `group_id` built from the ids of the apps.
+        """
+        root = {'id': group_id, 'apps': [], 'groups': [], 'version': self._version()}
+        groups = {group_id: root}
+        for app in self.apps.values():
+            if not is_member(app.id, group_id) or app.id == group_id:
+                continue
+            parent = root
+            path = app.id.split('/')[:-1]
+            for depth in range(len(group_id.rstrip('/').split('/')), len(path)):
+                subgroup_id = '/'.join(path[:depth + 1])
+                subgroup = groups.get(subgroup_id)
+                if subgroup is None:
+                    subgroup = {'id': subgroup_id, 'apps': [], 'groups': []}
+                    groups[subgroup_id] = subgroup
+                    parent['groups'].append(subgroup)
+                parent = subgroup
+            parent['apps'].append(app.to_json())
+        return root
+
+    async def get_group(self, request):
+        group_id = absolute_id(request.match_info.get('id', '/'))
+        if group_id != '/' and not any(is_member(app_id, group_id) for app_id in self.apps):
+            return marathon_error(404, "Group '{}' does not exist".format(group_id))
+        return web.json_response(self._group_json(group_id))
+
+    def _group_apps(self, group_json, parent='/'):
+        group_id = absolute_id(group_json.get('id', parent), parent)
+        definitions = []
+        for definition in group_json.get('apps', []):
+            definition['id'] = absolute_id(definition['id'], group_id)
+            definitions.append(definition)
+        for subgroup in group_json.get('groups', []):
+            definitions.extend(self._group_apps(subgroup, group_id))
+        return definitions
+
+    async def post_group(self, request):
+        definitions = self._group_apps(await request.json())
+        version = self._version()
+        conflicts = self._add_apps(definitions, version)
+        if conflicts:
+            return marathon_error(409, 'Apps already exist: {}'.format(', '.join(conflicts[:10])))
+
+        deployment = self._deploy([definition['id'] for definition in definitions], version)
+        return web.json_response({'deploymentId': deployment.id, 'version': version}, status=201)
+
+    async def delete_group(self, request):
+        group_id = absolute_id(request.match_info.get('id', '/'))
+        app_ids = [app_id for app_id in self.apps if is_member(app_id, group_id)]
+        self._remove_apps(app_ids)
+        version = self._version()
+        deployment = self._deploy(app_ids, version)
+        return web.json_response({'deploymentId': deployment.id, 'version': version})
+
+    async def get_deployments(self, request):
+        return web.json_response([deployment.to_json() for deployment in self.deployments.values()])
+
+    async def delete_deployment(self, request):
+        deployment = self.deployments.pop(request.match_info['id'], None)
+        if deployment is None:
+            return marathon_error(404, 'DeploymentPlan {} does not exist'.format(request.match_info['id']))
+        return web.json_response({}, status=202)
+
+    async def get_tasks(self, request):
+        tasks = []
+        for app in self.apps.values():
+            for task_id, started in app.tasks.items():
+                tasks.append({
+                    'id': task_id,
+                    'appId': app.id,
+                    'host': 'localhost',
+                    'state': TASK_RUNNING,
+                    'startedAt': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(started)),
+                    'version': app.version
+                })
+        return web.json_response({'tasks': tasks})
+
+    async def get_pods_status(self, request):
+        # pods are not simulated
+        return web.json_response([])
+
+    async def get_queue(self, request):
+        queue = [{'app': app.to_json(), 'count': app.deficit, 'delay': {'overdue': False}}
+                 for app in self.apps.values() if app.deficit > 0]
+        return web.json_response({'queue': queue})
+
+    async def get_events(self, request):
+        event_types = request.query.getall('event_type', [])
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+        queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                if event_types and event['eventType'] not in event_types:
+                    continue
+                message = 'event: {}\ndata: {}\n\n'.format(event['eventType'], json.dumps(event))
+                await response.write(message.encode('utf-8'))
+        finally:
+            self._subscribers.remove(queue)
+        return response
+
+    async def get_metrics(self, request):
+        running = sum(len(app.tasks) for app in self.apps.values())
+        return web.json_response({
+            'version': '3.0.0',
+            'gauges': {
+                'service.mesosphere.marathon.app.count': {'value': len(self.apps)},
+                'service.mesosphere.marathon.task.running.count': {'value': running},
+                'service.mesosphere.marathon.core.deployment.count': {'value': len(self.deployments)}
+            },
+            'counters': {
+                'org.eclipse.jetty.servlet.ServletContextHandler.requests': {'count': self.requests},
+                'org.eclipse.jetty.servlet.ServletContextHandler.5xx-responses': {'count': self.failures}
+            },
+            'histograms': {},
+            'meters': {},
+            'timers': {}
+        })
+
+    async def get_ping(self, request):
+        return web.Response(text='pong')
+
+
+class FakeMarathonServer(object):
+    """ Serves a `FakeMarathon` from a thread with its own event loop:
+
+            with FakeMarathonServer(FakeMarathon(launch_rate=100)) as server:
+                os.environ['SCALE_MARATHON_URL'] = server.url
+    """
+
+    def __init__(self, marathon=None, host='localhost', port=DEFAULT_PORT):
+        self.marathon = marathon or FakeMarathon()
+        self.host = host
+        self.port = port
+        self._loop = None
+        self._runner = None
+        self._thread = None
+        self._started = threading.Event()
+
+    @property
+    def url(self):
+        return 'http://{}:{}/'.format(self.host, self.port)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='fake-marathon', daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._runner = web.AppRunner(self.marathon.create_app())
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, self.host, self.port)
+            self._loop.run_until_complete(site.start())
+            self._started.set()
+            self._loop.run_forever()
+        finally:
+            self._started.set()
+            self._loop.close()
+
+
+@click.command()
+@click.option('--host', default='localhost', help='Interface to listen on')
+@click.option('--port', default=DEFAULT_PORT, help='Port to listen on')
+@click.option('--launch-rate', default=DEFAULT_LAUNCH_RATE, help='Tasks launched per second')
+@click.option('--kill-rate', default=DEFAULT_KILL_RATE, help='Tasks killed per second')
+@click.option('--latency', default=FIXED, type=click.Choice(LATENCY_DISTRIBUTIONS),
+              help='Distribution of the response latency')
+@click.option('--latency-mean', default=0.0, help='Mean response latency in seconds')
+@click.option('--failure-rate', default=0.0, help='Probability of a request to fail with HTTP 503')
+@click.option('--seed', default=None, type=int, help='Seed of the latencies and failures')
+def main(host, port, launch_rate, kill_rate, latency, latency_mean, failure_rate, seed):
+    """
+        Runs a fake Marathon for the scale harness until interrupted.
+        Point the scale tests at it with SCALE_MARATHON_URL=http://<host>:<port>/
+    """
+    marathon = FakeMarathon(launch_rate, kill_rate, LatencyDistribution(latency, latency_mean, seed),
+                            failure_rate, seed)
+    web.run_app(marathon.create_app(), host=host, port=port)
+
+
+if __name__ == '__main__':
+    main()
@@ -77,6 +77,22 @@ def plot_test_timing(plot, stats, marathon_type, test_type, xticks):
         text = '{} at {}'.format(scale_at_fail, time_at_fail)
         plot.text(fail_index, timings[fail_index], text,  wrap=True)
 
+    plot_undeploy_timing(plot, stats, marathon_type, test_type, xticks, timings_handle.get_color())
+
+
+def plot_undeploy_timing(plot, stats, marathon_type, test_type, xticks, color):
+    """ Plots the undeploy times of a test next to its deploy times as a dashed line
+        of the same color.  Tests without undeploy times are not plotted.
+    """
+    undeploy_time = stats.get(get_key(marathon_type, test_type, 'undeploy_time'))
+    if not undeploy_time or all(timing in (None, '') for timing in undeploy_time):
+        return
+
+    timings = np.array([timing if timing not in (None, '') else 0.0 for timing in undeploy_time])
+    title = '{} Undeploy Times'.format(test_type.title())
+    timings = pad(timings, len(xticks))
+    plot.plot(xticks, timings, label=title, color=color, linestyle='--')
+
 
 class GraphException(DCOSException):
     """ Raised when there is a issue with the ability to graph
@@ -127,7 +143,7 @@ def create_scale_graph(stats, metadata, file_name='scale.png'):
 
     """
     # strong prefer to have this discoverable, perhaps in the metadata
-    test_types = ['instances', 'count', 'group']
+    test_types = ['instances', 'count', 'group', 'openloop']
 
     marathon_type = metadata['marathon']
     error_plot = None
@@ -156,7 +172,7 @@ def create_scale_graph(stats, metadata, file_name='scale.png'):
     time_plot.set_xticks(xticks, targets)
     agents, cpus, mem = get_resources(metadata)
     time_plot.set_xlabel('Scale Targets on {} nodes with {} cpus and {} mem'.format(agents, cpus, mem))
-    time_plot.set_ylabel('Time to Reach Scale (sec)')
+    time_plot.set_ylabel('Time to Reach and Remove Scale (sec)')
     time_plot.grid(True)
 
     # graph of all the things
@@ -250,8 +266,13 @@ def load(csvfile):
         4 - launch_status
         5 - deployment_status
         6 - errors
+        7 - launch_rate - launch requests per second
+        8 - undeploy_time
+        9 - undeploy_rate - killed tasks per second, empty if unknown
+        10 - undeploy_errors
     """
-    row_keys = ['target', 'max', 'deploy_time', 'human_deploy_time', 'launch_status', 'deployment_status', 'errors']
+    row_keys = ['target', 'max', 'deploy_time', 'human_deploy_time', 'launch_status', 'deployment_status', 'errors',
+                'launch_rate', 'undeploy_time', 'undeploy_rate', 'undeploy_errors']
     stats = empty_stats()
     current_marathon = None
     current_test_type = None
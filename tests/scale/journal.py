@@ -0,0 +1,125 @@
+"""
+    Append only JSON lines journal of scale test results, from which a run is resumed.
+"""
+import collections
+import json
+import os
+import threading
+import time
+import uuid
+
+DEFAULT_JOURNAL = 'scale-journal.jsonl'
+
+RUN = 'run'
+LAUNCH = 'launch'
+DEPLOY = 'deploy'
+UNDEPLOY = 'undeploy'
+EVENTS = 'events'
+SAMPLES = 'samples'
+LATENCY = 'latency'
+BACKOFF = 'backoff'
+METRICS = 'metrics'
+RESULT = 'result'
+
+# resumes the last run of a journal
+LAST_RUN = 'last'
+
+
+class ResultJournal(object):
+    """ Append only JSON lines journal.  Reading only returns the records of the runs
+        given in `runs`, which by default is the run of this journal.  Records can be
+        appended from multiple threads.
+    """
+
+    def __init__(self, filename=DEFAULT_JOURNAL, run=None):
+        self.filename = filename
+        self.run = run or uuid.uuid4().hex
+        self.runs = [self.run]
+        self._lock = threading.Lock()
+        self._terminated = False
+
+    def start_run(self, **fields):
+        self.append(RUN, None, **fields)
+
+    def append(self, record_type, test_name, **fields):
+        record = {'run': self.run, 'type': record_type, 'test': test_name, 'time': round(time.time(), 3)}
+        record.update(fields)
+        line = json.dumps(record, separators=(',', ':'))
+        with self._lock, open(self.filename, 'a') as f:
+            if not self._terminated:
+                # a crashed run might have left a partial line which the record must not continue
+                if f.tell() > 0 and not self._ends_with_newline():
+                    line = '\n' + line
+                self._terminated = True
+            f.write(line + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _ends_with_newline(self):
+        with open(self.filename, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def records(self, record_type=None):
+        """ Yields the records of `record_type` (all records if None) in the order they
+            were written.  A partially written last line of a crashed run is skipped.
+        """
+        if not os.path.isfile(self.filename):
+            return
+
+        with open(self.filename, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('run') not in self.runs:
+                    continue
+                if record_type is None or record['type'] == record_type:
+                    yield record
+
+    def results(self):
+        """ The last result of every test by test name, in the order the tests first
+            reported a result.
+        """
+        results = collections.OrderedDict()
+        for record in self.records(RESULT):
+            results[record['test']] = record
+        return results
+
+    def last_run(self):
+        """ The id of the last run started in the journal file or None.
+        """
+        run = None
+        if os.path.isfile(self.filename):
+            with open(self.filename, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get('type') == RUN:
+                        run = record.get('run')
+        return run
+
+
+def open_journal(filename=DEFAULT_JOURNAL, resume=None):
+    """ Opens the journal for a new run or, if `resume` is given, continues the run
+        with the id `resume`.  `LAST_RUN` resumes the last run of the journal file.
+
+        :param filename: the journal file
+        :type filename: str
+        :param resume: id of the run to resume or None
+        :type resume: str
+    """
+    journal = ResultJournal(filename)
+    if not resume:
+        return journal
+
+    run = journal.last_run() if resume == LAST_RUN else resume
+    if run is None:
+        print('no run to resume in {}, starting a new run'.format(filename))
+        return journal
+
+    print('resuming run {} of {}'.format(run, filename))
+    return ResultJournal(filename, run)
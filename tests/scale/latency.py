@@ -0,0 +1,197 @@
+"""
+    Per endpoint latency histograms of the Marathon calls.
+"""
+import contextlib
+import csv
+import math
+import time
+
+from journal import LATENCY
+
+DEFAULT_SIGNIFICANT_DIGITS = 2
+PERCENTILES = [50, 90, 99]
+
+# Marathon client methods and the endpoint they call
+CLIENT_ENDPOINTS = {
+    'get_about': 'GET /v2/info',
+    'get_leader': 'GET /v2/leader',
+    'get_app': 'GET /v2/apps/{id}',
+    'get_apps': 'GET /v2/apps',
+    'add_app': 'POST /v2/apps',
+    'update_app': 'PUT /v2/apps',
+    'scale_app': 'PUT /v2/apps/{id}',
+    'remove_app': 'DELETE /v2/apps/{id}',
+    'get_groups': 'GET /v2/groups',
+    'get_group': 'GET /v2/groups/{id}',
+    'create_group': 'POST /v2/groups',
+    'remove_group': 'DELETE /v2/groups/{id}',
+    'get_deployments': 'GET /v2/deployments',
+    'stop_deployment': 'DELETE /v2/deployments/{id}',
+    'get_queued_apps': 'GET /v2/queue',
+    'get_tasks': 'GET /v2/tasks',
+    'add_pod': 'POST /v2/pods',
+    'list_pod': 'GET /v2/pods',
+    'remove_pod': 'DELETE /v2/pods/{id}'
+}
+
+
+class LatencyHistogram(object):
+    """ Histogram of durations with a fixed relative precision.
+
+        Durations are recorded in seconds and stored in microseconds.  Percentiles
+        are reported in milliseconds.
+    """
+
+    def __init__(self, significant_digits=DEFAULT_SIGNIFICANT_DIGITS):
+        largest_exact = 2 * 10 ** significant_digits
+        self.significant_digits = significant_digits
+        self.sub_bucket_bits = int(math.ceil(math.log(largest_exact, 2)))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def _index(self, value):
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        return shift * self.sub_bucket_count + (value >> shift)
+
+    def _value(self, index):
+        shift, sub_bucket = divmod(index, self.sub_bucket_count)
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, duration):
+        """ Records a duration given in seconds.
+        """
+        value = max(0, int(round(duration * 1000000)))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count = self.count + 1
+        self.total = self.total + value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other):
+        """ Adds all values of `other` which must have the same precision.
+        """
+        assert self.sub_bucket_bits == other.sub_bucket_bits, 'Histograms of different precision'
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count = self.count + other.count
+        self.total = self.total + other.total
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def percentile(self, percentile):
+        """ The value in ms below which `percentile` percent of the values fall.
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = max(1, int(math.ceil(percentile / 100.0 * self.count)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen = seen + self.counts[index]
+            if seen >= rank:
+                return round(min(self._value(index), self.max) / 1000.0, 3)
+
+        return self.max_ms
+
+    @property
+    def mean_ms(self):
+        if self.count == 0:
+            return 0.0
+        return round(self.total / self.count / 1000.0, 3)
+
+    @property
+    def max_ms(self):
+        return round(self.max / 1000.0, 3)
+
+    def summary(self):
+        summary = {'count': self.count, 'mean': self.mean_ms, 'max': self.max_ms}
+        for percentile in PERCENTILES:
+            summary['p{}'.format(percentile)] = self.percentile(percentile)
+        return summary
+
+    def __str__(self):
+        return "count: {count} mean: {mean}ms p50: {p50}ms p90: {p90}ms p99: {p99}ms max: {max}ms".format(
+            **self.summary())
+
+
+class LatencyRecorder(object):
+    """ Collects a `LatencyHistogram` per endpoint.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.last = {}
+
+    def histogram(self, endpoint):
+        histogram = self.histograms.get(endpoint)
+        if histogram is None:
+            histogram = LatencyHistogram()
+            self.histograms[endpoint] = histogram
+        return histogram
+
+    def record(self, endpoint, duration):
+        self.histogram(endpoint).record(duration)
+        self.last[endpoint] = duration
+
+    def merge(self, other):
+        for endpoint, histogram in other.histograms.items():
+            self.histogram(endpoint).merge(histogram)
+        self.last.update(other.last)
+
+    @contextlib.contextmanager
+    def time(self, endpoint):
+        """ Records the duration of the context, also if it raises.
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(endpoint, time.time() - start)
+
+    def summary(self):
+        return {endpoint: histogram.summary() for endpoint, histogram in self.histograms.items()}
+
+    def log(self):
+        for endpoint in sorted(self.histograms):
+            print('    {}: {}'.format(endpoint, self.histograms[endpoint]))
+
+
+class InstrumentedClient(object):
+    """ Wraps a Marathon client and records the duration of every call in a
+        `LatencyRecorder`.  Attributes which are not callable are passed through.
+    """
+
+    def __init__(self, client, recorder):
+        self._client = client
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        endpoint = CLIENT_ENDPOINTS.get(name, name)
+
+        def timed(*args, **kwargs):
+            with self._recorder.time(endpoint):
+                return attribute(*args, **kwargs)
+
+        return timed
+
+
+def write_latency_csv(journal, filename='scale-latency.csv'):
+    """ Writes a row per journaled test and endpoint with the percentiles in ms.
+    """
+    with open(filename, 'w') as f:
+        w = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        w.writerow(['test', 'endpoint', 'count', 'mean', 'p50', 'p90', 'p99', 'max'])
+        for record in journal.records(LATENCY):
+            for endpoint, summary in sorted(record['latencies'].items()):
+                w.writerow([record['test'], endpoint, summary['count'], summary['mean'],
+                            summary['p50'], summary['p90'], summary['p99'], summary['max']])
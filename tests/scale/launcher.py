@@ -0,0 +1,132 @@
+"""
+    Concurrent launches of the apps of a scale test.
+"""
+import aiohttp
+import asyncio
+import json
+import time
+
+from connection import marathon_headers, marathon_service_url, pooled_client
+from urllib.parse import urljoin
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_REQUEST_TIMEOUT = 60
+
+
+class LaunchOutcome(object):
+    """ Result of a single launch request.
+    """
+
+    def __init__(self, index, status=None, error=None, elapsed=0.0):
+        self.index = index
+        self.status = status
+        self.error = error
+        self.elapsed = elapsed
+        # open loop launches: latency measured from the intended start of the request
+        self.corrected_elapsed = None
+
+    @property
+    def success(self):
+        return self.error is None
+
+    def __repr__(self):
+        return "launch outcome: {} status: {} error: {} elapsed: {}".format(
+            self.index,
+            self.status,
+            self.error,
+            self.elapsed)
+
+
+class AsyncLauncher(object):
+    """ Launches payloads against a Marathon endpoint with bounded concurrency.
+
+        The launcher owns an event loop and an aiohttp session for its lifetime and is
+        meant to be used as a context manager:
+
+            with AsyncLauncher(marathon_service_url(), concurrency=32) as launcher:
+                outcomes = launcher.post('v2/apps', payloads)
+
+        Every `post` call blocks until all payloads of the batch have been answered which
+        makes it possible to keep checkpoints (e.g. wait for scale every 100 apps) between
+        batches.
+    """
+
+    def __init__(self, base_url, headers=None, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_REQUEST_TIMEOUT):
+        self.base_url = base_url
+        self.headers = headers or {}
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.requests = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self._loop = None
+        self._session = None
+
+    def __enter__(self):
+        self._loop = asyncio.new_event_loop()
+        self._session = self._loop.run_until_complete(self._create_session())
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._loop.run_until_complete(self._session.close())
+        self._loop.close()
+        self._session = None
+        self._loop = None
+
+    async def _create_session(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ssl=pooled_client.aiohttp_ssl())
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        return aiohttp.ClientSession(connector=connector, headers=self.headers, timeout=timeout)
+
+    @property
+    def request_rate(self):
+        """ Achieved requests per second over all batches.
+        """
+        if self.elapsed <= 0:
+            return 0.0
+        return round(self.requests / self.elapsed, 3)
+
+    def post(self, path, payloads, first_index=1):
+        """ Posts every payload to `path` and returns the outcomes ordered by payload.
+
+            :param path: The Marathon path relative to the base url, e.g. `v2/apps`
+            :type path: str
+            :param payloads: The JSON documents to post
+            :type payloads: list
+            :param first_index: The index reported for the first payload of the batch
+            :type first_index: int
+        """
+        url = urljoin(self.base_url, path)
+        start = time.time()
+        outcomes = self._loop.run_until_complete(self._post_all(url, payloads, first_index))
+        self.elapsed += time.time() - start
+        self.requests += len(outcomes)
+        self.errors += len([outcome for outcome in outcomes if not outcome.success])
+        return outcomes
+
+    async def _post_all(self, url, payloads, first_index):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        requests = [self._post(semaphore, url, payload, first_index + offset)
+                    for offset, payload in enumerate(payloads)]
+        return await asyncio.gather(*requests)
+
+    async def _post(self, semaphore, url, payload, index):
+        async with semaphore:
+            return await self._request(url, payload, index)
+
+    async def _request(self, url, payload, index):
+        start = time.time()
+        try:
+            async with self._session.post(url, data=json.dumps(payload)) as response:
+                body = await response.text()
+                elapsed = time.time() - start
+                if response.status >= 400:
+                    error = 'HTTP {}: {}'.format(response.status, body)
+                    return LaunchOutcome(index, response.status, error, elapsed)
+                return LaunchOutcome(index, response.status, elapsed=elapsed)
+        except Exception as e:
+            return LaunchOutcome(index, error=repr(e), elapsed=time.time() - start)
+
+
+def create_launcher(test_obj, concurrency=DEFAULT_CONCURRENCY):
+    return AsyncLauncher(marathon_service_url(test_obj.mom), marathon_headers(), concurrency)
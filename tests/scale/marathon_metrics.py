@@ -0,0 +1,151 @@
+"""
+    Background sampling of the Marathon `/metrics` during a test.
+"""
+import csv
+import logging
+import os
+import requests
+import threading
+import time
+
+from journal import METRICS
+from utils import system_module
+
+pooled_client = system_module('pooled_client')
+
+# seconds between samples, 0 disables the sampling
+METRICS_INTERVAL = float(os.environ.get('SCALE_METRICS_INTERVAL', 0))
+METRIC_PREFIXES = os.environ.get('SCALE_METRICS_FILTER', ','.join([
+    'org.eclipse.jetty.servlet.ServletContextHandler',
+    'jvm.memory',
+    'jvm.threads',
+    'jvm.gc',
+    'service.mesosphere.marathon.app.count',
+    'service.mesosphere.marathon.group.count',
+    'service.mesosphere.marathon.task',
+    'service.mesosphere.marathon.core.deployment',
+    'service.mesosphere.marathon.upgrade',
+    'service.mesosphere.marathon.core.task.tracker',
+    'service.mesosphere.marathon.core.task.update',
+    'service.mesosphere.marathon.core.launcher',
+    'service.mesosphere.marathon.core.launchqueue',
+    'service.mesosphere.marathon.state.GroupManager'
+])).split(',')
+
+# the fields kept of every type of metric in the /metrics response
+METRIC_FIELDS = {
+    'gauges': ['value'],
+    'counters': ['count'],
+    'meters': ['count', 'm1_rate'],
+    'histograms': ['count', 'mean', 'p99', 'max'],
+    'timers': ['count', 'mean', 'p50', 'p99', 'max', 'm1_rate']
+}
+
+REQUEST_TIMEOUT = 30
+
+
+def flatten_metrics(metrics_json, prefixes=METRIC_PREFIXES):
+    """ The numeric values of a Dropwizard `/metrics` response as a flat dictionary of
+        `<metric name>.<field>` for all metrics starting with one of `prefixes`.
+    """
+    values = {}
+    for metric_type, fields in METRIC_FIELDS.items():
+        for name, metric in metrics_json.get(metric_type, {}).items():
+            if not any(name.startswith(prefix) for prefix in prefixes):
+                continue
+            for field in fields:
+                value = metric.get(field)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    values['{}.{}'.format(name, field)] = value
+    return values
+
+
+class MarathonMetricsSample(object):
+    __slots__ = ['time', 'target', 'phase', 'scale', 'values']
+
+    def __init__(self, time, target, phase, scale, values):
+        self.time = time
+        self.target = target
+        self.phase = phase
+        self.scale = scale
+        self.values = values
+
+    def to_json(self):
+        return {'time': self.time, 'target': self.target, 'phase': self.phase, 'scale': self.scale,
+                'values': self.values}
+
+
+class MarathonMetricsSampler(object):
+    """ Samples the `/metrics` of the Marathon of `scale_test` every `interval` seconds
+        from a daemon thread and journals every sample with the test.  Failed requests
+        are counted and otherwise ignored.
+    """
+
+    def __init__(self, scale_test, url, headers, interval=METRICS_INTERVAL, prefixes=METRIC_PREFIXES):
+        self.scale_test = scale_test
+        self.url = url
+        self.headers = headers
+        self.interval = interval
+        self.prefixes = prefixes
+        self.verify = pooled_client.ssl_verify()
+        self.sampled = 0
+        self.failures = 0
+        self._logger = logging.getLogger(self.__class__.__module__)
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='marathon-metrics', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(REQUEST_TIMEOUT)
+
+    def _run(self):
+        session = requests.Session()
+        while not self._stopped.is_set():
+            try:
+                self.sample(session)
+            except Exception as e:
+                self.failures = self.failures + 1
+                self._logger.debug('Sampling marathon metrics failed: %s', e)
+            self._stopped.wait(self.interval)
+
+    def sample(self, session=requests):
+        response = session.get(self.url, headers=self.headers, timeout=REQUEST_TIMEOUT, verify=self.verify)
+        response.raise_for_status()
+        scale_test = self.scale_test
+        sample = MarathonMetricsSample(
+            round(time.time() - scale_test.start, 3),
+            scale_test.target,
+            scale_test.phase,
+            scale_test.deploy_results.current_scale,
+            flatten_metrics(response.json(), self.prefixes))
+        scale_test.record(METRICS, interval=self.interval, samples=[sample.to_json()])
+        self.sampled = self.sampled + 1
+
+    def __repr__(self):
+        return 'marathon metrics: {} samples, {} failures'.format(self.sampled, self.failures)
+
+
+def write_metrics_csv(journal, filename='scale-metrics.csv'):
+    """ Writes a row per journaled sample and metric.  The time is in seconds since the
+        start of the test.  A metrics record holds one or more samples.
+    """
+    with open(filename, 'w') as f:
+        w = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        w.writerow(['test', 'time', 'target', 'phase', 'scale', 'metric', 'value'])
+        for record in journal.records(METRICS):
+            for sample in record['samples']:
+                for metric, value in sorted(sample['values'].items()):
+                    w.writerow([record['test'], sample['time'], sample['target'], sample['phase'],
+                                sample['scale'], metric, value])
@@ -0,0 +1,97 @@
+"""
+    Launches at a constant arrival rate, whatever the response times are.
+"""
+import asyncio
+import random
+import time
+
+from connection import marathon_headers, marathon_service_url
+from launcher import AsyncLauncher
+from urllib.parse import urljoin
+
+FIXED = 'fixed'
+POISSON = 'poisson'
+DISTRIBUTIONS = [FIXED, POISSON]
+
+# upper bound of open connections, requests beyond it queue in the client which
+# is accounted for by the corrected latencies
+DEFAULT_MAX_CONNECTIONS = 1000
+
+
+def arrival_offsets(rate, count, distribution=FIXED, seed=None):
+    """ Yields `count` offsets in seconds from the start at which requests arrive.
+
+        :param rate: Requests per second
+        :type rate: float
+        :param distribution: `fixed` for constant inter arrival times or `poisson` for
+            exponentially distributed inter arrival times with the same mean
+        :type distribution: str
+        :param seed: Seed of the random inter arrival times
+        :type seed: int
+    """
+    if rate <= 0:
+        raise ValueError('Arrival rate must be positive: {}'.format(rate))
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError('Unknown arrival distribution {}, expected one of {}'.format(distribution, DISTRIBUTIONS))
+
+    generator = random.Random(seed)
+    offset = 0.0
+    for num in range(count):
+        yield offset
+        if distribution == POISSON:
+            offset = offset + generator.expovariate(rate)
+        else:
+            offset = (num + 1) / float(rate)
+
+
+class OpenLoopLauncher(AsyncLauncher):
+    """ Posts payloads at a constant arrival rate.  Every outcome has the service time
+        in `elapsed` and the latency from the intended send time in `corrected_elapsed`.
+    """
+
+    def __init__(self, base_url, headers=None, rate=1.0, distribution=FIXED, seed=None,
+                 max_connections=DEFAULT_MAX_CONNECTIONS):
+        super(OpenLoopLauncher, self).__init__(base_url, headers, max_connections)
+        self.rate = rate
+        self.distribution = distribution
+        self.seed = seed
+        self.max_outstanding = 0
+        self._outstanding = 0
+
+    def post(self, path, payloads, first_index=1):
+        """ Posts every payload to `path` at the arrival rate of the launcher and returns
+            the outcomes ordered by payload.
+        """
+        url = urljoin(self.base_url, path)
+        offsets = list(arrival_offsets(self.rate, len(payloads), self.distribution, self.seed))
+        start = time.time()
+        outcomes = self._loop.run_until_complete(self._post_scheduled(url, payloads, offsets, first_index))
+        self.elapsed += time.time() - start
+        self.requests += len(outcomes)
+        self.errors += len([outcome for outcome in outcomes if not outcome.success])
+        return outcomes
+
+    async def _post_scheduled(self, url, payloads, offsets, first_index):
+        start = time.time()
+        requests = []
+        for num, (payload, offset) in enumerate(zip(payloads, offsets)):
+            intended = start + offset
+            delay = intended - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            requests.append(asyncio.ensure_future(self._arrive(url, payload, first_index + num, intended)))
+        return await asyncio.gather(*requests)
+
+    async def _arrive(self, url, payload, index, intended):
+        self._outstanding = self._outstanding + 1
+        self.max_outstanding = max(self.max_outstanding, self._outstanding)
+        try:
+            outcome = await self._request(url, payload, index)
+        finally:
+            self._outstanding = self._outstanding - 1
+        outcome.corrected_elapsed = time.time() - intended
+        return outcome
+
+
+def create_open_loop_launcher(test_obj, rate, distribution=FIXED):
+    return OpenLoopLauncher(marathon_service_url(test_obj.mom), marathon_headers(), rate, distribution)
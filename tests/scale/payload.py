@@ -0,0 +1,114 @@
+"""
+    Group bodies streamed from a generator of apps.
+"""
+import json
+import os
+import requests
+import zlib
+
+from urllib.parse import urljoin
+from utils import system_module
+
+pooled_client = system_module('pooled_client')
+
+# Marathon does not inflate gzip request bodies, SCALE_GROUP_GZIP only applies to fake_marathon.py
+GROUP_GZIP = os.environ.get('SCALE_GROUP_GZIP', '').lower() in ['1', 'true', 'yes']
+FAKE_MARATHON_VERSION = 'fake'
+CHUNK_SIZE = 64 * 1024
+REQUEST_TIMEOUT = 60 * 10
+
+
+class GroupPayload(object):
+    """ The JSON body of a group with the given apps as an iterable of byte chunks.
+        The payload can be iterated once.
+
+        :param group_id: id of the group
+        :type group_id: str
+        :param apps: the app definitions of the group, e.g. a generator
+        :type apps: iterable
+        :param compress: gzip the body, only fake_marathon.py accepts it
+        :type compress: bool
+    """
+
+    def __init__(self, group_id, apps, compress=False, chunk_size=CHUNK_SIZE):
+        self.group_id = group_id
+        self.apps = apps
+        self.compress = compress
+        self.chunk_size = chunk_size
+        # bytes of the JSON document and of the body as sent
+        self.json_bytes = 0
+        self.body_bytes = 0
+        self.app_count = 0
+
+    @property
+    def headers(self):
+        headers = {'Content-Type': 'application/json'}
+        if self.compress:
+            headers['Content-Encoding'] = 'gzip'
+        return headers
+
+    def documents(self):
+        """ The JSON document of the group as a sequence of strings.
+        """
+        yield '{{"id": {}, "apps": ['.format(json.dumps(self.group_id))
+        for app in self.apps:
+            if self.app_count > 0:
+                yield ', '
+            self.app_count = self.app_count + 1
+            yield json.dumps(app)
+        yield ']}'
+
+    def __iter__(self):
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if self.compress else None
+        buffer = []
+        buffered = 0
+        for document in self.documents():
+            data = document.encode('utf-8')
+            self.json_bytes = self.json_bytes + len(data)
+            if compressor is not None:
+                data = compressor.compress(data)
+            buffer.append(data)
+            buffered = buffered + len(data)
+            if buffered >= self.chunk_size:
+                yield self._chunk(buffer)
+                buffer = []
+                buffered = 0
+
+        if compressor is not None:
+            buffer.append(compressor.flush())
+        chunk = self._chunk(buffer)
+        if chunk:
+            yield chunk
+
+    def _chunk(self, buffer):
+        chunk = b''.join(buffer)
+        self.body_bytes = self.body_bytes + len(chunk)
+        return chunk
+
+    @property
+    def compression_ratio(self):
+        if self.body_bytes == 0:
+            return None
+        return round(self.json_bytes / self.body_bytes, 3)
+
+    def __repr__(self):
+        return 'group payload: {} apps: {} json bytes: {} body bytes: {}'.format(
+            self.group_id,
+            self.app_count,
+            self.json_bytes,
+            self.body_bytes)
+
+
+def post_group(base_url, headers, payload, timeout=REQUEST_TIMEOUT):
+    """ Posts a `GroupPayload` to `v2/groups` of the Marathon at `base_url` and returns
+        the response.  Raises an exception for an error response with the message of
+        Marathon.
+    """
+    request_headers = dict(headers or {})
+    request_headers.update(payload.headers)
+    response = requests.post(urljoin(base_url, 'v2/groups'), data=iter(payload), headers=request_headers,
+                             timeout=timeout, verify=pooled_client.ssl_verify())
+    if response.status_code >= 400:
+        raise Exception('Error while creating group {}: {} {}'.format(
+            payload.group_id, response.status_code, response.text))
+    return response
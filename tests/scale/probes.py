@@ -0,0 +1,140 @@
+"""
+    Backends of `current_scale`, selected with `SCALE_PROBE`.
+"""
+import abc
+
+from connection import json_stream, marathon_records
+from dcos import mesos
+from latency import LatencyRecorder
+from shakedown import get_active_tasks
+
+DEFAULT_PROBE = 'state-summary'
+VERIFICATION_PROBE = 'tasks'
+
+# a Marathon outside of DC/OS (see fake_marathon.py) has no Mesos to probe
+LOCAL_PROBE = 'apps'
+LOCAL_VERIFICATION_PROBE = 'marathon-tasks'
+
+
+class ScaleProbe(abc.ABC):
+    """ Base class of the scale probes.  Subclasses implement `_probe`.
+    """
+
+    name = None
+
+    def __init__(self, recorder=None):
+        self.latencies = recorder if recorder is not None else LatencyRecorder()
+
+    @property
+    def endpoint(self):
+        return 'probe {}'.format(self.name)
+
+    def current_scale(self):
+        with self.latencies.time(self.endpoint):
+            return self._probe()
+
+    @abc.abstractmethod
+    def _probe(self):
+        """ The number of running tasks.
+        """
+
+    def __repr__(self):
+        return 'scale probe: {}'.format(self.name)
+
+
+class MesosStateSummaryProbe(ScaleProbe):
+    """ Sums the `TASK_RUNNING` counters of all frameworks of the Mesos state summary.
+        The state summary has no task details which keeps it small at any scale.
+    """
+
+    name = 'state-summary'
+
+    def _probe(self):
+        summary = mesos.DCOSClient().get_state_summary()
+        return sum(framework.get('TASK_RUNNING', 0) for framework in summary['frameworks'])
+
+
+class MarathonAppsProbe(ScaleProbe):
+    """ Sums `tasksRunning` of all apps and the running containers of all pods of
+        Marathon.  The size of the apps grows with the number of apps but not with
+        the number of instances, the pod status lists every instance.  The records
+        are decoded one at a time.
+    """
+
+    name = 'apps'
+
+    def _probe(self):
+        app_tasks = sum(app.get('tasksRunning', 0) for app in marathon_records('v2/apps', 'apps'))
+        return app_tasks + sum(running_containers(pod) for pod in marathon_records('v2/pods/::status', None))
+
+
+class TaskListingProbe(ScaleProbe):
+    """ Base class of the probes which list every task.  They also provide the ids of
+        the running tasks with `running_tasks`.
+    """
+
+    def running_tasks(self):
+        with self.latencies.time(self.endpoint):
+            return self._running_tasks()
+
+    def _probe(self):
+        return len(self._running_tasks())
+
+    @abc.abstractmethod
+    def _running_tasks(self):
+        """ The ids of the running tasks.
+        """
+
+
+class TaskListProbe(TaskListingProbe):
+    """ Counts the running tasks of the full list of active Mesos tasks.  This is the
+        most expensive probe and the reference the others are verified against.
+    """
+
+    name = 'tasks'
+
+    def _running_tasks(self):
+        return {task['id'] for task in get_active_tasks() if is_running(task)}
+
+
+class MarathonTaskListProbe(TaskListingProbe):
+    """ Counts the running tasks of Marathon's own task view.  This is as expensive as
+        the Mesos task list but does not need Mesos.  The tasks are counted as they are
+        decoded, the list is never held in memory.
+    """
+
+    name = 'marathon-tasks'
+
+    def _probe(self):
+        return json_stream.count_records(marathon_records('v2/tasks', 'tasks'), is_running)
+
+    def _running_tasks(self):
+        return {task['id'] for task in marathon_records('v2/tasks', 'tasks') if is_running(task)}
+
+
+def is_running(task):
+    return task.get('state', 'TASK_RUNNING') == 'TASK_RUNNING'
+
+
+def running_containers(pod_status):
+    """ The running containers of all instances of a pod, every container is a task.
+    """
+    return sum(1 for instance in pod_status.get('instances', []) for container in instance.get('containers', [])
+               if container.get('status') == 'TASK_RUNNING')
+
+
+PROBES = {
+    MesosStateSummaryProbe.name: MesosStateSummaryProbe,
+    MarathonAppsProbe.name: MarathonAppsProbe,
+    TaskListProbe.name: TaskListProbe,
+    MarathonTaskListProbe.name: MarathonTaskListProbe
+}
+
+
+def create_probe(name=DEFAULT_PROBE, recorder=None):
+    """ Creates the scale probe registered as `name`.
+    """
+    probe_class = PROBES.get(name)
+    if probe_class is None:
+        raise ValueError('Unknown scale probe {}, expected one of {}'.format(name, sorted(PROBES)))
+    return probe_class(recorder)
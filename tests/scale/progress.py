@@ -0,0 +1,190 @@
+"""
+    Progress of the running scale test in the Prometheus text format.
+"""
+import os
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+# the endpoint is only served if a port is configured
+METRICS_PORT = os.environ.get('SCALE_METRICS_PORT')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels_text(labels):
+    return ','.join('{}="{}"'.format(name, escape(value)) for name, value in sorted(labels.items()))
+
+
+class MetricsText(object):
+    """ Builds a page of the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.lines = []
+
+    def metric(self, name, metric_type, help_text, samples):
+        """ Adds the metric `name` with a list of (labels, value) samples.  Samples with a
+            value of None are left out.
+        """
+        self.lines.append('# HELP {} {}'.format(name, help_text))
+        self.lines.append('# TYPE {} {}'.format(name, metric_type))
+        for labels, value in samples:
+            if value is None:
+                continue
+            self.lines.append('{}{{{}}} {}'.format(name, labels_text(labels), float(value)))
+
+    def __str__(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+def scale_test_metrics(scale_test):
+    """ The metrics of `scale_test` as a page of the Prometheus text format.
+    """
+    text = MetricsText()
+    labels = {'test': scale_test.name, 'style': scale_test.style, 'marathon': scale_test.mom}
+    launch_results = scale_test.launch_results
+    deploy_results = scale_test.deploy_results
+
+    queued = None
+    deployments = None
+    samples = deploy_results.samples
+    if len(samples) > 0:
+        queued = samples.queued[-1] if samples.queued[-1] >= 0 else None
+        deployments = samples.deployments[-1] if samples.deployments[-1] >= 0 else None
+
+    text.metric('scale_test_target', 'gauge', 'Number of tasks the test scales to.',
+                [(labels, deploy_results.target)])
+    text.metric('scale_test_current_scale', 'gauge', 'Number of running tasks.',
+                [(labels, deploy_results.current_scale)])
+    text.metric('scale_test_phase', 'gauge', 'The current phase of the test.',
+                [(dict(labels, phase=scale_test.phase), 1)])
+    text.metric('scale_test_elapsed_seconds', 'gauge', 'Time since the start of the test.',
+                [(labels, time.time() - scale_test.start)])
+    text.metric('scale_test_launch_requests_total', 'counter', 'Launch requests sent.',
+                [(labels, launch_results.requests)])
+    text.metric('scale_test_launch_rate', 'gauge', 'Achieved launch requests per second.',
+                [(labels, launch_results.request_rate)])
+    text.metric('scale_test_launch_latency_seconds', 'gauge', 'Mean latency of the launch requests.',
+                [(labels, launch_results.avg_response_time)])
+    text.metric('scale_test_queued_tasks', 'gauge', 'Tasks in the launch queue at the last poll.',
+                [(labels, queued)])
+    text.metric('scale_test_outstanding_deployments', 'gauge', 'Active deployments at the last poll.',
+                [(labels, deployments)])
+    text.metric('scale_test_poll_latency_seconds', 'gauge', 'Latency of the last deployment poll.',
+                [(labels, deploy_results.last_response_time)])
+    text.metric('scale_test_poll_latency_mean_seconds', 'gauge', 'Mean latency of the deployment polls.',
+                [(labels, deploy_results.avg_response_time)])
+    text.metric('scale_test_events_total', 'counter', 'Events of the test by type.',
+                [(dict(labels, type=event_type), count)
+                 for event_type, count in sorted(scale_test.events.counts.items())])
+    text.metric('scale_test_errors_total', 'counter', 'Error and fatal events of the test.',
+                [(labels, scale_test.error_count)])
+    return text
+
+
+class ProgressHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+
+        scale_test = self.server.progress.scale_test
+        body = '' if scale_test is None else str(scale_test_metrics(scale_test))
+        self._respond(200, body)
+
+    def do_POST(self):
+        if self.path != '/abort':
+            self.send_error(404)
+            return
+
+        self.server.progress.abort()
+        self._respond(202, 'abort requested\n')
+
+    def _respond(self, status, body):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # scrapes are not interesting in the test output
+        pass
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class ProgressServer(object):
+    """ Serves the metrics of the test set with `watch` from a daemon thread.
+    """
+
+    def __init__(self, port, host='localhost'):
+        self.port = int(port)
+        self.host = host
+        self.scale_test = None
+        self.abort_requested = False
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), ProgressHandler)
+        self._server.progress = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name='scale-progress', daemon=True)
+        self._thread.start()
+        print('serving scale test metrics on http://{}:{}/metrics'.format(self.host, self.port))
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def watch(self, scale_test):
+        """ Serves the metrics of `scale_test` from now on.
+        """
+        self.scale_test = scale_test
+        self.abort_requested = False
+
+    def abort(self):
+        self.abort_requested = True
+
+
+# the progress server of the test run, if SCALE_METRICS_PORT is set
+progress_server = None
+
+
+def start_progress_server(port=METRICS_PORT):
+    global progress_server
+    if port and progress_server is None:
+        progress_server = ProgressServer(port)
+        progress_server.start()
+    return progress_server
+
+
+def stop_progress_server():
+    global progress_server
+    if progress_server is not None:
+        progress_server.stop()
+        progress_server = None
+
+
+def watch_progress(scale_test):
+    if progress_server is not None:
+        progress_server.watch(scale_test)
+
+
+def abort_requested():
+    """ True if an abort of the running test was requested with `POST /abort`.
+    """
+    return progress_server is not None and progress_server.abort_requested
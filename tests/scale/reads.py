@@ -0,0 +1,179 @@
+"""
+    Latency and response size of the Marathon read API.
+"""
+import csv
+import math
+import os
+import requests
+import time
+
+from urllib.parse import urljoin
+from utils import system_module
+
+pooled_client = system_module('pooled_client')
+
+CHUNK_SIZE = 64 * 1024
+REQUEST_TIMEOUT = 60 * 5
+# samples of every endpoint per step
+READ_REPEATS = int(os.environ.get('SCALE_CAP_READ_REPEATS', 3))
+# growth exponents above this are reported as superlinear
+SUPERLINEAR_EXPONENT = 1.1
+
+# the read API used by load balancers and the UI
+READ_ENDPOINTS = [
+    ('GET /v2/apps', 'v2/apps'),
+    ('GET /v2/groups', 'v2/groups'),
+    ('GET /v2/tasks', 'v2/tasks'),
+    ('GET /v2/deployments', 'v2/deployments'),
+    ('GET /v2/queue', 'v2/queue')
+]
+
+
+class ReadSample(object):
+    """ The latency in seconds and the body size in bytes of one GET.
+    """
+    __slots__ = ['endpoint', 'path', 'latency', 'size', 'status', 'error']
+
+    def __init__(self, endpoint, path, latency, size, status=None, error=None):
+        self.endpoint = endpoint
+        self.path = path
+        self.latency = latency
+        self.size = size
+        self.status = status
+        self.error = error
+
+    @property
+    def success(self):
+        return self.error is None
+
+    def __repr__(self):
+        return 'read: {} {}ms {} bytes{}'.format(
+            self.endpoint,
+            round(self.latency * 1000, 3),
+            self.size,
+            '' if self.error is None else ' failed: {}'.format(self.error))
+
+
+class ReadSampler(object):
+    """ GETs paths of the Marathon at `base_url` on a keep-alive session.
+
+        :param base_url: url of Marathon
+        :type base_url: str
+        :param headers: headers of the requests, e.g. the ACS token
+        :type headers: dict
+    """
+
+    def __init__(self, base_url, headers=None, timeout=REQUEST_TIMEOUT):
+        self.base_url = base_url
+        self.headers = headers
+        self.timeout = timeout
+        self.verify = pooled_client.ssl_verify()
+        self._session = requests.Session()
+
+    def sample(self, endpoint, path):
+        """ The latency and size of GET `path`.  A failed request is returned as a sample
+            with the error.
+        """
+        start = time.time()
+        size = 0
+        try:
+            response = self._session.get(urljoin(self.base_url, path), headers=self.headers, stream=True,
+                                         timeout=self.timeout, verify=self.verify)
+            try:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    size = size + len(chunk)
+            finally:
+                response.close()
+            error = None if response.status_code < 400 else 'HTTP {}'.format(response.status_code)
+            return ReadSample(endpoint, path, time.time() - start, size, response.status_code, error)
+        except Exception as e:
+            return ReadSample(endpoint, path, time.time() - start, size, error=repr(e))
+
+
+def read_endpoints(repeats=READ_REPEATS):
+    """ The (endpoint, path) of `READ_ENDPOINTS` to sample `repeats` times per step.
+    """
+    return [endpoint for _ in range(repeats) for endpoint in READ_ENDPOINTS]
+
+
+def growth_exponent(points):
+    """ The exponent k of y ~ x^k fitted by least squares to the (x, y) points on a log
+        scale.  None if there are less than two distinct positive x.
+    """
+    logs = [(math.log(x), math.log(y)) for x, y in points if x > 0 and y > 0]
+    if len(set(x for x, _ in logs)) < 2:
+        return None
+    mean_x = sum(x for x, _ in logs) / len(logs)
+    mean_y = sum(y for _, y in logs) / len(logs)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in logs)
+    variance = sum((x - mean_x) ** 2 for x, _ in logs)
+    return round(covariance / variance, 3)
+
+
+class ReadCost(object):
+    """ The mean latency in ms and size in bytes of an endpoint at a number of apps.
+    """
+    __slots__ = ['apps', 'endpoint', 'latency', 'size', 'samples']
+
+    def __init__(self, apps, endpoint, latency, size, samples):
+        self.apps = apps
+        self.endpoint = endpoint
+        self.latency = latency
+        self.size = size
+        self.samples = samples
+
+    @property
+    def latency_per_app(self):
+        return round(self.latency / self.apps, 6) if self.apps else None
+
+    @property
+    def size_per_app(self):
+        return round(self.size / self.apps, 3) if self.apps else None
+
+
+def read_costs(steps):
+    """ The `ReadCost` of every endpoint at every step of a cap test.  The size of a
+        step is the number of apps.
+    """
+    costs = []
+    for step in steps:
+        endpoints = sorted(set(sample.endpoint for sample in step.reads))
+        for endpoint in endpoints:
+            samples = [sample for sample in step.reads if sample.endpoint == endpoint and sample.success]
+            if not samples:
+                continue
+            latency = round(sum(sample.latency for sample in samples) / len(samples) * 1000, 3)
+            size = round(sum(sample.size for sample in samples) / len(samples))
+            costs.append(ReadCost(step.size, endpoint, latency, size, len(samples)))
+    return costs
+
+
+def read_growth(costs):
+    """ The growth exponents of the latency and the size of every endpoint with the
+        number of apps by endpoint.
+    """
+    growth = {}
+    for endpoint in sorted(set(cost.endpoint for cost in costs)):
+        points = [cost for cost in costs if cost.endpoint == endpoint]
+        growth[endpoint] = (growth_exponent([(cost.apps, cost.latency) for cost in points]),
+                            growth_exponent([(cost.apps, cost.size) for cost in points]))
+    return growth
+
+
+def log_read_growth(costs):
+    for endpoint, (latency, size) in sorted(read_growth(costs).items()):
+        superlinear = latency is not None and latency > SUPERLINEAR_EXPONENT
+        print('    {}: latency ~ apps^{} size ~ apps^{}{}'.format(
+            endpoint, latency, size, ' (superlinear)' if superlinear else ''))
+
+
+def write_read_cost_csv(costs, filename):
+    """ Writes a row per step and endpoint with the read cost in total and per app.
+        The latencies are in ms, the sizes in bytes.
+    """
+    with open(filename, 'w') as f:
+        w = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        w.writerow(['apps', 'endpoint', 'samples', 'latency', 'size', 'latency_per_app', 'size_per_app'])
+        for cost in costs:
+            w.writerow([cost.apps, cost.endpoint, cost.samples, cost.latency, cost.size,
+                        cost.latency_per_app, cost.size_per_app])
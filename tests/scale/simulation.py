@@ -0,0 +1,177 @@
+"""
+    Marathon on the simulated Mesos of mesos-simulation as the backend of the scale tests.
+"""
+import atexit
+import os
+import requests
+import shlex
+import subprocess
+import time
+import uuid
+
+from utils import file_dir
+
+SIMULATION = os.environ.get('SCALE_SIMULATION', '').lower() in ['1', 'true', 'yes']
+SIMULATION_PORT = int(os.environ.get('SCALE_SIMULATION_PORT', 8080))
+SIMULATION_ZK = os.environ.get('SCALE_SIMULATION_ZK', 'zk://localhost:2181')
+SIMULATION_JAVA_OPTS = os.environ.get('SCALE_SIMULATION_JAVA_OPTS', '-Xmx2g -Xms512m')
+SIMULATION_ARGS = os.environ.get('SCALE_SIMULATION_ARGS', '')
+
+MAIN_CLASS = 'mesosphere.mesos.simulation.SimulateMesosMain'
+# the simulated driver ignores the master but Marathon requires one
+SIMULATED_MASTER = 'localhost:5050'
+SIMULATION_LOG = 'scale-simulation.log'
+STARTUP_TIMEOUT = 60 * 4
+
+# configuration of the mesos-simulation ScalingTest
+MARATHON_CONFIG = {
+    'hostname': 'localhost',
+    'min_revive_offers_interval': '100',
+    'max_instances_per_offer': os.environ.get('MARATHON_MAX_INSTANCES_PER_OFFER', '1'),
+    'task_launch_timeout': '20000',
+    'task_launch_confirm_timeout': '1000',
+    'reconciliation_initial_delay': str(5 * 60 * 1000),
+    'offer_matching_timeout': '10000'
+}
+
+
+def simulation_url():
+    """ The url of the simulated Marathon if the simulation is enabled, otherwise None.
+    """
+    if not SIMULATION:
+        return None
+    return 'http://localhost:{}/'.format(SIMULATION_PORT)
+
+
+def project_dir():
+    return os.path.realpath(os.path.join(file_dir(), '..', '..'))
+
+
+def simulation_classpath():
+    """ The class path of the mesos-simulation project.  Exporting it with sbt compiles
+        the project if needed, which takes a while the first time.
+    """
+    classpath = os.environ.get('SCALE_SIMULATION_CLASSPATH')
+    if classpath:
+        return classpath
+
+    output = subprocess.check_output(
+        ['sbt', '-Dsbt.log.noformat=true', 'export mesos-simulation/compile:fullClasspath'],
+        cwd=project_dir())
+    # the class path is the last line of the output
+    return output.decode('utf-8').strip().splitlines()[-1]
+
+
+class SimulatedMarathon(object):
+    """ A Marathon process with the simulated Mesos driver.
+
+        :param port: http port of Marathon
+        :type port: int
+        :param zk: ZooKeeper url without a path
+        :type zk: str
+        :param classpath: class path of the mesos-simulation project
+        :type classpath: str
+    """
+
+    def __init__(self, port=SIMULATION_PORT, zk=SIMULATION_ZK, classpath=None,
+                 java_opts=SIMULATION_JAVA_OPTS, args=SIMULATION_ARGS, log_file=SIMULATION_LOG):
+        self.port = port
+        self.zk = zk.rstrip('/')
+        self.classpath = classpath
+        self.java_opts = shlex.split(java_opts)
+        self.args = shlex.split(args)
+        self.log_file = log_file
+        self.zk_node = None
+        self._process = None
+        self._log = None
+
+    @property
+    def url(self):
+        return 'http://localhost:{}/'.format(self.port)
+
+    def command(self):
+        config = dict(MARATHON_CONFIG)
+        config['master'] = SIMULATED_MASTER
+        config['zk'] = '{}/{}'.format(self.zk, self.zk_node)
+        config['http_port'] = str(self.port)
+
+        command = ['java'] + self.java_opts + ['-classpath', self.classpath, MAIN_CLASS]
+        for key, value in sorted(config.items()):
+            command.extend(['--{}'.format(key), value])
+        return command + self.args
+
+    def start(self, timeout=STARTUP_TIMEOUT):
+        """ Starts Marathon with a new ZooKeeper node and waits until it has a leader.
+        """
+        if self.classpath is None:
+            self.classpath = simulation_classpath()
+
+        # a new node is a clean Marathon state
+        self.zk_node = 'scale-marathon-{}'.format(uuid.uuid4().hex[:8])
+        self._log = open(self.log_file, 'a')
+        self._process = subprocess.Popen(self.command(), cwd=project_dir(), stdout=self._log,
+                                         stderr=subprocess.STDOUT)
+        print('started simulated marathon pid {} on {} with zk node {}'.format(
+            self._process.pid, self.url, self.zk_node))
+        self.wait_for_leader(timeout)
+
+    def wait_for_leader(self, timeout=STARTUP_TIMEOUT):
+        end = time.time() + timeout
+        while time.time() < end:
+            if self._process.poll() is not None:
+                raise Exception('Simulated marathon exited with {}, see {}'.format(
+                    self._process.returncode, self.log_file))
+            try:
+                if requests.get(self.url + 'v2/leader', timeout=5).status_code == 200:
+                    return
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(1)
+
+        raise Exception('Simulated marathon did not elect a leader in {}s'.format(timeout))
+
+    def stop(self, timeout=30):
+        if self._process is None:
+            return
+
+        self._process.terminate()
+        try:
+            self._process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        self._log.close()
+        self._process = None
+
+    def restart(self):
+        """ Restarts Marathon with a clean state.
+        """
+        self.stop()
+        self.start()
+
+    @property
+    def running(self):
+        return self._process is not None and self._process.poll() is None
+
+
+# the simulated marathon of the test run
+simulated_marathon = None
+
+
+def start_simulation():
+    global simulated_marathon
+    if simulated_marathon is None:
+        simulated_marathon = SimulatedMarathon()
+        atexit.register(stop_simulation)
+    if not simulated_marathon.running:
+        simulated_marathon.start()
+    return simulated_marathon
+
+
+def stop_simulation():
+    if simulated_marathon is not None:
+        simulated_marathon.stop()
+
+
+def restart_simulation():
+    start_simulation().restart()
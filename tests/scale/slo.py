@@ -0,0 +1,374 @@
+"""
+    Service level conditions which stop the cap tests.
+"""
+import contextlib
+import csv
+import logging
+import os
+import requests
+import threading
+import time
+
+from latency import InstrumentedClient, LatencyRecorder
+from reads import ReadSampler
+from urllib.parse import urljoin
+from utils import system_module
+
+pooled_client = system_module('pooled_client')
+
+SLO_POST_APPS_P99 = os.environ.get('SCALE_SLO_POST_APPS_P99', '1000')
+SLO_GET_APPS_P99 = os.environ.get('SCALE_SLO_GET_APPS_P99', '5000')
+SLO_DEPLOY_PER_1000 = os.environ.get('SCALE_SLO_DEPLOY_PER_1000', '120')
+SLO_STEP_DEPLOY = os.environ.get('SCALE_SLO_STEP_DEPLOY', '600')
+# a single dropped ping, e.g. by adminrouter, does not make Marathon unusable
+SLO_PING_FAILURES = os.environ.get('SCALE_SLO_PING_FAILURES', '3')
+# stop at the first violation or keep growing until the crash point
+SLO_STOP = os.environ.get('SCALE_SLO_STOP', 'true').lower() in ['1', 'true', 'yes']
+# GET /v2/apps calls after every step for the read latency
+SLO_READ_SAMPLES = int(os.environ.get('SCALE_SLO_READ_SAMPLES', 5))
+
+PING_INTERVAL = 1.0
+PING_TIMEOUT = 5
+# seconds Marathon may take to answer a ping again after a failed step before the test fails
+RESPONSE_TIMEOUT = 60 * 2
+
+
+def slo_limit(value):
+    """ The limit of an `SCALE_SLO_*` variable, None if the condition is disabled.
+    """
+    if value is None or value.lower() in ['', 'off', 'none']:
+        return None
+    return float(value)
+
+
+class LatencyCondition(object):
+    """ The `percentile` of the latencies of `endpoint` in a step is above `limit` ms.
+        Steps without a call of the endpoint do not violate it.
+    """
+
+    def __init__(self, endpoint, limit, percentile=99):
+        self.endpoint = endpoint
+        self.limit = limit
+        self.percentile = percentile
+
+    def check(self, step):
+        histogram = step.latencies.histograms.get(self.endpoint)
+        if histogram is None or histogram.count == 0:
+            return None
+        latency = histogram.percentile(self.percentile)
+        if latency > self.limit:
+            return '{} p{} {}ms > {}ms'.format(self.endpoint, self.percentile, latency, self.limit)
+        return None
+
+
+class DeployTimeCondition(object):
+    """ The deployment time of a step per 1000 deployed instances is above `limit` seconds.
+        Steps of less than `min_instances` instances do not violate it, the deployment
+        time of a few instances is dominated by its fixed cost.
+    """
+
+    def __init__(self, limit, min_instances=1000):
+        self.limit = limit
+        self.min_instances = min_instances
+
+    def check(self, step):
+        if step.instances is None or step.instances < self.min_instances:
+            return None
+        deploy_time = step.deploy_time_per_1000
+        if deploy_time is not None and deploy_time > self.limit:
+            return 'deploy time {}s per 1000 instances > {}s'.format(deploy_time, self.limit)
+        return None
+
+
+class StepDeployTimeCondition(object):
+    """ The deployment time of a step is above `limit` seconds.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+
+    def check(self, step):
+        if step.deploy_time is not None and step.deploy_time > self.limit:
+            return 'deploy time {}s of the step > {}s'.format(step.deploy_time, self.limit)
+        return None
+
+
+class PingCondition(object):
+    """ More than `limit` `/ping` requests to the leader failed during a step.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+
+    def check(self, step):
+        if step.ping_failures > self.limit:
+            return '{} of {} leader pings failed'.format(step.ping_failures, step.pings)
+        return None
+
+
+def default_conditions():
+    """ The conditions configured with the `SCALE_SLO_*` environment variables.
+    """
+    conditions = []
+    post_apps = slo_limit(SLO_POST_APPS_P99)
+    if post_apps is not None:
+        conditions.append(LatencyCondition('POST /v2/apps', post_apps))
+    get_apps = slo_limit(SLO_GET_APPS_P99)
+    if get_apps is not None:
+        conditions.append(LatencyCondition('GET /v2/apps', get_apps))
+    deploy_time = slo_limit(SLO_DEPLOY_PER_1000)
+    if deploy_time is not None:
+        conditions.append(DeployTimeCondition(deploy_time))
+    step_deploy_time = slo_limit(SLO_STEP_DEPLOY)
+    if step_deploy_time is not None:
+        conditions.append(StepDeployTimeCondition(step_deploy_time))
+    ping_failures = slo_limit(SLO_PING_FAILURES)
+    if ping_failures is not None:
+        conditions.append(PingCondition(ping_failures))
+    return conditions
+
+
+class LeaderPing(object):
+    """ GETs `/ping` of the Marathon leader every `interval` seconds from a daemon
+        thread and counts the failed requests.
+    """
+
+    def __init__(self, base_url, headers, interval=PING_INTERVAL):
+        self.url = urljoin(base_url, 'ping')
+        self.headers = headers
+        self.interval = interval
+        self.verify = pooled_client.ssl_verify()
+        self.pings = 0
+        self.failures = 0
+        self._logger = logging.getLogger(self.__class__.__module__)
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name='leader-ping', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._stopped.set()
+        self._thread.join(PING_TIMEOUT * 2)
+
+    def _run(self):
+        session = requests.Session()
+        while not self._stopped.is_set():
+            self.pings = self.pings + 1
+            if not self.ping(session):
+                self.failures = self.failures + 1
+            self._stopped.wait(self.interval)
+
+    def ping(self, session=requests):
+        """ True if the leader answered `/ping`.
+        """
+        try:
+            response = session.get(self.url, headers=self.headers, timeout=PING_TIMEOUT, verify=self.verify)
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            self._logger.debug('Leader ping failed: %s', e)
+            return False
+
+    def wait_responding(self, timeout=RESPONSE_TIMEOUT):
+        """ Pings the leader until it answers or `timeout` seconds passed and returns
+            whether it answered.
+        """
+        deadline = time.time() + timeout
+        while not self.ping():
+            if time.time() >= deadline:
+                return False
+            time.sleep(self.interval)
+        return True
+
+
+class CapacityStep(object):
+    """ The measurements of one step of a cap test.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.instances = None
+        self.deploy_time = None
+        self.latencies = LatencyRecorder()
+        self.reads = []
+        self.pings = 0
+        self.ping_failures = 0
+        self.violations = []
+        self.error = None
+
+    @property
+    def deploy_time_per_1000(self):
+        if not self.instances or self.deploy_time is None:
+            return None
+        return round(self.deploy_time / self.instances * 1000, 3)
+
+    def __repr__(self):
+        return 'step: {} deploy time: {}s instances: {} pings failed: {}/{}{}{}'.format(
+            self.size,
+            self.deploy_time,
+            self.instances,
+            self.ping_failures,
+            self.pings,
+            ''.join(' violated: {}'.format(violation) for violation in self.violations),
+            '' if self.error is None else ' failed: {}'.format(self.error))
+
+
+class UsableCapacity(object):
+    """ The usable capacity and the crash point of a cap test.  The usable capacity is
+        the size of the last step before the first violation, the crash point the size
+        of the first step which failed.  Both are None if no step reached them.
+    """
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    @property
+    def usable(self):
+        usable = None
+        for step in self.steps:
+            if step.violations or step.error is not None:
+                break
+            usable = step.size
+        return usable
+
+    @property
+    def crash(self):
+        return next((step.size for step in self.steps if step.error is not None), None)
+
+    @property
+    def violations(self):
+        return next((step.violations for step in self.steps if step.violations), [])
+
+    def __str__(self):
+        return 'usable capacity: {} crash point: {} steps: {}{}'.format(
+            self.usable,
+            self.crash,
+            len(self.steps),
+            ''.join(' violated: {}'.format(violation) for violation in self.violations))
+
+
+class SloMonitor(object):
+    """ Measures the steps of a cap test and evaluates the conditions after each step.
+
+        :param client: the Marathon client of the test
+        :type client: dcos.marathon.Client
+        :param base_url: url of Marathon for the leader pings
+        :type base_url: str
+        :param headers: headers of the leader pings
+        :type headers: dict
+        :param conditions: the stop conditions, by default `default_conditions()`
+        :type conditions: list
+        :param stop: stop at the first violation instead of the crash point
+        :type stop: bool
+        :param reads: (endpoint, path) of the reads whose latency and size are sampled
+                      after every step
+        :type reads: list
+        :param response_timeout: seconds Marathon may take to answer a ping after a
+                                 failed step
+        :type response_timeout: float
+    """
+
+    def __init__(self, client, base_url, headers=None, conditions=None, stop=SLO_STOP,
+                 read_samples=SLO_READ_SAMPLES, reads=None, response_timeout=RESPONSE_TIMEOUT):
+        self.client = client
+        self.base_url = base_url
+        self.headers = headers
+        self.conditions = default_conditions() if conditions is None else conditions
+        self.stop = stop
+        self.read_samples = read_samples
+        self.reads = reads or []
+        self.response_timeout = response_timeout
+        self.sampler = ReadSampler(base_url, headers)
+        self.steps = []
+
+    @contextlib.contextmanager
+    def step(self, size, instances=None, reads=None):
+        """ Measures the deployment of a step in the context.  The context gets a
+            client whose calls are timed in the step.  An exception in the context
+            is the crash point and is not raised, the test stops when `stopped`.
+            It fails if Marathon does not answer a ping within `response_timeout`
+            seconds after the crash point or does not serve the reads of a step.
+
+            :param size: the size reached by the step, e.g. the number of apps
+            :type size: int
+            :param instances: the number of instances deployed by the step
+            :type instances: int
+            :param reads: (endpoint, path) of the reads sampled after the step in
+                          addition to the reads of the monitor
+            :type reads: list
+        """
+        step = CapacityStep(size)
+        step.instances = instances
+        self.steps.append(step)
+        client = InstrumentedClient(self.client, step.latencies)
+        with LeaderPing(self.base_url, self.headers) as ping:
+            start = time.time()
+            try:
+                yield client
+                step.deploy_time = round(time.time() - start, 3)
+            except Exception as e:
+                step.error = e
+            if step.error is None:
+                for _ in range(self.read_samples):
+                    client.get_apps()
+                self._sample_reads(step, self.reads + (reads or []))
+        step.pings = ping.pings
+        step.ping_failures = ping.failures
+
+        if step.error is None:
+            step.violations = [violation for violation in
+                               (condition.check(step) for condition in self.conditions) if violation is not None]
+        print(step)
+        if step.error is not None and not ping.wait_responding(self.response_timeout):
+            raise Exception('Marathon stopped responding after the crash point {}: {}'.format(step.size, step.error))
+
+    def _sample_reads(self, step, reads):
+        for endpoint, path in reads:
+            sample = self.sampler.sample(endpoint, path)
+            step.reads.append(sample)
+            if sample.success:
+                step.latencies.record(endpoint, sample.latency)
+
+    @property
+    def stopped(self):
+        """ True if the last step failed or, with `stop`, violated a condition.
+        """
+        if not self.steps:
+            return False
+        step = self.steps[-1]
+        return step.error is not None or (self.stop and bool(step.violations))
+
+    def result(self):
+        return UsableCapacity(list(self.steps))
+
+
+def write_slo_csv(result, filename='cap-slo.csv'):
+    """ Writes a row per step of a cap test with the measurements of the conditions.
+    """
+    with open(filename, 'w') as f:
+        w = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        w.writerow(['size', 'instances', 'deploy_time', 'deploy_time_per_1000', 'post_apps_p99', 'get_apps_p99',
+                    'pings', 'ping_failures', 'violations', 'error'])
+        for step in result.steps:
+            latencies = step.latencies.summary()
+            w.writerow([step.size, step.instances, step.deploy_time, step.deploy_time_per_1000,
+                        latencies.get('POST /v2/apps', {}).get('p99'), latencies.get('GET /v2/apps', {}).get('p99'),
+                        step.pings, step.ping_failures, '; '.join(step.violations),
+                        '' if step.error is None else str(step.error)])
+
+
+def write_step_latencies_csv(result, filename):
+    """ Writes a row per step of a cap test and endpoint called in the step with the
+        latencies in ms and the mean response size of the sampled reads in bytes.
+    """
+    with open(filename, 'w') as f:
+        w = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        w.writerow(['size', 'deploy_time', 'endpoint', 'count', 'mean', 'p50', 'p99', 'max', 'bytes'])
+        for step in result.steps:
+            for endpoint, summary in sorted(step.latencies.summary().items()):
+                sizes = [sample.size for sample in step.reads if sample.endpoint == endpoint and sample.success]
+                w.writerow([step.size, step.deploy_time, endpoint, summary['count'], summary['mean'], summary['p50'],
+                            summary['p99'], summary['max'], round(sum(sizes) / len(sizes)) if sizes else ''])
@@ -1,10 +1,15 @@
-from common import app, available_resources, get_cluster_metadata, ensure_mom_version
+from batch_sweep import BatchSweep, write_sweep_csv
+from capacity import CapacitySearch, write_capacity_csv
+from common import app, available_resources, delete_all_apps_wait, get_cluster_metadata, ensure_mom_version
+from connection import marathon_headers, marathon_service_url
 from datetime import timedelta
 from dcos import marathon
 import itertools
 import logging
 import math
+from reads import log_read_growth, read_costs, read_endpoints, write_read_cost_csv
 import shakedown
+from slo import SLO_STOP, SloMonitor, write_slo_csv, write_step_latencies_csv
 from utils import marathon_on_marathon
 
 
@@ -68,6 +73,21 @@ def exponential_decay(start=1000, decay=0.5):
     return inner
 
 
+def galloping_step_function(start=1000, factor=2):
+    """
+    Curried step function that multiplies the size by `factor` with every step.
+
+    With default parameters we have:
+    1:1000, 2:2000, 3:4000, 4:8000, 5:16000
+
+    :start First size.
+    :factor Growth of the size per step.
+    """
+    def inner(step):
+        return start * factor ** (step - 1)
+    return inner
+
+
 def incremental_steps(step_func):
     """
     Generator that yields new instances size in steps until eternity.
@@ -80,58 +100,129 @@ def incremental_steps(step_func):
         yield step_func(current_step)
 
 
+def slo_monitor(client, reads=None, stop=SLO_STOP):
+    """
+    Monitor of the stop conditions of a cap test, see slo.py. Tests which
+    record a curve pass stop=False to measure up to the crash point, the usable
+    capacity is reported all the same.
+    """
+    return SloMonitor(client, marathon_service_url(), marathon_headers(), reads=reads, stop=stop)
+
+
+def report_capacity(monitor, name):
+    result = monitor.result()
+    shakedown.echo(str(result))
+    write_slo_csv(result, 'cap-slo-{}.csv'.format(name))
+
+
+def report_read_cost(monitor, name):
+    """
+    Writes the read cost per app of every step and prints how the reads grow
+    with the number of apps, see reads.py.
+    """
+    costs = read_costs(monitor.result().steps)
+    shakedown.echo("Read cost growth with the number of apps:")
+    log_read_growth(costs)
+    write_read_cost_csv(costs, 'cap-reads-{}.csv'.format(name))
+
+
 def test_incremental_scale():
     """
-    Scale instances of app in steps until the first error, e.g. a timeout, is
-    reached.
+    Scale instances of app in steps until a stop condition is violated or the
+    first error, e.g. a timeout, is reached.
     """
 
     client = marathon.create_client()
     client.add_app(app_def("cap-app"))
+    monitor = slo_monitor(client)
 
-    for new_size in incremental_steps(linear_step_function(step_size=1000)):
+    step_size = 1000
+    for new_size in incremental_steps(linear_step_function(step_size=step_size)):
         shakedown.echo("Scaling to {}".format(new_size))
         shakedown.deployment_wait(
             app_id='cap-app', timeout=timedelta(minutes=10).total_seconds())
 
-        client.scale_app('/cap-app', new_size)
+        with monitor.step(new_size, instances=step_size) as step_client:
+            step_client.scale_app('/cap-app', new_size)
+            shakedown.deployment_wait(
+                app_id='cap-app', timeout=timedelta(minutes=10).total_seconds())
+        if monitor.stopped:
+            break
+        shakedown.echo("done.")
+
+    report_capacity(monitor, 'instances')
+
+
+def test_incremental_scale_search():
+    """
+    Search the maximal number of instances of an app. The size doubles until a
+    deployment fails and is then bisected between the last good and the first bad
+    size. Every probe deploys the app from a clean Marathon.
+    """
+
+    client = marathon.create_client()
+
+    def probe(size):
+        app_definition = app_def("cap-app")
+        app_definition['instances'] = size
+        shakedown.echo("Probing {}".format(size))
+        client.add_app(app_definition)
         shakedown.deployment_wait(
             app_id='cap-app', timeout=timedelta(minutes=10).total_seconds())
-        shakedown.echo("done.")
+
+    search = CapacitySearch(probe, delete_all_apps_wait)
+    result = search.run(incremental_steps(galloping_step_function(start=1000)))
+    delete_all_apps_wait()
+
+    shakedown.echo(str(result))
+    write_capacity_csv(result)
 
 
 def test_incremental_app_scale():
     """
-    Scale number of app in steps until the first error, e.g. a timeout, is
-    reached. The apps are created in root group.
+    Scale number of app in steps until a stop condition is violated or the
+    first error, e.g. a timeout, is reached. The apps are created in root group.
+    The latency and size of the read API are sampled at every step up to the
+    crash point.
     """
 
     client = marathon.create_client()
     client.remove_group('/')
+    monitor = slo_monitor(client, reads=read_endpoints(), stop=False)
 
     for step in itertools.count(start=1):
         shakedown.echo("Add new apps")
 
         app_id = "app-{0:0>4}".format(step)
-        client.add_app(app_def(app_id))
+        with monitor.step(step, instances=1) as step_client:
+            step_client.add_app(app_def(app_id))
 
-        shakedown.deployment_wait(
-                timeout=timedelta(minutes=15).total_seconds())
+            shakedown.deployment_wait(
+                    timeout=timedelta(minutes=15).total_seconds())
+        if monitor.stopped:
+            break
 
         shakedown.echo("done.")
 
+    report_capacity(monitor, 'apps')
+    report_read_cost(monitor, 'apps')
+
 
 def test_incremental_apps_per_group_scale():
     """
     Try to reach the maximum number of apps. We start with batches of apps in a
-    group and decay the batch size.
+    group and decay the batch size. The latency and size of the read API are
+    sampled at every step up to the crash point.
     """
 
     client = marathon.create_client()
+    monitor = slo_monitor(client, reads=read_endpoints(), stop=False)
 
     batch_size_for = exponential_decay(start=500, decay=0.3)
+    total = 0
     for step in itertools.count(start=0):
         batch_size = batch_size_for(step)
+        total += batch_size
         shakedown.echo("Add {} apps".format(batch_size))
 
         group_id = "/batch-{0:0>3}".format(step)
@@ -143,12 +234,18 @@ def test_incremental_apps_per_group_scale():
             "id": group_id
         }
 
-        client.create_group(next_batch)
-        shakedown.deployment_wait(
-                timeout=timedelta(minutes=15).total_seconds())
+        with monitor.step(total, instances=batch_size) as step_client:
+            step_client.create_group(next_batch)
+            shakedown.deployment_wait(
+                    timeout=timedelta(minutes=15).total_seconds())
+        if monitor.stopped:
+            break
 
         shakedown.echo("done.")
 
+    report_capacity(monitor, 'apps-per-group')
+    report_read_cost(monitor, 'apps-per-group')
+
 
 def test_incremental_groups_scale():
     """
@@ -156,6 +253,7 @@ def test_incremental_groups_scale():
     """
 
     client = marathon.create_client()
+    monitor = slo_monitor(client)
 
     batch_size_for = exponential_decay(start=40, decay=0.01)
     total = 0
@@ -171,20 +269,71 @@ def test_incremental_groups_scale():
 
         # There is no app id. We simply PUT /v2/apps to create groups in
         # batches.
-        client.update_app('', app_definitions)
+        with monitor.step(total, instances=batch_size) as step_client:
+            step_client.update_app('', app_definitions)
+            shakedown.deployment_wait(
+                    timeout=timedelta(minutes=15).total_seconds())
+        if monitor.stopped:
+            break
+
+        shakedown.echo("done.")
+
+    report_capacity(monitor, 'groups')
+
+
+def group_app_defs(prefix, first, count):
+    """
+    Definitions of `count` apps, each in its own group below `prefix`, starting
+    with the group number `first`.
+    """
+    return [app_def("{}/group-{:0>5}/app-1".format(prefix, first + i)) for i in range(count)]
+
+
+def test_groups_batch_sweep():
+    """
+    Sweep the batch size of the creation of groups with PUT /v2/apps at several
+    numbers of existing groups and recommend the batch size with the highest
+    throughput, see batch_sweep.py.
+    """
+
+    client = marathon.create_client()
+
+    def wait():
         shakedown.deployment_wait(
                 timeout=timedelta(minutes=15).total_seconds())
 
-        shakedown.echo("done.")
+    def prepare(state):
+        delete_all_apps_wait()
+        for first in range(0, state, 1000):
+            client.update_app('', group_app_defs('', first, min(1000, state - first)))
+            wait()
+
+    def create(first, count):
+        client.update_app('', group_app_defs('/sweep', first, count))
+
+    def cleanup():
+        client.remove_group('/sweep', True)
+        wait()
+
+    result = BatchSweep(prepare, create, wait, cleanup).run()
+    delete_all_apps_wait()
+
+    shakedown.echo("Throughput optimal batch sizes:")
+    result.log()
+    write_sweep_csv(result)
 
 
 def test_incremental_group_nesting():
     """
     Scale depth of nested groups. Again we grow fast at the beginning and then
-    slow the growth.
+    slow the growth. The latency of the creation, of GET /v2/groups and of the
+    nested group, the size of their responses and the deployment time are recorded
+    for every depth in cap-nesting.csv. The curve is recorded up to the crash
+    point, past the usable depth.
     """
 
     client = marathon.create_client()
+    monitor = slo_monitor(client, stop=False)
 
     batch_size_for = exponential_decay(start=5, decay=0.1)
     depth = 0
@@ -199,8 +348,16 @@ def test_incremental_group_nesting():
         # Note: We always deploy into the same nested groups.
         app_id = '/{0}/app-1'.format(nested_groups)
 
-        client.add_app(app_def(app_id))
-        shakedown.deployment_wait(
-                timeout=timedelta(minutes=15).total_seconds())
+        reads = [('GET /v2/groups', 'v2/groups'),
+                 ('GET /v2/groups/{id}', 'v2/groups/{}'.format(nested_groups))]
+        with monitor.step(depth, instances=1, reads=reads) as step_client:
+            step_client.add_app(app_def(app_id))
+            shakedown.deployment_wait(
+                    timeout=timedelta(minutes=15).total_seconds())
+        if monitor.stopped:
+            break
 
         shakedown.echo("done.")
+
+    report_capacity(monitor, 'nesting')
+    write_step_latencies_csv(monitor.result(), 'cap-nesting.csv')
@@ -1,6 +1,13 @@
 from utils import *
 from common import *
+from backoff import write_backoff_csv
 from graph import create_scale_graph
+from journal import DEFAULT_JOURNAL, RESULT, open_journal
+from latency import write_latency_csv
+from marathon_metrics import write_metrics_csv
+from progress import start_progress_server, stop_progress_server, watch_progress
+from simulation import SIMULATION, start_simulation, stop_simulation
+from timeseries import write_timeseries_csv, write_undeploy_csv
 
 import pytest
 
@@ -16,7 +23,17 @@ import os
 
 type_test_failed = {}
 
-test_log = []
+# results of the tests are journaled and not kept in memory
+# SCALE_RESUME=<run id> or `last` continues an interrupted run
+journal = open_journal(os.environ.get('SCALE_JOURNAL', DEFAULT_JOURNAL), os.environ.get('SCALE_RESUME'))
+
+# results of the tests completed before the run was resumed by test name
+completed_tests = {}
+
+# rows of scale-test.csv
+STAT_KEYS = ['target', 'max', 'deploy_time', 'human_deploy_time', 'launch_status', 'deployment_status', 'errors',
+             'launch_rate', 'undeploy_time', 'undeploy_rate', 'undeploy_errors']
+
 ##############
 # Test Section
 ##############
@@ -81,6 +98,28 @@ def test_group_scale(num_apps, num_instances):
     log_current_test(current_test)
 
 
+@pytest.mark.skipif(not OPEN_LOOP, reason='the open loop ladder runs with SCALE_OPEN_LOOP=true')
+@pytest.mark.parametrize("num_apps, arrival_rate", [
+  (1, 1),
+  (10, 1),
+  (100, 5),
+  (500, 10),
+  (1000, 10),
+  (5000, 25),
+  (10000, 50),
+  (25000, 50),
+  (50000, 100)
+])
+def test_open_loop_scale(num_apps, arrival_rate):
+    """ Runs scale test on `num_apps` with 1 instance each launched at `arrival_rate` apps per second.
+    """
+
+    current_test = initalize_test('root', 'apps', 'openloop', num_apps, 1)
+    current_test.arrival_rate = arrival_rate
+    open_loop_test_app(current_test)
+    log_current_test(current_test)
+
+
 ##############
 # End Test Section
 ##############
@@ -89,7 +128,11 @@ def test_group_scale(num_apps, num_instances):
 def initalize_test(marathon_name='root', under_test='apps', style='instances', num_apps=1, num_instances=1):
 
     current_test = create_test_object(marathon_name, under_test, style, num_apps, num_instances)
-    test_log.append(current_test)
+    if current_test.name in completed_tests:
+        pytest.skip('completed before the run was resumed: {}'.format(completed_tests[current_test.name]['status']))
+
+    current_test.journal = journal
+    watch_progress(current_test)
     need = scaletest_resources(current_test)
 
     # if need >= (private_resources_available()):
@@ -100,6 +143,7 @@ def initalize_test(marathon_name='root', under_test='apps', style='instances', n
         current_test.skip(SKIP_PREVIOUS_TEST_FAILED)
 
     if current_test.skipped:
+        journal_result(current_test)
         pytest.skip()
 
     return current_test
@@ -108,6 +152,9 @@ def initalize_test(marathon_name='root', under_test='apps', style='instances', n
 def has_enough_resources(need):
     """ this is temporary until shakedown PR 121 is merged
     """
+    if is_local_marathon():
+        return True
+
     available = private_resources_available()
     return need.cpus <= available.cpus and need.mem <= available.mem
 
@@ -116,17 +163,43 @@ def previous_style_test_failed(current_test):
     return type_test_failed.get(get_test_style_key_base(current_test), False)
 
 
+def restore_checkpoint():
+    """ Restores the completed tests and the failed test styles of a resumed run.
+        Skipped tests are evaluated again, which skips them again if their style
+        failed or if there are still not enough resources.
+    """
+    for name, result in journal.results().items():
+        if "failed" in result['status']:
+            type_test_failed[get_style_key_base(result['mom'], result['style'])] = True
+        if result['status'] != 'skipped':
+            completed_tests[name] = result
+
+    if completed_tests:
+        print('resuming after {} completed tests'.format(len(completed_tests)))
+
+
 def setup_module(module):
+    if SIMULATION:
+        start_simulation()
+    start_progress_server()
     delete_all_apps_wait()
+    restore_checkpoint()
+    journal.start_run(marathon='root', completed=len(completed_tests))
     print(get_cluster_metadata())
     print('testing root marathon')
-    print("private resources: {}".format(private_resources_available()))
+    if not is_local_marathon():
+        print("private resources: {}".format(private_resources_available()))
 
 
 def teardown_module(module):
     stats = collect_stats()
     write_csv(stats)
     read_csv()
+    write_latency_csv(journal)
+    write_timeseries_csv(journal)
+    write_undeploy_csv(journal)
+    write_backoff_csv(journal)
+    write_metrics_csv(journal)
     metadata = get_cluster_metadata()
     write_meta_data(metadata)
     create_scale_graph(stats, metadata)
@@ -135,6 +208,10 @@ def teardown_module(module):
     except Exception:
         pass
 
+    if SIMULATION:
+        stop_simulation()
+    stop_progress_server()
+
 
 def log_current_test(current_test):
     if "failed" in current_test.status:
@@ -143,55 +220,55 @@ def log_current_test(current_test):
     print(current_test)
     current_test.log_events()
     current_test.log_stats()
+    current_test.log_latencies()
     print('')
+    journal_result(current_test)
 
 
-def collect_stats():
-    stats = empty_stats()
-
-    for scale_test in test_log:
-        print(scale_test)
-        scale_test.log_events()
-        scale_test.log_stats()
-        print('')
-
-        key = get_test_key(scale_test, 'target')
-        stats.get(key).append(scale_test.target)
-
-        key = get_test_key(scale_test, 'max')
-        stats.get(key).append(scale_test.deploy_results.current_scale)
-
-        key = get_test_key(scale_test, 'deploy_time')
-        stats.get(key).append(scale_test.test_time)
+def journal_result(scale_test):
+    """ Journals the outcome of a test with the values of its scale-test.csv rows.
+    """
+    scale_test.journal_summaries()
+    journal.append(
+        RESULT,
+        scale_test.name,
+        mom=scale_test.mom,
+        style=scale_test.style,
+        status=scale_test.status,
+        target=scale_test.target,
+        max=scale_test.deploy_results.current_scale,
+        deploy_time=scale_test.test_time,
+        human_deploy_time=pretty_duration_safe(scale_test.test_time),
+        launch_status=pass_status(scale_test, scale_test.launch_results.success),
+        deployment_status=pass_status(scale_test, scale_test.deploy_results.success),
+        errors=scale_test.error_count,
+        launch_rate=scale_test.launch_results.request_rate,
+        payload_bytes=scale_test.launch_results.payload_bytes,
+        undeploy_time=scale_test.undeploy_results.undeploy_time,
+        undeploy_rate=scale_test.undeploy_results.kill_rate,
+        undeploy_errors=scale_test.undeploy_results.errors)
 
-        key = get_test_key(scale_test, 'human_deploy_time')
-        stats.get(key).append(pretty_duration_safe(scale_test.test_time))
 
-        key = get_test_key(scale_test, 'launch_status')
-        stats.get(key).append(pass_status(scale_test, scale_test.launch_results.success))
+def collect_stats():
+    """ Collects the stats of all tests of this run from the journal.
+    """
+    stats = empty_stats()
 
-        key = get_test_key(scale_test, 'deployment_status')
-        stats.get(key).append(pass_status(scale_test, scale_test.deploy_results.success))
+    for result in journal.results().values():
+        print("test: {} status: {} time: {} errors: {}".format(
+            result['test'],
+            result['status'],
+            result['human_deploy_time'],
+            result['errors']))
 
-        key = get_test_key(scale_test, 'errors')
-        stats.get(key).append(total_errors(scale_test.events))
+        for stat_key in STAT_KEYS:
+            key = get_key(result['mom'], result['style'], stat_key)
+            # results journaled before a stat existed have no value for it
+            stats.get(key).append(result.get(stat_key))
 
     return stats
 
 
-def total_errors(events):
-    error_events = [event for event in events if is_error(event)]
-    return len(error_events)
-
-
-def is_error(event):
-    # strip 'event: header'
-    message = event[len(EVENT_HEADER) + 1:]
-    # take the event message if any
-    event_header = message[:message.find(':') + 1]
-    return event_header in ERRORS
-
-
 def pass_status(test, successful):
     if test.skipped:
         return 's'
@@ -212,6 +289,7 @@ def write_csv(stats, filename='scale-test.csv'):
         write_stat_lines(f, w, stats, 'root', 'instances')
         write_stat_lines(f, w, stats, 'root', 'count')
         write_stat_lines(f, w, stats, 'root', 'group')
+        write_stat_lines(f, w, stats, 'root', 'openloop')
 
 
 def write_stat_lines(f, w, stats, marathon_name, test_type):
@@ -223,8 +301,8 @@ def write_stat_lines(f, w, stats, marathon_name, test_type):
         w.writerow(stats[get_key(marathon_name, test_type, 'launch_status')])
         w.writerow(stats[get_key(marathon_name, test_type, 'deployment_status')])
         w.writerow(stats[get_key(marathon_name, test_type, 'errors')])
+        w.writerow(stats[get_key(marathon_name, test_type, 'launch_rate')])
+        w.writerow(stats[get_key(marathon_name, test_type, 'undeploy_time')])
+        w.writerow(stats[get_key(marathon_name, test_type, 'undeploy_rate')])
+        w.writerow(stats[get_key(marathon_name, test_type, 'undeploy_errors')])
         f.write('\n')
-
-
-def get_current_test():
-    return test_log[-1]
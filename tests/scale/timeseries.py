@@ -0,0 +1,66 @@
+"""
+    Samples of a deployment stored column wise.
+"""
+import csv
+
+from array import array
+from journal import SAMPLES, UNDEPLOY
+
+# used for values which could not be sampled
+MISSING = -1
+
+
+class ScaleTimeSeries(object):
+    """ Samples of time, running tasks, queued tasks and active deployments.
+    """
+
+    COLUMNS = ['time', 'running', 'queued', 'deployments']
+
+    def __init__(self):
+        self.timestamps = array('d')
+        self.running = array('l')
+        self.queued = array('l')
+        self.deployments = array('l')
+
+    def append(self, timestamp, running, queued=None, deployments=None):
+        self.timestamps.append(timestamp)
+        self.running.append(running)
+        self.queued.append(MISSING if queued is None else queued)
+        self.deployments.append(MISSING if deployments is None else deployments)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def rows(self, start=0.0):
+        """ Yields the samples as tuples with the time relative to `start`.
+        """
+        for index in range(len(self)):
+            yield (round(self.timestamps[index] - start, 3),
+                   self.running[index],
+                   self.queued[index],
+                   self.deployments[index])
+
+
+def write_timeseries_csv(journal, filename='scale-timeseries.csv'):
+    """ Writes the journaled deployment samples of all tests.  The time is in seconds
+        since the start of the test.
+    """
+    with open(filename, 'w') as f:
+        w = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        w.writerow(['test'] + ScaleTimeSeries.COLUMNS)
+        for record in journal.records(SAMPLES):
+            for row in record['samples']:
+                w.writerow([record['test']] + list(row))
+
+
+def write_undeploy_csv(journal, filename='scale-undeploy.csv'):
+    """ Writes the killed tasks per second of the journaled undeployments of all tests.
+        The time is in seconds since the start of the undeployment, undeployments
+        without killed tasks (see teardown.py) are left out.
+    """
+    with open(filename, 'w') as f:
+        w = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        w.writerow(['test', 'time', 'killed'])
+        for record in journal.records(UNDEPLOY):
+            for second, killed in record.get('kill_rates') or []:
+                w.writerow([record['test'], second, killed])
@@ -1,8 +1,10 @@
 import contextlib
+import importlib
 import json
 import os
 import re
 import subprocess
+import sys
 from six.moves import urllib
 from dcos import http, util, config
 from shakedown import run_command_on_master
@@ -13,6 +15,15 @@ def file_dir():
     return os.path.dirname(os.path.realpath(__file__))
 
 
+def system_module(name):
+    """ Imports a module shared with the system integration tests by name.
+    """
+    system_dir = os.path.join(file_dir(), '..', 'system')
+    if system_dir not in sys.path:
+        sys.path.append(system_dir)
+    return importlib.import_module(name)
+
+
 # should be in shakedown
 def get_resource(resource):
     """
@@ -10,11 +10,13 @@ import sys
 import retrying
 
 from datetime import timedelta
-from dcos import http, mesos
+from dcos import config, http, mesos
 from dcos.errors import DCOSException, DCOSHTTPException
 from distutils.version import LooseVersion
 from json.decoder import JSONDecodeError
-from shakedown import marathon
+from json_stream import stream_records
+from pooled_client import shared_client
+from teardown import Teardown, app_removals, pod_removals
 from urllib.parse import urljoin
 
 
@@ -112,14 +114,14 @@ def cluster_info(mom_name='marathon-user'):
     print("DC/OS: {}, in {} mode".format(shakedown.dcos_version(), shakedown.ee_version()))
     agents = shakedown.get_private_agents()
     print("Agents: {}".format(len(agents)))
-    client = marathon.create_client()
+    client = marathon_client()
     about = client.get_about()
     print("Marathon version: {}".format(about.get("version")))
 
     if shakedown.service_available_predicate(mom_name):
         with shakedown.marathon_on_marathon(mom_name):
             try:
-                client = marathon.create_client()
+                client = marathon_client()
                 about = client.get_about()
                 print("Marathon MoM version: {}".format(about.get("version")))
             except Exception:
@@ -128,18 +130,39 @@ def cluster_info(mom_name='marathon-user'):
         print("Marathon MoM not present")
 
 
+def removable_app_ids():
+    # only the ids of the apps are kept while the listing is decoded
+    app_ids = [app['id'] for app in stream_records(marathon_url('v2/apps'), 'apps')]
+    if '/marathon-user' in app_ids:
+        print('WARNING: not removing marathon-user, because it is special')
+        app_ids.remove('/marathon-user')
+    return app_ids
+
+
+def create_teardown():
+    """Returns a teardown of the configured marathon which removes apps and pods
+       concurrently, see teardown.py.
+    """
+    return Teardown(marathon_client(), marathon_url(''), acs_headers())
+
+
+def raise_teardown_errors(stats):
+    """Raises the first failed removal of a teardown, as the removal one at a time did.
+       The other removals are attempted before and their errors are printed.
+    """
+    for removal_id, error in stats.errors:
+        print('Removing {} failed: {}'.format(removal_id, error))
+    if stats.errors:
+        raise stats.errors[0][1]
+
+
 def delete_all_apps():
-    client = marathon.create_client()
-    apps = client.get_apps()
-    for app in apps:
-        if app['id'] == '/marathon-user':
-            print('WARNING: not removing marathon-user, because it is special')
-        else:
-            client.remove_app(app['id'], True)
+    stats = create_teardown().remove(app_removals(marathon_client(), removable_app_ids()))
+    raise_teardown_errors(stats)
 
 
 def stop_all_deployments(noisy=False):
-    client = marathon.create_client()
+    client = marathon_client()
     deployments = client.get_deployments()
     for deployment in deployments:
         try:
@@ -150,12 +173,14 @@ def stop_all_deployments(noisy=False):
 
 
 def delete_all_apps_wait():
-    delete_all_apps()
-    shakedown.deployment_wait(timedelta(minutes=5).total_seconds())
+    removals = app_removals(marathon_client(), removable_app_ids())
+    stats = create_teardown().run(removals, timedelta(minutes=5).total_seconds())
+    print(stats)
+    raise_teardown_errors(stats)
 
 
 def delete_all_groups():
-    client = marathon.create_client()
+    client = marathon_client()
     groups = client.get_groups()
     for group in groups:
         client.remove_group(group["id"])
@@ -273,11 +298,10 @@ def wait_for_task(service, task, timeout_sec=120):
 
 def clear_pods():
     try:
-        client = marathon.create_client()
-        pods = client.list_pod()
-        for pod in pods:
-            client.remove_pod(pod["id"], True)
-        shakedown.deployment_wait()
+        client = marathon_client()
+        pod_ids = [pod["id"] for pod in client.list_pod()]
+        # the default timeout of shakedown.deployment_wait
+        print(create_teardown().run(pod_removals(client, pod_ids), timedelta(minutes=2).total_seconds()))
     except Exception:
         pass
 
@@ -294,7 +318,7 @@ def get_pod_tasks(pod_id):
 
 
 def marathon_version():
-    client = marathon.create_client()
+    client = marathon_client()
     about = client.get_about()
     # 1.3.9 or 1.4.0-RC8
     return LooseVersion(about.get("version"))
@@ -654,6 +678,27 @@ def get_marathon_endpoint(path, marathon_name='marathon'):
     return shakedown.dcos_url_path('service/{}/{}'.format(marathon_name, path))
 
 
+def marathon_url(path):
+    """Returns the url of path of the marathon the dcos client is configured for,
+       which is the root marathon unless in `marathon_on_marathon`.
+    """
+    base_url = config.get_config_val('marathon.url', config.get_config()) or \
+        shakedown.dcos_service_url('marathon')
+    return urljoin(base_url.rstrip('/') + '/', path)
+
+
+def acs_headers():
+    token = shakedown.dcos_acs_token()
+    return {} if token is None else {'Authorization': 'token={}'.format(token)}
+
+
+def marathon_client():
+    """Returns the shared client of the marathon the dcos client is configured for.
+       Its connections are kept alive and reused, see pooled_client.py.
+    """
+    return shared_client(marathon_url(''), acs_headers)
+
+
 def http_get_marathon_path(name, marathon_name='marathon'):
     """Invokes HTTP GET for marathon url with name.
        For example, name='ping': http GET {dcos_url}/service/marathon/ping
@@ -701,7 +746,7 @@ def agent_hostname_by_id(agent_id):
 
 
 def deployment_predicate(service_id=None):
-    deployments = marathon.create_client().get_deployments()
+    deployments = marathon_client().get_deployments()
     if (service_id is None):
         return len(deployments) == 0
     else:
@@ -739,7 +784,7 @@ def __marathon_leadership_changed_in_marathon_api(original_leader):
         not be aware of the new leader being elected resulting in HTTP 502.
     """
     # Leader is returned like this 10.0.6.88:8080 - we want just the IP
-    current_leader = marathon.create_client().get_leader().split(':', 1)[0]
+    current_leader = marathon_client().get_leader().split(':', 1)[0]
     print('leader according to marathon API: {}'.format(current_leader))
     assert original_leader != current_leader
     return current_leader
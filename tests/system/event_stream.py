@@ -0,0 +1,147 @@
+"""
+    Consumer of the Marathon event stream in a background thread.
+"""
+import aiohttp
+import asyncio
+import functools
+import importlib.util
+import json
+import logging
+import os
+import threading
+
+from pooled_client import aiohttp_ssl
+from urllib.parse import urljoin
+
+TASK_RUNNING = 'TASK_RUNNING'
+# states of a task which is gone for good
+TASK_TERMINAL_STATES = ['TASK_FINISHED', 'TASK_FAILED', 'TASK_KILLED', 'TASK_LOST', 'TASK_ERROR', 'TASK_DROPPED',
+                        'TASK_GONE', 'TASK_GONE_BY_OPERATOR']
+# states of a task which does not count as running, it might come back
+TASK_NOT_RUNNING_STATES = TASK_TERMINAL_STATES + ['TASK_UNREACHABLE', 'TASK_UNKNOWN']
+
+RECONNECT_WAIT = 5
+DEFAULT_CONNECT_TIMEOUT = 30
+
+SSE_CLIENT_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'sseclient', 'async.py')
+
+
+class EventStreamException(Exception):
+    pass
+
+
+@functools.lru_cache(maxsize=None)
+def sse_client_class():
+    """ The async SSE client of the system integration tests.  It is loaded from its
+        file because dcos installs an `sseclient` module which shadows the package of
+        this directory whenever the directory is not first on the module path, as for
+        the scale tests.
+    """
+    spec = importlib.util.spec_from_file_location('marathon_sseclient', SSE_CLIENT_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.SSEClient
+
+
+class EventStream(object):
+    """ Follows the events of `event_types` of the Marathon at `base_url` in a daemon
+        thread.
+
+        :param base_url: url of Marathon
+        :type base_url: str
+        :param headers: headers of the stream, e.g. the ACS token
+        :type headers: dict
+        :param event_types: the event types to subscribe to
+        :type event_types: list
+        :param on_event: called with every decoded event
+        :type on_event: function
+        :param on_connect: called whenever the stream is (re)connected, events might
+                           have been missed before
+        :type on_connect: function
+    """
+
+    def __init__(self, base_url, headers, event_types, on_event, on_connect=None, name='marathon-events'):
+        self.base_url = base_url
+        self.headers = dict(headers or {})
+        self.headers['Accept'] = 'text/event-stream'
+        self.event_types = event_types
+        self.on_event = on_event
+        self.on_connect = on_connect
+        self.name = name
+        self.connections = 0
+        self.last_error = None
+        self._logger = logging.getLogger(self.__class__.__module__)
+        self._connected = threading.Event()
+        self._stopped = threading.Event()
+        self._loop = None
+        self._stream = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._loop is not None and self._stream is not None:
+            self._loop.call_soon_threadsafe(self._stream.cancel)
+        if self._thread is not None:
+            self._thread.join(RECONNECT_WAIT * 2)
+
+    @property
+    def connected(self):
+        return self._connected.is_set()
+
+    def wait_connected(self, timeout):
+        """ Waits up to `timeout` seconds for the stream to connect.
+        """
+        return self._connected.wait(timeout)
+
+    def require_connected(self, timeout=DEFAULT_CONNECT_TIMEOUT):
+        """ Waits up to `timeout` seconds for the stream to connect and raises an
+            `EventStreamException` with the last error if it does not.
+        """
+        if not self.wait_connected(timeout):
+            raise EventStreamException('Event stream {} did not connect to {} in {}s: {}'.format(
+                self.name, self.base_url, timeout, self.last_error))
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            while not self._stopped.is_set():
+                self._stream = self._loop.create_task(self._consume())
+                try:
+                    self._loop.run_until_complete(self._stream)
+                except asyncio.CancelledError:
+                    pass
+                except Exception as e:
+                    self.last_error = e
+                    self._logger.warning('Event stream %s of %s failed: %s', self.name, self.base_url, e)
+
+                self._connected.clear()
+                self._stopped.wait(RECONNECT_WAIT)
+        finally:
+            self._loop.close()
+
+    async def _consume(self):
+        query = '&'.join('event_type={}'.format(event_type) for event_type in self.event_types)
+        url = urljoin(self.base_url, 'v2/events?{}'.format(query))
+        SSEClient = sse_client_class()
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=30)
+        async with aiohttp.ClientSession(headers=self.headers, timeout=timeout) as session:
+            async with session.get(url, ssl=aiohttp_ssl()) as response:
+                response.raise_for_status()
+                self.connections = self.connections + 1
+                if self.on_connect is not None:
+                    self.on_connect()
+                self._connected.set()
+                client = SSEClient(response.content)
+                async for event in client.events():
+                    self.on_event(json.loads(event.data))
@@ -0,0 +1,136 @@
+"""
+    Record at a time decoding of large Marathon listings.
+"""
+import codecs
+import json
+
+from dcos import http
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+# characters which continue a number, a number followed by one is cut by the end of the buffer
+NUMBER_CHARACTERS = '0123456789.eE+-'
+
+
+class JsonStream(object):
+    """ A text buffer over an iterable of byte chunks which decodes JSON values and
+        structural characters as they become available.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        """ Reads the next chunk into the buffer.  False at the end of the stream.
+        """
+        if self._eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            chunk = b''
+        # the decoded part of the buffer is dropped to keep the memory constant
+        self._buffer = self._buffer[self._pos:] + self._decoder.decode(chunk, self._eof)
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """ The next non whitespace character or None at the end of the stream.
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos = self._pos + 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return None
+
+    def expect(self, characters):
+        character = self.peek()
+        if character is None or character not in characters:
+            raise ValueError('Expected one of {!r} but found {!r}'.format(characters, character))
+        self._pos = self._pos + 1
+        return character
+
+    def value(self):
+        """ Decodes the next JSON value.  A value which is cut by the end of the buffer is
+            decoded again with the next chunk.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+                if self._eof or (end < len(self._buffer) and self._buffer[end] not in NUMBER_CHARACTERS):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+
+def iter_array(stream):
+    """ Decodes the elements of the array at the position of `stream` one at a time.
+    """
+    stream.expect('[')
+    if stream.peek() == ']':
+        stream.expect(']')
+        return
+    while True:
+        yield stream.value()
+        if stream.expect(',]') == ']':
+            return
+
+
+def iter_records(chunks, key=None):
+    """ Decodes the records of a JSON listing one at a time.
+
+        :param chunks: the document as byte chunks, e.g. `response.iter_content()`
+        :type chunks: iterable
+        :param key: the key of the array in the top level object, e.g. `tasks` for
+                    `{"tasks": [...]}`, or None if the document is the array
+        :type key: str
+    """
+    stream = JsonStream(chunks)
+    if key is None:
+        yield from iter_array(stream)
+        return
+
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        name = stream.value()
+        stream.expect(':')
+        if name == key:
+            yield from iter_array(stream)
+            return
+        # other members of the document are small and skipped
+        stream.value()
+        if stream.expect(',}') == '}':
+            return
+
+
+def stream_records(url, key=None, chunk_size=CHUNK_SIZE, **kwargs):
+    """ GETs `url` and decodes the records of the `key` array of the response one at a
+        time.  Keyword arguments are passed to `dcos.http.get`, e.g. `headers`.
+    """
+    response = http.get(url, stream=True, **kwargs)
+    try:
+        yield from iter_records(response.iter_content(chunk_size), key)
+    finally:
+        response.close()
+
+
+def count_records(records, predicate=None):
+    """ Counts the records, or the records matching `predicate`, without keeping them.
+    """
+    if predicate is None:
+        return sum(1 for _ in records)
+    return sum(1 for record in records if predicate(record))
@@ -0,0 +1,215 @@
+"""
+    Marathon clients sharing a pool of keep-alive connections.
+"""
+import requests
+import ssl
+import threading
+
+from dcos import config, http, marathon, rpcclient
+from dcos.errors import (DCOSAuthorizationException, DCOSBadRequest, DCOSHTTPException,
+                         DCOSUnprocessableException)
+from requests.adapters import HTTPAdapter
+
+POOL_SIZE = 32
+POOL_TIMEOUT = 60
+
+# methods of the dcos.http functions which the RpcClient is called with
+HTTP_METHODS = {
+    http.get: 'GET',
+    http.head: 'HEAD',
+    http.post: 'POST',
+    http.put: 'PUT',
+    http.patch: 'PATCH',
+    http.delete: 'DELETE'
+}
+
+
+class ConnectionStats(object):
+    """ Requests sent and connections opened by the shared clients.
+    """
+
+    def __init__(self, requests=0, connections=0):
+        self.requests = requests
+        self.connections = connections
+
+    @property
+    def reused(self):
+        return max(self.requests - self.connections, 0)
+
+    @property
+    def reuse_rate(self):
+        if self.requests == 0:
+            return 0.0
+        return round(self.reused / self.requests, 3)
+
+    def __sub__(self, other):
+        return ConnectionStats(self.requests - other.requests, self.connections - other.connections)
+
+    def to_json(self):
+        return {'requests': self.requests, 'connections': self.connections, 'reused': self.reused,
+                'reuse_rate': self.reuse_rate}
+
+    def __str__(self):
+        return 'connections: {} requests: {} reused: {} reuse rate: {}'.format(
+            self.connections,
+            self.requests,
+            self.reused,
+            self.reuse_rate)
+
+
+class PooledRpcClient(rpcclient.RpcClient):
+    """ A dcos `RpcClient` which sends its requests with `session` instead of a new
+        connection per request.  The error handling of the `RpcClient` is kept.
+
+        :param base_url: url of Marathon
+        :type base_url: str
+        :param session: the pooled session
+        :type session: requests.Session
+        :param headers: function returning the headers of a request
+        :type headers: function
+    """
+
+    def __init__(self, base_url, session, headers=None, timeout=POOL_TIMEOUT):
+        super(PooledRpcClient, self).__init__(base_url, timeout)
+        self._session = session
+        self._headers = headers
+
+    def http_req(self, method_fn, path, *args, **kwargs):
+        pooled = self._pooled(HTTP_METHODS[method_fn], method_fn)
+        return super(PooledRpcClient, self).http_req(pooled, path, *args, **kwargs)
+
+    def _pooled(self, method, method_fn):
+        def request(url, *args, **kwargs):
+            headers = dict(self._headers() if self._headers is not None else {})
+            headers.update(kwargs.get('headers') or {})
+            verify = ssl_verify()
+            if verify is not None:
+                http.silence_requests_warnings()
+            pooled_kwargs = dict(kwargs, headers=headers, verify=verify)
+            response = self._session.request(method, url, *args, **pooled_kwargs)
+            if response.status_code == 401:
+                # dcos.http asks for a new token if core.prompt_login is set and raises its
+                # authentication error otherwise, the rejected request is safe to send again
+                return method_fn(url, *args, **kwargs)
+            if not 200 <= response.status_code < 300:
+                raise http_error(response)
+            return response
+
+        return request
+
+
+def ssl_verify(toml_config=None):
+    """ Whether to verify TLS certificates or the path of the CA bundle taken from
+        `core.ssl_verify` the same way `dcos.http` does.  None if it is not configured.
+    """
+    if toml_config is None:
+        toml_config = config.get_config()
+    verify = config.get_config_val('core.ssl_verify', toml_config)
+    if verify and verify.lower() == 'true':
+        return True
+    if verify and verify.lower() == 'false':
+        return False
+    return verify
+
+
+def aiohttp_ssl(toml_config=None):
+    """ `ssl_verify` as the `ssl` argument of aiohttp: False, an SSL context of the CA
+        bundle or None for the default verification.
+    """
+    verify = ssl_verify(toml_config)
+    if verify is True:
+        return None
+    if verify is False or verify is None:
+        return verify
+    return ssl.create_default_context(cafile=verify)
+
+
+def http_error(response):
+    """ The dcos error of a failed response, as raised by `dcos.http.request`.
+    """
+    if response.status_code == 422:
+        return DCOSUnprocessableException(response)
+    if response.status_code == 403:
+        return DCOSAuthorizationException(response)
+    if response.status_code == 400:
+        return DCOSBadRequest(response)
+    return DCOSHTTPException(response)
+
+
+class CountingAdapter(HTTPAdapter):
+    """ An adapter which keeps the requests and connections of the pools it evicts or
+        closes, so the counts of `connection_stats` never decrease.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.retired = ConnectionStats()
+        super(CountingAdapter, self).__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(CountingAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pools.dispose_func = self._retire
+
+    def _retire(self, pool):
+        self.retired.requests = self.retired.requests + pool.num_requests
+        self.retired.connections = self.retired.connections + pool.num_connections
+        pool.close()
+
+    def stats(self):
+        stats = ConnectionStats(self.retired.requests, self.retired.connections)
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                stats.requests = stats.requests + pool.num_requests
+                stats.connections = stats.connections + pool.num_connections
+        return stats
+
+
+def create_session():
+    """ A session without adapters of its own, `mount_pool` adds one per Marathon.
+    """
+    session = requests.Session()
+    session.adapters.clear()
+    return session
+
+
+def mount_pool(session, base_url, pool_size=POOL_SIZE):
+    """ Keeps up to `pool_size` connections to the Marathon at `base_url` alive.  Every
+        Marathon gets an adapter of its own, the pools of one Marathon are never evicted
+        by the requests to another one.
+    """
+    session.mount(base_url, CountingAdapter(pool_connections=1, pool_maxsize=pool_size))
+
+
+_session = create_session()
+_clients = {}
+_lock = threading.Lock()
+
+
+def shared_client(base_url, headers=None):
+    """ The shared `marathon.Client` of the Marathon at `base_url`.
+
+        :param base_url: url of Marathon
+        :type base_url: str
+        :param headers: function returning the headers of a request, e.g. the ACS token
+        :type headers: function
+    """
+    base_url = base_url.rstrip('/') + '/'
+    with _lock:
+        client = _clients.get(base_url)
+        if client is None:
+            mount_pool(_session, base_url)
+            client = marathon.Client(PooledRpcClient(base_url, _session, headers))
+            _clients[base_url] = client
+        return client
+
+
+def connection_stats():
+    """ The requests and new connections of all shared clients since the start.
+    """
+    stats = ConnectionStats()
+    for adapter in set(_session.adapters.values()):
+        adapter_stats = adapter.stats()
+        stats.requests = stats.requests + adapter_stats.requests
+        stats.connections = stats.connections + adapter_stats.connections
+    return stats
@@ -0,0 +1,308 @@
+"""
+    Concurrent removal of apps, pods and groups.
+"""
+import collections
+import logging
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from event_stream import EventStream, TASK_TERMINAL_STATES
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 60 * 10
+# interval of checking the deployments while no events arrive
+POLL_INTERVAL = 1.0
+EVENT_POLL_INTERVAL = 10.0
+# minimal time between two checks of the deployments triggered by events
+MIN_CHECK_INTERVAL = 0.5
+MAX_CONSECUTIVE_FAILURES = 10
+# the removals wait this long for the event stream so that no killed task is missed
+CONNECT_TIMEOUT = 5
+
+DEPLOYMENT_EVENTS = ['deployment_success', 'deployment_failed']
+
+logger = logging.getLogger(__name__)
+
+
+class TeardownException(Exception):
+    pass
+
+
+class Removal(object):
+    """ The removal of one app, pod or group.  `remove` is called with the id.
+    """
+    __slots__ = ['kind', 'id', 'remove']
+
+    def __init__(self, kind, id, remove):
+        self.kind = kind
+        self.id = id
+        self.remove = remove
+
+    def __repr__(self):
+        return 'removal: {} {}'.format(self.kind, self.id)
+
+
+def app_removals(client, app_ids, force=True):
+    return [Removal('app', app_id, lambda app_id: client.remove_app(app_id, force)) for app_id in app_ids]
+
+
+def pod_removals(client, pod_ids, force=True):
+    return [Removal('pod', pod_id, lambda pod_id: client.remove_pod(pod_id, force)) for pod_id in pod_ids]
+
+
+def group_removals(client, group_ids, force=True):
+    return [Removal('group', group_id, lambda group_id: client.remove_group(group_id, force))
+            for group_id in group_ids]
+
+
+def in_scope(scope, ids):
+    """ True if one of the ids is one of the scope ids or below one of them.  Every
+        deployment is in the scope of the root group.
+    """
+    if '/' in scope:
+        return True
+    for id in ids:
+        for scope_id in scope:
+            if id == scope_id or id.startswith(scope_id.rstrip('/') + '/'):
+                return True
+    return False
+
+
+class TeardownStats(object):
+    """ Removals, errors and killed tasks of a teardown.  `kills` are the killed tasks
+        by second since the start of the teardown.  The killed tasks are only known if
+        the event stream was connected during the whole teardown, otherwise they are
+        None.
+    """
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.start = time.time()
+        self.removed = 0
+        self.errors = []
+        self.removal_time = None
+        self.completion_time = None
+        self.deployment_checks = 0
+        self.check_failures = 0
+        # True if the event stream was connected during the whole teardown
+        self.events_complete = False
+        self.kills = collections.Counter()
+        self._lock = threading.Lock()
+
+    def task_gone(self):
+        with self._lock:
+            self.kills[int(time.time() - self.start)] += 1
+
+    @property
+    def killed(self):
+        if not self.events_complete:
+            return None
+        return sum(self.kills.values())
+
+    @property
+    def elapsed(self):
+        if self.completion_time is not None:
+            return self.completion_time
+        return round(time.time() - self.start, 3)
+
+    @property
+    def kill_rate(self):
+        """ Killed tasks per second over the whole teardown.
+        """
+        if self.killed is None:
+            return None
+        if not self.elapsed:
+            return 0.0
+        return round(self.killed / self.elapsed, 3)
+
+    def kill_rates(self):
+        """ (second, killed tasks) for every second of the teardown.
+        """
+        if not self.events_complete:
+            return None
+        seconds = int(self.elapsed) + 1
+        return [(second, self.kills.get(second, 0)) for second in range(seconds)]
+
+    def __str__(self):
+        return 'teardown: {} removed: {} errors: {} killed tasks: {} time: {}s kill rate: {} tasks/s'.format(
+            len(self.scope),
+            self.removed,
+            len(self.errors),
+            self.killed,
+            self.elapsed,
+            self.kill_rate)
+
+
+class FixedInterval(object):
+    """ Waits a fixed interval between deployment checks.  A scale test passes an
+        `AdaptiveBackoff` with the same methods instead.
+    """
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+
+    def success(self, latency=0.0):
+        pass
+
+    def failure(self):
+        pass
+
+    def wait_time(self):
+        return self.interval
+
+
+class TeardownEvents(object):
+    """ Follows the deployment and task events of Marathon.  Waiters are woken up by
+        every finished deployment, killed tasks are counted in `stats` once it is set.
+        If the stream does not connect within `CONNECT_TIMEOUT` seconds the teardown
+        polls the deployments.
+    """
+
+    def __init__(self, base_url, headers):
+        self.stats = None
+        self.deployments_finished = 0
+        self.connected_on_start = False
+        self._condition = threading.Condition()
+        self._stream = EventStream(base_url, headers, DEPLOYMENT_EVENTS + ['status_update_event'], self.event,
+                                   name='teardown-events')
+
+    def __enter__(self):
+        self._stream.start()
+        self.connected_on_start = self._stream.wait_connected(CONNECT_TIMEOUT)
+        if not self.connected_on_start:
+            logger.warning('The event stream of %s did not connect in %ss, the teardown polls: %s',
+                           self._stream.base_url, CONNECT_TIMEOUT, self._stream.last_error)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._stream.stop()
+
+    @property
+    def connected(self):
+        return self._stream.connected
+
+    @property
+    def complete(self):
+        """ True if no event can have been missed: the stream was connected before the
+            removals started and never reconnected.
+        """
+        return self.connected_on_start and self._stream.connected and self._stream.connections == 1
+
+    def wait(self, timeout, finished):
+        """ Waits up to `timeout` seconds for more than `finished` finished deployments.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.deployments_finished > finished, timeout)
+            return self.deployments_finished
+
+    def event(self, data):
+        event_type = data.get('eventType')
+        if event_type in DEPLOYMENT_EVENTS:
+            with self._condition:
+                self.deployments_finished = self.deployments_finished + 1
+                self._condition.notify_all()
+        elif event_type == 'status_update_event' and data.get('taskStatus') in TASK_TERMINAL_STATES:
+            stats = self.stats
+            if stats is not None:
+                stats.task_gone()
+
+
+class Teardown(object):
+    """ Removes apps, pods and groups concurrently and waits for their deployments.
+
+        :param client: a thread-safe dcos Marathon client, e.g. a shared client
+        :type client: dcos.marathon.Client
+        :param base_url: url of Marathon for the event stream
+        :type base_url: str
+        :param headers: headers of the event stream, e.g. the ACS token
+        :type headers: dict
+        :param concurrency: maximal number of removals in flight
+        :type concurrency: int
+        :param poller: decides the time between deployment checks, e.g. an AdaptiveBackoff
+    """
+
+    def __init__(self, client, base_url, headers=None, concurrency=DEFAULT_CONCURRENCY, poller=None,
+                 max_failures=MAX_CONSECUTIVE_FAILURES):
+        self.client = client
+        self.base_url = base_url
+        self.headers = headers
+        self.concurrency = concurrency
+        self.poller = poller or FixedInterval()
+        self.max_failures = max_failures
+
+    def run(self, removals, timeout=DEFAULT_TIMEOUT):
+        """ Removes everything and waits until no deployment of the scope is left.
+            Failed removals are recorded in the stats, failures to check the
+            deployments are retried up to `max_failures` times in a row.  A timeout of
+            None waits forever.
+        """
+        with TeardownEvents(self.base_url, self.headers) as events:
+            # the wait for the event stream is not part of the undeploy time
+            stats = TeardownStats([removal.id for removal in removals])
+            events.stats = stats
+            self._remove_all(removals, stats)
+            self._wait(stats, events, timeout)
+            stats.events_complete = events.complete
+        return stats
+
+    def remove(self, removals):
+        """ Removes everything without waiting for the deployments.
+        """
+        stats = TeardownStats([removal.id for removal in removals])
+        self._remove_all(removals, stats)
+        return stats
+
+    def _remove_all(self, removals, stats):
+        def remove(removal):
+            try:
+                removal.remove(removal.id)
+                return None
+            except Exception as e:
+                return removal.id, e
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for error in executor.map(remove, removals):
+                if error is None:
+                    stats.removed = stats.removed + 1
+                else:
+                    stats.errors.append(error)
+        stats.removal_time = round(time.time() - stats.start, 3)
+
+    def active_deployments(self, scope):
+        deployments = self.client.get_deployments()
+        return [deployment for deployment in deployments
+                if in_scope(scope, deployment.get('affectedApps', []) + deployment.get('affectedPods', []))]
+
+    def _wait(self, stats, events, timeout):
+        end = None if timeout is None else time.time() + timeout
+        finished = events.deployments_finished
+        failures = 0
+        while True:
+            check_start = time.time()
+            try:
+                stats.deployment_checks = stats.deployment_checks + 1
+                active = len(self.active_deployments(stats.scope))
+                self.poller.success(time.time() - check_start)
+                failures = 0
+            except Exception as e:
+                stats.check_failures = stats.check_failures + 1
+                self.poller.failure()
+                failures = failures + 1
+                if failures > self.max_failures:
+                    raise TeardownException('Too many failures waiting for the teardown: {}'.format(e))
+                active = None
+
+            if active == 0:
+                stats.completion_time = round(time.time() - stats.start, 3)
+                return
+            if end is not None and time.time() > end:
+                raise TeardownException('Teardown did not complete in {}s, {} deployments left'.format(
+                    timeout, active))
+
+            # a finished deployment triggers the next check, the interval is the fallback
+            interval = self.poller.wait_time()
+            if events.connected and active is not None:
+                interval = max(interval, EVENT_POLL_INTERVAL)
+            finished = events.wait(interval, finished)
+            time.sleep(max(0.0, check_start + MIN_CHECK_INTERVAL - time.time()))
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the helpers under test are imported by module name, like the system and scale tests do
+TESTS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+for test_dir in ['system', 'scale']:
+    sys.path.insert(0, os.path.join(TESTS_DIR, test_dir))
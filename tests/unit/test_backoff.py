@@ -0,0 +1,82 @@
+"""
+    Additive decrease and multiplicative increase of the `AdaptiveBackoff` interval.
+"""
+import pytest
+
+from backoff import ERROR_WINDOW, FAILURE, SLOW, SUCCESS, AdaptiveBackoff
+
+
+def create_backoff(**kwargs):
+    return AdaptiveBackoff('test', min_interval=1.0, max_interval=60.0, decrease_step=0.5, increase_factor=2.0,
+                           latency_threshold=5.0, jitter=0.0, **kwargs)
+
+
+def test_failure_multiplies_interval():
+    backoff = create_backoff()
+
+    assert [backoff.failure() for _ in range(4)] == [2.0, 4.0, 8.0, 16.0]
+
+
+def test_interval_is_capped():
+    backoff = create_backoff()
+    for _ in range(10):
+        backoff.failure()
+
+    assert backoff.interval == 60.0
+
+
+def test_success_decreases_interval_by_step():
+    backoff = create_backoff()
+    for _ in range(4):
+        backoff.failure()
+    # a healthy window, the failures above are diluted below the error rate threshold
+    for _ in range(ERROR_WINDOW):
+        backoff.success(0.1)
+    interval = backoff.interval
+
+    assert backoff.success(0.1) == interval - 0.5
+    assert backoff.success(0.1) == interval - 1.0
+
+
+def test_interval_does_not_drop_below_min():
+    backoff = create_backoff()
+    for _ in range(5):
+        backoff.success(0.1)
+
+    assert backoff.interval == 1.0
+
+
+def test_slow_success_increases_interval():
+    backoff = create_backoff()
+
+    assert backoff.success(6.0) == 2.0
+    assert backoff.decisions[-1].outcome == SLOW
+    assert backoff.error_rate == 0.0
+
+
+def test_high_error_rate_holds_interval():
+    backoff = create_backoff()
+    backoff.failure()
+    backoff.failure()
+    # 2 failures of 3 requests are above the threshold, the interval is not shortened
+    assert backoff.success(0.1) == 4.0
+    assert backoff.error_rate == pytest.approx(0.667, abs=0.001)
+
+
+def test_decisions_are_recorded():
+    backoff = create_backoff()
+    backoff.success(0.2)
+    backoff.failure()
+
+    success, failure = backoff.decisions
+    assert (success.outcome, success.latency, success.error_rate, success.interval) == (SUCCESS, 0.2, 0.0, 1.0)
+    assert (failure.outcome, failure.latency, failure.error_rate, failure.interval) == (FAILURE, None, 0.5, 2.0)
+    assert success.timestamp <= failure.timestamp
+
+
+def test_wait_time_jitter():
+    backoff = AdaptiveBackoff('test', min_interval=10.0, jitter=0.1)
+    waits = [backoff.wait_time() for _ in range(200)]
+
+    assert all(9.0 <= wait <= 11.0 for wait in waits)
+    assert len(set(waits)) > 1
@@ -0,0 +1,121 @@
+"""
+    The batch size sweep against a fake bulk API.
+"""
+import csv
+
+from batch_sweep import BatchSweep, SweepPoint, SweepResult, write_sweep_csv
+
+
+class FakeBulkApi(object):
+    """ Records the calls of a sweep.  Batches above `max_batch` fail.
+    """
+
+    def __init__(self, max_batch=None):
+        self.max_batch = max_batch
+        self.calls = []
+        self.created = []
+
+    def prepare(self, state):
+        self.calls.append(('prepare', state))
+
+    def create(self, start, count):
+        if self.max_batch is not None and count > self.max_batch:
+            raise Exception('request entity too large')
+        self.created.append((start, count))
+
+    def wait(self):
+        self.calls.append(('wait', len(self.created)))
+
+    def cleanup(self):
+        self.calls.append(('cleanup', len(self.created)))
+        self.created = []
+
+
+def point(state, batch_size, apps_per_second, errors=0):
+    sweep_point = SweepPoint(state, batch_size)
+    sweep_point.apps = 100
+    sweep_point.elapsed = round(100 / apps_per_second, 3)
+    sweep_point.errors = errors
+    return sweep_point
+
+
+def test_sweep_creates_all_apps_in_batches():
+    api = FakeBulkApi()
+    sweep = BatchSweep(api.prepare, api.create, api.wait, api.cleanup, batch_sizes=[1, 10, 30], state_sizes=[0, 5],
+                       apps=100)
+
+    result = sweep.run()
+
+    assert [(p.state, p.batch_size, p.requests, p.apps) for p in result.points] == [
+        (0, 1, 100, 100), (0, 10, 10, 100), (0, 30, 4, 120),
+        (5, 1, 100, 100), (5, 10, 10, 100), (5, 30, 4, 120)]
+    assert all(p.success and p.latencies.count == p.requests for p in result.points)
+    # every state is prepared once, the batches of every batch size are waited for and cleaned up
+    batches = [100, 10, 4] * 2
+    assert [call for call in api.calls if call[0] == 'prepare'] == [('prepare', 0), ('prepare', 5)]
+    assert [call for call in api.calls if call[0] == 'wait'] == [('wait', count) for count in batches]
+    assert [call for call in api.calls if call[0] == 'cleanup'] == [('cleanup', count) for count in batches]
+
+
+def test_failed_requests_are_counted():
+    api = FakeBulkApi(max_batch=10)
+    sweep = BatchSweep(api.prepare, api.create, api.wait, api.cleanup, batch_sizes=[10, 50], state_sizes=[0],
+                       apps=100)
+
+    small, large = sweep.run().points
+
+    assert small.success and small.errors == 0
+    assert not large.success
+    assert (large.requests, large.errors, large.apps) == (2, 2, 0)
+
+
+def test_failed_wait_fails_point():
+    def wait():
+        raise Exception('deployments did not finish')
+
+    api = FakeBulkApi()
+    result = BatchSweep(api.prepare, api.create, wait, api.cleanup, batch_sizes=[10], state_sizes=[0],
+                        apps=20).run()
+
+    assert not result.points[0].success
+    assert result.points[0].elapsed is None
+    assert result.points[0].apps_per_second == 0.0
+
+
+def test_best_and_recommended_batch_size():
+    result = SweepResult([
+        point(0, 1, 10), point(0, 100, 50), point(0, 1000, 80),
+        point(1000, 1, 5), point(1000, 100, 40), point(1000, 1000, 20),
+    ])
+
+    assert result.best(0).batch_size == 1000
+    assert result.best(1000).batch_size == 100
+    # mean apps per second: 1 -> 7.5, 100 -> 45, 1000 -> 50
+    assert result.recommended() == 1000
+
+
+def test_batch_size_failing_at_a_state_is_not_recommended():
+    result = SweepResult([
+        point(0, 100, 50), point(0, 1000, 80),
+        point(1000, 100, 40), point(1000, 1000, 90, errors=1),
+    ])
+
+    assert result.best(1000).batch_size == 100
+    assert result.recommended() == 100
+
+
+def test_no_successful_point():
+    result = SweepResult([point(0, 100, 50, errors=1)])
+
+    assert result.best(0) is None
+    assert result.recommended() is None
+
+
+def test_write_sweep_csv(tmpdir):
+    filename = str(tmpdir.join('sweep.csv'))
+    write_sweep_csv(SweepResult([point(0, 100, 50)]), filename)
+
+    with open(filename) as f:
+        rows = list(csv.reader(f))
+    assert rows[0][:7] == ['state', 'batch_size', 'apps', 'requests', 'errors', 'elapsed', 'apps_per_second']
+    assert rows[1][:2] == ['0', '100'] and float(rows[1][6]) == 50.0
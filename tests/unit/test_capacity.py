@@ -0,0 +1,111 @@
+"""
+    Bounds and number of probes of the capacity search.
+"""
+import math
+import pytest
+
+from capacity import PHASE_BISECT, PHASE_CONFIRM, PHASE_GALLOP, CapacitySearch
+
+
+def doubling(start=1000):
+    size = start
+    while True:
+        yield size
+        size = size * 2
+
+
+class FakeCluster(object):
+    """ Deploys up to `capacity` instances, `flaky` sizes fail on their first probe.
+    """
+
+    def __init__(self, capacity, flaky=()):
+        self.capacity = capacity
+        self.flaky = set(flaky)
+        self.resets = 0
+
+    def probe(self, size):
+        if size in self.flaky:
+            self.flaky.discard(size)
+            raise Exception('flaky deployment of {}'.format(size))
+        if size > self.capacity:
+            raise Exception('deployment of {} failed'.format(size))
+
+    def reset(self):
+        self.resets = self.resets + 1
+
+
+@pytest.mark.parametrize("capacity", [1000, 1500, 9999, 12345, 64000])
+def test_search_converges_within_resolution(capacity):
+    cluster = FakeCluster(capacity)
+    result = CapacitySearch(cluster.probe, cluster.reset, resolution=500, confirmations=1).run(doubling())
+
+    assert result.lower <= capacity < result.upper
+    assert result.upper - result.lower <= 500
+    assert result.maximum == result.lower
+    assert cluster.resets == len(result.probes)
+
+
+def test_gallop_stops_at_first_failure():
+    cluster = FakeCluster(5000)
+    result = CapacitySearch(cluster.probe, cluster.reset, resolution=500, confirmations=0).run(doubling())
+
+    gallop = [probe.size for probe in result.probes if probe.phase == PHASE_GALLOP]
+    assert gallop == [1000, 2000, 4000, 8000]
+    bisect = [probe.size for probe in result.probes if probe.phase == PHASE_BISECT]
+    assert all(4000 < size < 8000 for size in bisect)
+    assert (result.lower, result.upper) == (5000, 5500)
+
+
+def test_bisect_probes_are_logarithmic():
+    cluster = FakeCluster(40000)
+    result = CapacitySearch(cluster.probe, cluster.reset, resolution=1, confirmations=0).run(doubling())
+
+    bisect = [probe for probe in result.probes if probe.phase == PHASE_BISECT]
+    # the gallop ends between 32000 and 64000, bisecting 32000 sizes takes at most 15 probes
+    assert len(bisect) <= math.ceil(math.log(32000, 2))
+    assert (result.lower, result.upper) == (40000, 40001)
+
+
+def test_first_size_failing_gives_zero():
+    cluster = FakeCluster(500)
+    result = CapacitySearch(cluster.probe, cluster.reset, resolution=1000).run(doubling())
+
+    assert (result.lower, result.upper) == (0, 1000)
+    assert [probe.phase for probe in result.probes] == [PHASE_GALLOP]
+
+
+def test_max_size_ends_gallop_without_upper_bound():
+    cluster = FakeCluster(10 ** 6)
+    result = CapacitySearch(cluster.probe, cluster.reset, resolution=500, confirmations=1,
+                            max_size=10000).run(doubling())
+
+    assert result.lower == 8000
+    assert result.upper is None
+    assert [probe.size for probe in result.probes if probe.phase == PHASE_CONFIRM] == [8000]
+
+
+def test_finite_sizes_end_gallop_without_upper_bound():
+    cluster = FakeCluster(10 ** 6)
+    result = CapacitySearch(cluster.probe, cluster.reset, confirmations=0).run([1000, 2000, 3000])
+
+    assert (result.lower, result.upper) == (3000, None)
+
+
+def test_lucky_maximum_is_searched_again():
+    # 4000 passes once and fails when it is confirmed, the real capacity is 3000
+    cluster = FakeCluster(3000)
+    passed = []
+
+    def probe(size):
+        if size == 4000 and size not in passed:
+            passed.append(size)
+            return
+        cluster.probe(size)
+
+    result = CapacitySearch(probe, cluster.reset, resolution=500, confirmations=1).run(doubling())
+
+    assert result.lower <= 3000 < result.upper
+    assert result.upper - result.lower <= 500
+    confirmations = [probe for probe in result.probes if probe.phase == PHASE_CONFIRM]
+    assert not confirmations[0].success
+    assert confirmations[-1].success and confirmations[-1].size == result.lower
@@ -0,0 +1,59 @@
+"""
+    Reconciliation of the running tasks counted by the `DeploymentTracker`.
+"""
+import pytest
+
+from deployment_tracker import DeploymentTracker
+
+
+@pytest.fixture
+def connected(monkeypatch):
+    monkeypatch.setattr(DeploymentTracker, 'connected', True)
+
+
+def create_tracker(running_tasks, poll=lambda: 0):
+    return DeploymentTracker('http://localhost:8080/', {}, running_tasks, poll)
+
+
+def test_event_of_a_listed_task_is_counted_once(connected):
+    tracker = create_tracker(lambda: ['a', 'b'])
+
+    assert tracker.current_scale() == 2
+    tracker.task_status('a', 'TASK_RUNNING')
+    assert tracker.current_scale() == 2
+    tracker.task_status('c', 'TASK_RUNNING')
+    assert tracker.current_scale() == 3
+    tracker.task_status('a', 'TASK_KILLED')
+    assert tracker.current_scale() == 2
+    assert tracker.reconciliations == 1
+
+
+def test_events_during_reconciliation_are_applied_again(connected):
+    def running_tasks():
+        # the list was taken before these events
+        tracker.task_status('c', 'TASK_RUNNING')
+        tracker.task_status('a', 'TASK_KILLED')
+        return ['a', 'b']
+
+    tracker = create_tracker(running_tasks)
+
+    assert tracker.current_scale() == 2
+    assert tracker.events_received == 2
+
+
+def test_reconnect_reconciles(connected):
+    task_lists = [['a'], ['a', 'b']]
+    tracker = create_tracker(lambda: task_lists.pop(0))
+
+    assert tracker.current_scale() == 1
+    tracker._stream_connected()
+    assert tracker.current_scale() == 2
+    assert tracker.reconciliations == 2
+
+
+def test_disconnected_tracker_polls():
+    tracker = create_tracker(lambda: ['a'], poll=lambda: 5)
+    tracker.task_status('b', 'TASK_RUNNING')
+
+    assert tracker.current_scale() == 5
+    assert tracker.reconciliations == 0
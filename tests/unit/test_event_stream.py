@@ -0,0 +1,18 @@
+"""
+    Loading the SSE client of the event stream.
+"""
+import sys
+import types
+
+from event_stream import sse_client_class
+
+
+def test_sse_client_is_loaded_from_its_file(monkeypatch):
+    # dcos installs a module of the same name
+    monkeypatch.setitem(sys.modules, 'sseclient', types.ModuleType('sseclient'))
+    sse_client_class.cache_clear()
+
+    client_class = sse_client_class()
+
+    assert client_class.__name__ == 'SSEClient'
+    assert client_class.__module__ == 'marathon_sseclient'
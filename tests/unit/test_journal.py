@@ -0,0 +1,116 @@
+"""
+    Records of the journal file and resuming an interrupted run from it.
+"""
+import json
+
+from journal import LAST_RUN, LAUNCH, RESULT, RUN, ResultJournal, open_journal
+
+
+def test_records_of_own_run(tmpdir):
+    filename = str(tmpdir.join('journal.jsonl'))
+    ResultJournal(filename).append(RESULT, 'test_a', status='failed')
+    journal = ResultJournal(filename)
+    journal.start_run(marathon='root')
+    journal.append(LAUNCH, 'test_a', count=10)
+    journal.append(RESULT, 'test_a', status='successful')
+
+    assert [(record['type'], record['test']) for record in journal.records()] == [
+        (RUN, None), (LAUNCH, 'test_a'), (RESULT, 'test_a')]
+    assert [record['status'] for record in journal.records(RESULT)] == ['successful']
+
+
+def test_partial_line_is_skipped(tmpdir):
+    filename = str(tmpdir.join('journal.jsonl'))
+    journal = ResultJournal(filename)
+    journal.append(RESULT, 'test_a', status='successful')
+    line = json.dumps({'run': journal.run, 'type': RESULT, 'test': 'test_b', 'status': 'successful'})
+    with open(filename, 'a') as f:
+        f.write(line[:len(line) // 2])
+
+    assert [record['test'] for record in journal.records()] == ['test_a']
+
+
+def test_append_after_partial_line(tmpdir):
+    filename = str(tmpdir.join('journal.jsonl'))
+    ResultJournal(filename).append(RESULT, 'test_a', status='successful')
+    with open(filename, 'a') as f:
+        f.write('{"run": "crashed", "type": "res')
+
+    journal = ResultJournal(filename)
+    journal.append(RESULT, 'test_b', status='successful')
+    journal.append(RESULT, 'test_c', status='successful')
+
+    assert [record['test'] for record in journal.records()] == ['test_b', 'test_c']
+
+
+def write_run(filename, results):
+    journal = open_journal(filename)
+    journal.start_run(marathon='root')
+    for test, status in results:
+        journal.append(RESULT, test, status=status)
+    return journal
+
+
+def test_new_run_does_not_read_other_runs(tmpdir):
+    filename = str(tmpdir.join('journal.jsonl'))
+    write_run(filename, [('test_a', 'successful')])
+
+    journal = open_journal(filename)
+
+    assert list(journal.records()) == []
+
+
+def test_resume_last_run(tmpdir):
+    filename = str(tmpdir.join('journal.jsonl'))
+    write_run(filename, [('test_a', 'successful')])
+    last = write_run(filename, [('test_a', 'failed'), ('test_b', 'successful')])
+
+    resumed = open_journal(filename, LAST_RUN)
+    resumed.start_run(marathon='root')
+    resumed.append(RESULT, 'test_c', status='successful')
+
+    assert resumed.run == last.run
+    assert [(name, result['status']) for name, result in resumed.results().items()] == [
+        ('test_a', 'failed'), ('test_b', 'successful'), ('test_c', 'successful')]
+
+
+def test_resume_run_by_id(tmpdir):
+    filename = str(tmpdir.join('journal.jsonl'))
+    first = write_run(filename, [('test_a', 'successful')])
+    write_run(filename, [('test_b', 'successful')])
+
+    resumed = open_journal(filename, first.run)
+
+    assert list(resumed.results()) == ['test_a']
+
+
+def test_later_result_of_a_test_wins(tmpdir):
+    filename = str(tmpdir.join('journal.jsonl'))
+    journal = write_run(filename, [('test_a', 'skipped'), ('test_b', 'successful'), ('test_a', 'successful')])
+
+    results = journal.results()
+
+    assert list(results) == ['test_a', 'test_b']
+    assert results['test_a']['status'] == 'successful'
+
+
+def test_partial_last_line_is_skipped(tmpdir):
+    filename = str(tmpdir.join('journal.jsonl'))
+    journal = write_run(filename, [('test_a', 'successful')])
+    line = json.dumps({'run': journal.run, 'type': RESULT, 'test': 'test_b', 'status': 'successful'})
+    with open(filename, 'a') as f:
+        f.write(line[:len(line) // 2])
+
+    resumed = open_journal(filename, LAST_RUN)
+
+    assert resumed.run == journal.run
+    assert list(resumed.results()) == ['test_a']
+
+
+def test_nothing_to_resume_starts_new_run(tmpdir):
+    filename = str(tmpdir.join('journal.jsonl'))
+
+    journal = open_journal(filename, LAST_RUN)
+    journal.start_run()
+
+    assert journal.last_run() == journal.run
@@ -0,0 +1,70 @@
+"""
+    Decoding of Marathon listings cut into chunks at every position.
+"""
+import json
+import pytest
+
+from json_stream import count_records, iter_records
+
+
+def chunked(document, size):
+    data = document.encode('utf-8')
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+TASKS = {
+    'tasks': [
+        {'id': 'app_{}.{}'.format(num, 'ä' * num), 'state': 'TASK_RUNNING' if num % 3 else 'TASK_STAGING',
+         'ports': [31000 + num], 'version': 1.5e3 * num, 'healthy': num % 2 == 0, 'host': None}
+        for num in range(12)
+    ]
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 16, 64, 100000])
+def test_records_across_chunk_boundaries(chunk_size):
+    document = json.dumps(TASKS, ensure_ascii=False)
+
+    assert list(iter_records(chunked(document, chunk_size), 'tasks')) == TASKS['tasks']
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4])
+def test_numbers_cut_by_chunks(chunk_size):
+    document = '[1234567, -0.5e-10, 42, 3.25E+8, 0]'
+
+    assert list(iter_records(chunked(document, chunk_size))) == [1234567, -0.5e-10, 42, 3.25E+8, 0]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 8])
+def test_other_members_are_skipped(chunk_size):
+    document = json.dumps({'version': '1.6', 'meta': {'apps': [1, 2]}, 'apps': [{'id': '/a'}, {'id': '/b'}],
+                           'after': 'ignored'})
+
+    assert list(iter_records(chunked(document, chunk_size), 'apps')) == [{'id': '/a'}, {'id': '/b'}]
+
+
+@pytest.mark.parametrize("document", ['[]', ' [ ] ', '{}', '{"tasks": []}', '{"other": [1]}'])
+def test_empty_listings(document):
+    key = None if document.strip().startswith('[') else 'tasks'
+
+    assert list(iter_records(chunked(document, 1), key)) == []
+
+
+def test_whitespace_between_chunks():
+    document = '{\n  "tasks" :\n  [\n    {"id": 1} ,\n    {"id": 2}\n  ]\n}\n'
+
+    assert list(iter_records(chunked(document, 2), 'tasks')) == [{'id': 1}, {'id': 2}]
+
+
+def test_truncated_listing_fails():
+    document = json.dumps(TASKS)[:-20]
+
+    with pytest.raises(ValueError):
+        list(iter_records(chunked(document, 7), 'tasks'))
+
+
+def test_count_records():
+    document = json.dumps(TASKS)
+    records = iter_records(chunked(document, 5), 'tasks')
+
+    assert count_records(records, lambda task: task['state'] == 'TASK_RUNNING') == 8
@@ -0,0 +1,98 @@
+"""
+    Percentiles of `LatencyHistogram` against the exact percentiles of the values.
+"""
+import math
+import pytest
+import random
+
+from latency import LatencyHistogram, LatencyRecorder
+
+
+def exact_percentile(values, percentile):
+    ordered = sorted(values)
+    rank = max(1, int(math.ceil(percentile / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+
+    assert histogram.percentile(99) == 0.0
+    assert histogram.mean_ms == 0.0
+    assert histogram.max_ms == 0.0
+
+
+def test_single_value():
+    histogram = LatencyHistogram()
+    histogram.record(0.25)
+
+    for percentile in [0, 50, 99, 100]:
+        assert histogram.percentile(percentile) == 250.0
+    assert histogram.mean_ms == 250.0
+    assert histogram.max_ms == 250.0
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram(significant_digits=2)
+    # values below 2 * 10^2 microseconds have buckets of their own
+    for value in range(1, 101):
+        histogram.record(value / 1000000.0)
+
+    assert histogram.percentile(50) == 0.05
+    assert histogram.percentile(90) == 0.09
+    assert histogram.percentile(100) == 0.1
+
+
+@pytest.mark.parametrize("significant_digits", [1, 2, 3])
+def test_percentiles_within_precision(significant_digits):
+    generator = random.Random(42)
+    values = [generator.lognormvariate(-4, 1.5) for _ in range(10000)]
+    histogram = LatencyHistogram(significant_digits)
+    for value in values:
+        histogram.record(value)
+
+    for percentile in [50, 90, 99, 99.9]:
+        exact = round(exact_percentile(values, percentile) * 1000, 3)
+        reported = histogram.percentile(percentile)
+        # a bucket covers a relative range of 10^-digits, the reported value is its upper end
+        assert exact - 0.001 <= reported <= exact * (1 + 10 ** -significant_digits) + 0.001
+
+
+def test_percentile_never_exceeds_max():
+    histogram = LatencyHistogram()
+    for value in [0.001, 0.002, 1.2345]:
+        histogram.record(value)
+
+    assert histogram.percentile(100) == histogram.max_ms == 1234.5
+
+
+def test_merge_equals_recording_all_values():
+    generator = random.Random(7)
+    values = [generator.expovariate(20) for _ in range(2000)]
+    merged = LatencyHistogram()
+    first = LatencyHistogram()
+    second = LatencyHistogram()
+    for index, value in enumerate(values):
+        merged.record(value)
+        (first if index % 2 else second).record(value)
+    first.merge(second)
+
+    assert first.summary() == merged.summary()
+    assert first.min == merged.min
+
+
+def test_merge_of_different_precision_fails():
+    with pytest.raises(AssertionError):
+        LatencyHistogram(2).merge(LatencyHistogram(3))
+
+
+def test_recorder_times_by_endpoint():
+    recorder = LatencyRecorder()
+    recorder.record('GET /v2/apps', 0.1)
+    recorder.record('GET /v2/apps', 0.3)
+    recorder.record('POST /v2/apps', 0.2)
+
+    summary = recorder.summary()
+    assert summary['GET /v2/apps']['count'] == 2
+    assert summary['GET /v2/apps']['max'] == 300.0
+    assert summary['POST /v2/apps']['p50'] == 200.0
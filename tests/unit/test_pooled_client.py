@@ -0,0 +1,28 @@
+"""
+    TLS verification of the clients taken from `core.ssl_verify`.
+"""
+import ssl
+
+import pytest
+
+from pooled_client import aiohttp_ssl, ssl_verify
+
+
+@pytest.mark.parametrize('value,verify,aiohttp', [
+    (None, None, None),
+    ('true', True, None),
+    ('False', False, False)
+])
+def test_ssl_verify(value, verify, aiohttp):
+    toml_config = {'core.ssl_verify': value}
+
+    assert ssl_verify(toml_config) is verify
+    assert aiohttp_ssl(toml_config) is aiohttp
+
+
+def test_ca_bundle_is_an_ssl_context(monkeypatch):
+    cafiles = []
+    monkeypatch.setattr(ssl, 'create_default_context', lambda cafile: cafiles.append(cafile) or cafile)
+
+    assert aiohttp_ssl({'core.ssl_verify': '/etc/ca.pem'}) == '/etc/ca.pem'
+    assert cafiles == ['/etc/ca.pem']
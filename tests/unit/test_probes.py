@@ -0,0 +1,28 @@
+"""
+    Running tasks of apps and pods counted by the `apps` probe.
+"""
+import pytest
+
+import probes
+from probes import MarathonAppsProbe, ScaleProbe
+
+
+def pod_status(*instances):
+    return {'id': '/pod', 'instances': [
+        {'containers': [{'name': 'container-{}'.format(i), 'status': status} for i, status in enumerate(containers)]}
+        for containers in instances]}
+
+
+def test_apps_probe_counts_pod_containers(monkeypatch):
+    listings = {
+        'v2/apps': [{'id': '/a', 'tasksRunning': 3}, {'id': '/b'}],
+        'v2/pods/::status': [pod_status(['TASK_RUNNING', 'TASK_RUNNING'], ['TASK_RUNNING', 'TASK_STAGING'])]
+    }
+    monkeypatch.setattr(probes, 'marathon_records', lambda path, key: iter(listings[path]))
+
+    assert MarathonAppsProbe().current_scale() == 6
+
+
+def test_probe_without_backend_can_not_be_created():
+    with pytest.raises(TypeError):
+        ScaleProbe()
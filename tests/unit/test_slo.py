@@ -0,0 +1,53 @@
+"""
+    Crash point and unresponsive Marathon in the steps of the `SloMonitor`.
+"""
+import pytest
+
+from slo import LeaderPing, SloMonitor
+
+
+class FakeClient(object):
+
+    def __init__(self, responding=True):
+        self.responding = responding
+
+    def get_apps(self):
+        if not self.responding:
+            raise Exception('connection refused')
+        return []
+
+
+def create_monitor(client):
+    return SloMonitor(client, 'http://localhost:1/', conditions=[], read_samples=1, response_timeout=0)
+
+
+def fail_step(monitor):
+    with monitor.step(1000):
+        raise Exception('deployment timed out')
+
+
+def test_crash_point_of_a_responding_marathon(monkeypatch):
+    monkeypatch.setattr(LeaderPing, 'ping', lambda self, session=None: True)
+    monitor = create_monitor(FakeClient())
+
+    fail_step(monitor)
+
+    assert monitor.stopped
+    assert monitor.result().crash == 1000
+
+
+def test_marathon_which_stopped_responding_fails(monkeypatch):
+    monkeypatch.setattr(LeaderPing, 'ping', lambda self, session=None: False)
+    monitor = create_monitor(FakeClient())
+
+    with pytest.raises(Exception, match='stopped responding'):
+        fail_step(monitor)
+
+
+def test_failed_reads_of_a_step_fail(monkeypatch):
+    monkeypatch.setattr(LeaderPing, 'ping', lambda self, session=None: True)
+    monitor = create_monitor(FakeClient(responding=False))
+
+    with pytest.raises(Exception, match='connection refused'):
+        with monitor.step(1000):
+            pass
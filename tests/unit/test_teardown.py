@@ -0,0 +1,26 @@
+"""
+    Killed tasks of the `TeardownStats`.
+"""
+from teardown import TeardownStats
+
+
+def test_killed_tasks_are_unknown_without_complete_events():
+    stats = TeardownStats(['/app'])
+    stats.task_gone()
+    stats.completion_time = 2.0
+
+    assert stats.killed is None
+    assert stats.kill_rate is None
+    assert stats.kill_rates() is None
+
+
+def test_killed_tasks_with_complete_events():
+    stats = TeardownStats(['/app'])
+    stats.task_gone()
+    stats.task_gone()
+    stats.completion_time = 2.0
+    stats.events_complete = True
+
+    assert stats.killed == 2
+    assert stats.kill_rate == 1.0
+    assert stats.kill_rates() == [(0, 2), (1, 0), (2, 0)]